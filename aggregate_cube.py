@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Aggregate Cube
+
+Every new question, such as male dogs only, 2019 only, or spayed versus
+intact, has meant another pass over the full tables. This module
+materializes two sparse count cubes from the cached tables in one pass each:
+- bites:    breed x year x month x borough x gender x spayed
+- licenses: breed x issued_year x issued_month x expired_year x borough x gender
+Breeds are kept as raw strings so any script's classification can be
+applied at query time. License boroughs are derived from the ZIP.
+
+Only non-empty cells are stored, one int column per dimension plus a
+count column, in `.cache/cube.bin` next to the bite snapshot (same
+magic + JSON header + array layout as the dataset cache). The cube is
+rebuilt when either snapshot's size or mtime changes, or when the
+dataset cache's CACHE_VERSION does (the tables it was built from changed).
+
+Cube.query(by, where, classify) slices and rolls up:
+- by: dimensions to group by (empty = grand total)
+- where: {dimension: value | collection | predicate}, matched against
+  decoded values (borough/gender/spayed names, classified breed labels)
+- classify: raw breed -> label; cells whose label is None are dropped
+With NumPy available, queries run as array masks and a bincount.
+
+Usage:
+    python3 aggregate_cube.py query bites --by breed,spayed --where year=2019 --where gender=M --classify analyze
+    python3 aggregate_cube.py report
+"""
+
+import argparse
+import array
+import json
+import os
+import struct
+import time
+from collections import Counter
+
+import vector_engine
+from animal_codes import GENDERS, SPAY_STATUS
+from dataset_cache import BITE_CSV, CACHE_DIR, CACHE_VERSION, LICENSE_CSV, load_bites, load_licenses, resolve_snapshot
+from geo_codes import BOROUGHS, zip_borough
+
+if vector_engine.available():
+    import numpy as np
+
+# --- Configuration ---
+CUBE_MAGIC = b"PBCU"
+CUBE_VERSION = 1
+
+BITE_DIMENSIONS = ('breed', 'year', 'month', 'borough', 'gender', 'spayed')
+LICENSE_DIMENSIONS = ('breed', 'issued_year', 'issued_month', 'expired_year', 'borough', 'gender')
+
+# Dimension -> array typecode
+DIMENSION_TYPES = {
+    'breed': 'i',
+    'year': 'h', 'issued_year': 'h', 'expired_year': 'h',
+    'month': 'b', 'issued_month': 'b',
+    'borough': 'b', 'gender': 'b', 'spayed': 'b',
+}
+
+# Dimensions stored as an index into a name table
+NAMED_CODES = {'borough': BOROUGHS, 'gender': GENDERS, 'spayed': SPAY_STATUS}
+
+
+class Cube:
+    """Sparse counts over a fixed set of dimensions."""
+
+    def __init__(self, dimensions, columns, breeds):
+        self.dimensions = dimensions
+        self.columns = columns          # dimension -> array.array, plus 'count'
+        self.breeds = breeds
+
+    def __len__(self):
+        return len(self.columns['count'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def total(self):
+        return sum(self.columns['count'])
+
+    def _decoder(self, dim, classify):
+        if dim == 'breed':
+            breeds = self.breeds
+            return (lambda code: classify(breeds[code])) if classify else breeds.__getitem__
+        if dim in NAMED_CODES:
+            return NAMED_CODES[dim].__getitem__
+        return int
+
+    def _allowed_codes(self, dim, cond, decode):
+        matches = cond if callable(cond) else (
+            (lambda v: v in cond) if isinstance(cond, (set, frozenset, list, tuple, range)) else (lambda v: v == cond))
+        return {code for code in set(self.columns[dim]) if matches(decode(code))}
+
+    def query(self, by=(), where=None, classify=None):
+        """
+        Roll the cube up to the `by` dimensions over the cells matching `where`.
+
+        Returns:
+            Counter: tuple of decoded `by` values -> count
+        """
+        unknown = [d for d in list(by) + list(where or {}) if d not in self.dimensions]
+        if unknown:
+            raise ValueError(f"Unknown dimension(s) {', '.join(unknown)}; cube has {', '.join(self.dimensions)}")
+        decoders = {dim: self._decoder(dim, classify) for dim in self.dimensions}
+        filters = {dim: self._allowed_codes(dim, cond, decoders[dim]) for dim, cond in (where or {}).items()}
+        if classify is not None:
+            breed_ok = self._allowed_codes('breed', lambda label: label is not None, decoders['breed'])
+            filters['breed'] = filters.get('breed', breed_ok) & breed_ok
+
+        if vector_engine.available():
+            return self._query_vectorized(by, filters, decoders)
+
+        result = Counter()
+        checks = [(self.columns[dim], ok) for dim, ok in filters.items()]
+        groups = [(self.columns[dim], {code: decoders[dim](code) for code in set(self.columns[dim])}) for dim in by]
+        for i, n in enumerate(self.columns['count']):
+            if all(col[i] in ok for col, ok in checks):
+                result[tuple(values[col[i]] for col, values in groups)] += n
+        return result
+
+    def _query_vectorized(self, by, filters, decoders):
+        counts = vector_engine.column(self, 'count')
+        mask = np.ones(len(counts), dtype=bool)
+        for dim, ok in filters.items():
+            mask &= np.isin(vector_engine.column(self, dim), np.fromiter(ok, dtype=np.int64, count=len(ok)))
+        counts = counts[mask]
+        if not by:
+            return Counter({(): int(counts.sum())}) if len(counts) else Counter()
+
+        uniques, inverses = [], []
+        for dim in by:
+            u, inv = np.unique(vector_engine.column(self, dim)[mask], return_inverse=True)
+            uniques.append(u)
+            inverses.append(inv.ravel())
+        shape = [len(u) for u in uniques]
+        groups, group_of = np.unique(np.ravel_multi_index(inverses, shape), return_inverse=True)
+        sums = np.bincount(group_of.ravel(), weights=counts, minlength=len(groups))
+
+        # Several codes can decode to one label (classified breeds), so accumulate
+        result = Counter()
+        for idx, n in zip(zip(*np.unravel_index(groups, shape)), sums):
+            key = tuple(decoders[dim](int(u[i])) for dim, u, i in zip(by, uniques, idx))
+            result[key] += int(n)
+        return result
+
+
+def _build_cube(columns, dimensions, breeds):
+    cells = Counter(zip(*(columns[dim] for dim in dimensions)))
+    out = {dim: array.array(DIMENSION_TYPES[dim], (cell[i] for cell in cells)) for i, dim in enumerate(dimensions)}
+    out['count'] = array.array('i', cells.values())
+    return Cube(dimensions, out, breeds)
+
+
+def build_cubes(bite_table, license_table):
+    """Materialize the bite and license cubes from cached tables."""
+    boroughs = {z: zip_borough(z) for z in set(license_table['zip'])}
+    license_boroughs = array.array('b', map(boroughs.__getitem__, license_table['zip']))
+    license_columns = dict(license_table.columns, borough=license_boroughs)
+    return {
+        'bites': _build_cube(bite_table.columns, BITE_DIMENSIONS, bite_table.breeds),
+        'licenses': _build_cube(license_columns, LICENSE_DIMENSIONS, license_table.breeds),
+    }
+
+
+def _sources(bite_csv, license_csv):
+    """What the cube was built from: both snapshots' size and mtime, and the table layout version."""
+    stats = {name: os.stat(resolve_snapshot(path)) for name, path in (('bites', bite_csv), ('licenses', license_csv))}
+    sources = {name: [st.st_size, st.st_mtime_ns] for name, st in stats.items()}
+    sources['cache_version'] = CACHE_VERSION
+    return sources
+
+
+def _cube_path(bite_csv):
+    return os.path.join(os.path.dirname(os.path.abspath(bite_csv)), CACHE_DIR, 'cube.bin')
+
+
+def save_cubes(path, cubes, sources):
+    header = {'version': CUBE_VERSION, 'sources': sources, 'cubes': {}}
+    for name, cube in cubes.items():
+        header['cubes'][name] = {
+            'dimensions': cube.dimensions,
+            'columns': [(dim, col.typecode, len(col)) for dim, col in cube.columns.items()],
+            'breeds': cube.breeds,
+        }
+    header_bytes = json.dumps(header).encode('utf-8')
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(CUBE_MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for cube in cubes.values():
+            for col in cube.columns.values():
+                col.tofile(f)
+    os.replace(tmp_path, path)
+
+
+def _read_cubes(path, sources):
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < 8 or data[:4] != CUBE_MAGIC:
+        return None
+    (header_len,) = struct.unpack('<I', data[4:8])
+    header = json.loads(data[8:8 + header_len].decode('utf-8'))
+    if header.get('version') != CUBE_VERSION or header.get('sources') != sources:
+        return None
+
+    cubes = {}
+    offset = 8 + header_len
+    for name, spec in header['cubes'].items():
+        columns = {}
+        for dim, typecode, length in spec['columns']:
+            col = array.array(typecode)
+            nbytes = length * col.itemsize
+            col.frombytes(data[offset:offset + nbytes])
+            columns[dim] = col
+            offset += nbytes
+        cubes[name] = Cube(tuple(spec['dimensions']), columns, spec['breeds'])
+    return cubes
+
+
+def load_cubes(bite_csv=BITE_CSV, license_csv=LICENSE_CSV, rebuild=False):
+    """Load the bite and license cubes, building them if stale or missing."""
+    path = _cube_path(bite_csv)
+    sources = _sources(bite_csv, license_csv)
+    cubes = None if rebuild else _read_cubes(path, sources)
+    if cubes is None:
+        cubes = build_cubes(load_bites(bite_csv), load_licenses(license_csv))
+        save_cubes(path, cubes, sources)
+    return cubes
+
+
+def analyze_report(cubes, max_year=2022, target_pop_year=2022, min_licenses=100, top=20):
+    """analyze_dog_bites' risk ranking, computed from the cubes."""
+    from analyze_dog_bites import EXCLUDED_BREEDS, clean_breed
+
+    def classify(raw):
+        label = clean_breed(raw)
+        return None if label in EXCLUDED_BREEDS else label
+
+    bites = cubes['bites'].query(('breed',), {'year': lambda y: y <= max_year}, classify)
+    licenses = cubes['licenses'].query(('breed',), {
+        'issued_year': lambda y: 0 < y <= target_pop_year,
+        'expired_year': lambda y: y >= target_pop_year,
+    }, classify)
+
+    stats = []
+    for (breed,), n in licenses.items():
+        if n >= min_licenses:
+            stats.append((breed, bites.get((breed,), 0), n, bites.get((breed,), 0) / n))
+    stats.sort(key=lambda s: s[3], reverse=True)
+    return stats[:top]
+
+
+def _parse_where(spec, numeric):
+    dim, _, value = spec.partition('=')
+    dim = dim.strip()
+    if dim in numeric:
+        if ':' in value:
+            lo, _, hi = value.partition(':')
+            return dim, range(int(lo), int(hi) + 1)
+        values = [int(v) for v in value.split(',')]
+    else:
+        values = [v.strip() for v in value.split(',')]
+    return dim, values[0] if len(values) == 1 else set(values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialized bite/license cubes with slice and roll-up queries.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('build', help="(re)build the cube from the cached tables")
+    q = sub.add_parser('query', help="group and filter one cube")
+    q.add_argument('cube', choices=['bites', 'licenses'])
+    q.add_argument('--by', default='breed', help="comma-separated dimensions ('' for the grand total)")
+    q.add_argument('--where', action='append', default=[], help="DIM=VALUE[,VALUE...] or DIM=LO:HI; repeatable")
+    q.add_argument('--classify', choices=['raw', 'analyze', 'redistribute'], default='raw')
+    q.add_argument('--top', type=int, default=20)
+    sub.add_parser('report', help="analyze_dog_bites' risk ranking from the cube")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    cubes = load_cubes(rebuild=args.command == 'build')
+    loaded = time.perf_counter()
+    print(f"Cube: {len(cubes['bites']):,} bite cells, {len(cubes['licenses']):,} license cells "
+          f"({(loaded - start) * 1000:.0f} ms to load)")
+
+    if args.command == 'query':
+        classify = None
+        if args.classify != 'raw':
+            from license_intervals import breed_classifiers
+            classify = breed_classifiers(args.classify)[0 if args.cube == 'bites' else 1]
+        numeric = {'year', 'month', 'issued_year', 'issued_month', 'expired_year'}
+        by = [d.strip() for d in args.by.split(',') if d.strip()]
+        try:
+            where = dict(_parse_where(w, numeric) for w in args.where)
+            result = cubes[args.cube].query(by, where, classify)
+        except ValueError as e:
+            parser.error(str(e))
+        elapsed = (time.perf_counter() - loaded) * 1000
+        print(f"\n{' x '.join(by) or 'total':<40} {'Count':>9}   ({elapsed:.1f} ms)")
+        print("-" * 52)
+        for key, n in result.most_common(args.top):
+            print(f"{' / '.join(str(k) for k in key) or 'all':<40} {n:>9,}")
+
+    elif args.command == 'report':
+        stats = analyze_report(cubes)
+        elapsed = (time.perf_counter() - loaded) * 1000
+        print(f"\nTop breeds by bite risk, as in analyze_dog_bites ({elapsed:.1f} ms)")
+        print(f"{'Rank':<5} {'Breed':<25} {'Risk':<8} {'Bites':<7} {'Licenses':<8}")
+        print("-" * 56)
+        for i, (breed, bites, licenses, risk) in enumerate(stats, 1):
+            print(f"{i:<5} {breed:<25} {risk:<8.4f} {bites:<7} {licenses:<8}")
+
+
+if __name__ == "__main__":
+    main()
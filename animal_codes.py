@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Animal Attribute Codes
+
+Decodes the per-dog attribute fields of the NYC snapshots into small
+integers for the dataset cache:
+- Gender (bites) / AnimalGender (licenses): an index into GENDERS
+- SpayNeuter (bites only): an index into SPAY_STATUS
+
+0 always means unknown, so a missing field and an unrecognized one are
+treated alike.
+"""
+
+GENDERS = ('Unknown', 'M', 'F')
+SPAY_STATUS = ('Unknown', 'Spayed/Neutered', 'Intact')
+
+_GENDER_NAMES = {'M': 1, 'MALE': 1, 'F': 2, 'FEMALE': 2}
+_SPAY_NAMES = {'TRUE': 1, 'YES': 1, 'Y': 1, 'FALSE': 2, 'NO': 2, 'N': 2}
+
+
+def parse_gender(gender_str):
+    """Decode a gender field to its GENDERS index (0 = unknown)."""
+    return _GENDER_NAMES.get(gender_str.strip().upper(), 0)
+
+
+def parse_spay_neuter(spay_str):
+    """Decode a SpayNeuter field ("true"/"false") to its SPAY_STATUS index (0 = unknown)."""
+    return _SPAY_NAMES.get(spay_str.strip().upper(), 0)
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+
+Times the three entry points and their hot functions against a synthetic
+snapshot (see synthetic_data.py) or any directory holding the two CSVs.
+
+Entry points (one fresh process per run, stdout discarded):
+- cremieux_analysis.main, analyze_dog_bites.main, redistribute_bites.main
+- "cold" runs start without a dataset cache (CSV parse included); "warm"
+  runs reuse it. The warm figure is the fastest of --repeat runs.
+
+Hot functions (timed over every row of the matching CSV column):
+- clean_breed, normalize_breed_for_bite, normalize_breed_for_license
+  through their memo (cleared first), and uncached via __wrapped__
+- parse_bite_date, parse_license_date, raw and through DateDecoder
+
+Each benchmark records rows, seconds, rows/sec and peak RSS of its process,
+so memory from one benchmark does not leak into the next. Results are
+written to benchmark_results.json. --compare OLD.json prints the change
+in rows/sec and exits non-zero if anything slowed down by more than
+REGRESSION_THRESHOLD.
+
+Usage:
+    python3 benchmark.py --scale 10 --repeat 3
+    python3 benchmark.py --data synthetic_10x --only hot --compare benchmark_results.json
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from dataset_cache import BITE_CSV, CACHE_DIR, LICENSE_CSV, open_snapshot
+
+# --- Configuration ---
+DATA_DIR = "benchmark_data"
+OUTPUT_JSON = "benchmark_results.json"
+REGRESSION_THRESHOLD = 0.10   # fraction of rows/sec lost before --compare fails
+
+ENTRY_POINTS = ['cremieux_analysis', 'analyze_dog_bites', 'redistribute_bites']
+
+# name -> (module, function, CSV, column, memoized)
+HOT_FUNCTIONS = {
+    'clean_breed': ('analyze_dog_bites', 'clean_breed', BITE_CSV, 'Breed', True),
+    'normalize_breed_for_bite': ('redistribute_bites', 'normalize_breed_for_bite', BITE_CSV, 'Breed', True),
+    'normalize_breed_for_license': ('redistribute_bites', 'normalize_breed_for_license', LICENSE_CSV, 'BreedName',
+                                    True),
+    'parse_bite_date': ('date_decoder', 'parse_bite_date', BITE_CSV, 'DateOfBite', False),
+    'parse_license_date': ('date_decoder', 'parse_license_date', LICENSE_CSV, 'LicenseIssuedDate', False),
+}
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def _count_rows(path):
+    with open_snapshot(path, newline='') as f:
+        return sum(1 for _ in csv.reader(f)) - 1
+
+
+def _read_column(path, field):
+    with open_snapshot(path, newline='') as f:
+        return [row[field] for row in csv.DictReader(f)]
+
+
+def _best_of(repeat, func, *args):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_entry_point(module_name):
+    """Run one entry point's main() in this process (stdout discarded). Returns seconds."""
+    module = __import__(module_name)
+    # Time the analysis itself, not a stage-cache hit (see stage_cache.py)
+    if hasattr(module, 'FORCE_RERUN'):
+        module.FORCE_RERUN = True
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        module.main()
+        return time.perf_counter() - start
+
+
+def run_hot_function(name, repeat):
+    """Time one hot function over its CSV column. Returns a list of result dicts."""
+    module_name, func_name, csv_path, field, memoized = HOT_FUNCTIONS[name]
+    func = getattr(__import__(module_name), func_name)
+    values = _read_column(csv_path, field)
+
+    def call_all(f):
+        for value in values:
+            f(value)
+
+    if memoized:
+        def through_memo():
+            func.cache_clear()
+            call_all(func)
+        variants = [(name, through_memo), (name + ' [uncached]', lambda: call_all(func.__wrapped__))]
+    else:
+        from date_decoder import DateDecoder
+        variants = [(name, lambda: call_all(func)), (name + ' [DateDecoder]', lambda: call_all(DateDecoder(func)))]
+
+    return [{'name': label, 'rows': len(values), 'seconds': _best_of(repeat, run)} for label, run in variants]
+
+
+def _child(args):
+    """Entry for the per-benchmark subprocess: run, then print one JSON line."""
+    if args.no_numpy:
+        import vector_engine
+        vector_engine.USE_NUMPY = False
+    if args.child in HOT_FUNCTIONS:
+        results = run_hot_function(args.child, args.repeat)
+    else:
+        results = [{'name': f"{args.child}.main", 'seconds': run_entry_point(args.child)}]
+    peak = _peak_rss_mb()
+    for r in results:
+        r['peak_rss_mb'] = peak
+    print(json.dumps(results))
+
+
+def _spawn(name, data_dir, repeat=1, no_numpy=False):
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', name, '--repeat', str(repeat)]
+    if no_numpy:
+        cmd.append('--no-numpy')
+    out = subprocess.run(cmd, cwd=data_dir, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def run_suite(data_dir, repeat=3, only=None, no_numpy=False):
+    """Run the benchmarks against data_dir. Returns a list of result dicts."""
+    # Every entry point reads both snapshots
+    rows = _count_rows(os.path.join(data_dir, BITE_CSV)) + _count_rows(os.path.join(data_dir, LICENSE_CSV))
+    results = []
+
+    if only in (None, 'entry'):
+        for module_name in ENTRY_POINTS:
+            shutil.rmtree(os.path.join(data_dir, CACHE_DIR), ignore_errors=True)
+            cold = _spawn(module_name, data_dir, no_numpy=no_numpy)[0]
+            warm = [_spawn(module_name, data_dir, no_numpy=no_numpy)[0] for _ in range(repeat)]
+            best = min(warm, key=lambda r: r['seconds'])
+            best['peak_rss_mb'] = max((w['peak_rss_mb'] for w in warm), default=None)
+            cold['name'], best['name'] = f"{cold['name']} [cold]", f"{best['name']} [warm]"
+            cold['rows'] = best['rows'] = rows
+            results += [cold, best]
+
+    if only in (None, 'hot'):
+        for name in HOT_FUNCTIONS:
+            results.extend(_spawn(name, data_dir, repeat, no_numpy))
+
+    for r in results:
+        r['rows_per_sec'] = r['rows'] / r['seconds'] if r['seconds'] else None
+    return results
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Print rows/sec changes against an earlier results file. Returns the names that regressed."""
+    previous = {r['name']: r for r in baseline['results']}
+    regressed = []
+    print(f"\n{'Benchmark':<45} {'Before':>12} {'After':>12} {'Change':>8}")
+    print("-" * 80)
+    for r in results:
+        old = previous.get(r['name'])
+        if not old or not old.get('rows_per_sec') or not r['rows_per_sec']:
+            continue
+        change = r['rows_per_sec'] / old['rows_per_sec'] - 1
+        flag = "  REGRESSION" if change < -threshold else ""
+        if flag:
+            regressed.append(r['name'])
+        print(f"{r['name']:<45} {old['rows_per_sec']:>12,.0f} {r['rows_per_sec']:>12,.0f} {change:>+7.1%}{flag}")
+    return regressed
+
+
+def _numpy_available():
+    import vector_engine
+    return vector_engine.available()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the entry points and hot functions.")
+    parser.add_argument('--data', default=None, help="directory with the two CSVs (default: generate one)")
+    parser.add_argument('--scale', type=float, default=1, help="synthetic scale when --data is not given")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per benchmark; the fastest is kept")
+    parser.add_argument('--only', choices=['entry', 'hot'], default=None)
+    parser.add_argument('--no-numpy', action='store_true', help="force the pure-Python counting path")
+    parser.add_argument('--output', default=OUTPUT_JSON)
+    parser.add_argument('--compare', default=None, metavar='OLD_JSON', help="report changes against OLD_JSON")
+    parser.add_argument('--child', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args)
+        return
+
+    data_dir = args.data
+    if data_dir is None:
+        data_dir = os.path.join(DATA_DIR, f"{args.scale:g}x")
+        if not os.path.exists(os.path.join(data_dir, LICENSE_CSV)):
+            from synthetic_data import generate
+            print(f"Generating {args.scale:g}x synthetic data in {data_dir}/...")
+            generate(data_dir, args.scale)
+
+    results = run_suite(data_dir, args.repeat, args.only, args.no_numpy)
+
+    print(f"\n{'Benchmark':<45} {'Rows':>11} {'Seconds':>9} {'Rows/sec':>12} {'Peak RSS':>10}")
+    print("-" * 91)
+    for r in results:
+        rss = f"{r['peak_rss_mb']:>7.1f} MB" if r['peak_rss_mb'] else f"{'-':>10}"
+        print(f"{r['name']:<45} {r['rows']:>11,} {r['seconds']:>9.3f} {r['rows_per_sec']:>12,.0f} {rss}")
+
+    record = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'data': os.path.abspath(data_dir),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': not args.no_numpy and _numpy_available(),
+        'results': results,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    with open(args.output, 'w') as f:
+        json.dump(record, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if baseline is not None and compare(results, baseline):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
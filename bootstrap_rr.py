@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Bootstrap Confidence Intervals for Relative Risk
+
+The RR tables in redistribute_bites.py and analyze_dog_bites.py are point
+estimates. This script puts uncertainty on them by resampling the bite and
+license records thousands of times. Each replicate draws multinomial
+counts with the observed totals and per-breed shares, which is equivalent
+to resampling rows.
+
+For every breed above MIN_LICENSES it reports:
+- a percentile CI for its RR versus the Maltese baseline
+- rank stability: the median rank, a rank interval, and how often the
+  breed ranks #1
+
+Replicates are split into fixed-size chunks with independent seeds and
+spread across a process pool. Run time scales with core count, and a
+given seed gives the same result for any number of workers.
+
+Usage:
+    python3 bootstrap_rr.py --replicates 10000 --workers 8 --seed 1
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dataset_cache import load_bites, load_licenses
+from redistribute_bites import BITE_CSV, LICENSE_CSV, MIN_LICENSES, aggregate_bites, count_licenses
+
+# --- Configuration ---
+BASELINE = 'Maltese'
+DEFAULT_REPLICATES = 10_000
+CHUNK_SIZE = 250  # replicates per task; fixed so results don't depend on worker count
+CI_LEVEL = 95
+
+
+def _bootstrap_chunk(bite_vec, license_vec, baseline, eligible, n, seed):
+    """Run n replicates; return (n x len(eligible)) RR samples."""
+    rng = np.random.default_rng(seed)
+    bites = rng.multinomial(bite_vec.sum(), bite_vec / bite_vec.sum(), size=n)
+    licenses = rng.multinomial(license_vec.sum(), license_vec / license_vec.sum(), size=n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        risk = bites / licenses
+        return risk[:, eligible] / risk[:, [baseline]]
+
+
+def bootstrap_relative_risk(bite_counts, license_counts, baseline=BASELINE, replicates=DEFAULT_REPLICATES,
+                            workers=None, seed=None, min_licenses=MIN_LICENSES, ci_level=CI_LEVEL):
+    """
+    Bootstrap per-breed RR versus `baseline` from bite and license counts.
+
+    Args:
+        bite_counts (dict): breed -> bites
+        license_counts (dict): breed -> licenses
+        baseline (str): Reference breed (RR = 1)
+        replicates (int): Number of bootstrap replicates
+        workers (int or None): Process pool size (default: all cores)
+        seed (int or None): Seed for reproducible runs
+        min_licenses (int): Breeds below this license count are not reported
+        ci_level (float): Central interval width in percent
+
+    Returns:
+        dict: breed -> {'rr', 'ci', 'median_rank', 'rank_ci', 'p_rank1'},
+        in point-estimate RR order
+
+    Raises:
+        ValueError: If replicates < 1 or the baseline is unusable
+    """
+    if replicates < 1:
+        raise ValueError(f"replicates must be at least 1, got {replicates}")
+    breeds = sorted(set(bite_counts) | set(license_counts))
+    bite_vec = np.array([bite_counts.get(b, 0) for b in breeds], dtype=np.int64)
+    license_vec = np.array([license_counts.get(b, 0) for b in breeds], dtype=np.int64)
+    if license_counts.get(baseline, 0) < min_licenses or not bite_counts.get(baseline):
+        raise ValueError(f"Baseline '{baseline}' needs bites and at least {min_licenses} licenses")
+
+    base = breeds.index(baseline)
+    eligible = [i for i, n in enumerate(license_vec) if n >= min_licenses]
+
+    sizes = [CHUNK_SIZE] * (replicates // CHUNK_SIZE)
+    if replicates % CHUNK_SIZE:
+        sizes.append(replicates % CHUNK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_bootstrap_chunk, bite_vec, license_vec, base, eligible, n, s)
+                   for n, s in zip(sizes, seeds)]
+        rr = np.concatenate([f.result() for f in futures])
+
+    # Rank 1 = highest RR in that replicate (NaN, i.e. 0/0, sorts last)
+    order = np.argsort(-np.nan_to_num(rr, nan=-np.inf), axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, len(eligible) + 1), axis=1)
+
+    tail = (100 - ci_level) / 2
+    rr_ci = np.nanpercentile(rr, [tail, 100 - tail], axis=0)
+    # Ranks are integers: widen outward to observed ranks rather than truncating interpolated ones
+    rank_lo = np.percentile(ranks, tail, axis=0, method='lower')
+    rank_hi = np.percentile(ranks, 100 - tail, axis=0, method='higher')
+    median_rank = np.median(ranks, axis=0)
+    p_rank1 = (ranks == 1).mean(axis=0)
+
+    base_risk = bite_vec[base] / license_vec[base]
+    results = {}
+    for j, i in enumerate(eligible):
+        results[breeds[i]] = {
+            'rr': float(bite_vec[i] / license_vec[i] / base_risk),
+            'ci': (float(rr_ci[0, j]), float(rr_ci[1, j])),
+            'median_rank': float(median_rank[j]),
+            'rank_ci': (int(rank_lo[j]), int(rank_hi[j])),
+            'p_rank1': float(p_rank1[j]),
+        }
+    return dict(sorted(results.items(), key=lambda x: x[1]['rr'], reverse=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bootstrap CIs for per-breed relative risk.")
+    parser.add_argument('--replicates', type=int, default=DEFAULT_REPLICATES)
+    parser.add_argument('--workers', type=int, default=None, help="default: all cores")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+    if args.replicates < 1:
+        parser.error(f"--replicates must be at least 1, got {args.replicates}")
+
+    print("=" * 70)
+    print(f"BOOTSTRAP RELATIVE RISK ({args.replicates:,} replicates, {args.workers or os.cpu_count()} workers)")
+    print("=" * 70)
+
+    bite_counts = aggregate_bites(load_bites(BITE_CSV))['counts']
+    license_counts = count_licenses(load_licenses(LICENSE_CSV))
+    results = bootstrap_relative_risk(bite_counts, license_counts, args.baseline, args.replicates,
+                                      args.workers, args.seed)
+
+    print(f"\n{'Rank':<5} {'Breed':<25} {'RR':<8} {f'{CI_LEVEL}% CI':<16} {'Rank CI':<9} {'P(#1)':<8}")
+    print("-" * 70)
+    for i, (breed, r) in enumerate(list(results.items())[:args.top], 1):
+        ci = f"{r['ci'][0]:.2f}-{r['ci'][1]:.2f}"
+        rank_ci = f"{r['rank_ci'][0]}-{r['rank_ci'][1]}"
+        print(f"{i:<5} {breed:<25} {r['rr']:<8.2f} {ci:<16} {rank_ci:<9} {r['p_rank1']*100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Breed Normalization Memo
+
+The bite and license datasets have hundreds of thousands of rows but only
+a few thousand distinct breed strings. Wrapping a breed classifier with
+`memoize_breed` runs its substring rules once per distinct raw string and
+answers every repeat with a single dict lookup.
+
+The memo is bounded (BREED_CACHE_SIZE entries, least-recently-used
+eviction) so a pathological input cannot grow it without limit, and it
+keeps hit/miss statistics for `cache_report`.
+"""
+
+from functools import lru_cache
+
+# --- Configuration ---
+# Comfortably above the number of distinct breed strings in either snapshot
+BREED_CACHE_SIZE = 16384
+
+
+def memoize_breed(func):
+    """Memoize a single-argument breed classifier on its raw string."""
+    return lru_cache(maxsize=BREED_CACHE_SIZE)(func)
+
+
+def cache_report(*funcs):
+    """Format hit/miss statistics for memoized classifiers, one line each."""
+    lines = []
+    for func in funcs:
+        info = func.cache_info()
+        calls = info.hits + info.misses
+        hit_rate = info.hits / calls * 100 if calls else 0.0
+        lines.append(
+            f"{func.__name__}: {info.misses} distinct / {calls} calls "
+            f"({hit_rate:.1f}% hits, {info.currsize}/{info.maxsize} cached)"
+        )
+    return lines
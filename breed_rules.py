@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Breed Rule Tables
+
+Declarative breed classification rules, one ordered table per methodology:
+- CREMIEUX: Cremieux's exact footnote strings plus the bite keyword variants
+- KEYWORD: the "Pit Bull Type" keyword grouping used by analyze_dog_bites
+  (split into a raw-string pass and a pass over the de-mixed base breed)
+- LOOKALIKE: the big-dog lookalike categories used by redistribute_bites,
+  with separate bite and license tables
+
+Each table is compiled into a RuleMatcher: exact strings are a dict lookup,
+and all keywords are scanned in a single compiled regex alternation instead
+of one substring search per rule. Rule order is precedence, exactly as in
+the hand-written `if "X" in b` ladders the tables replace (e.g. Pit Bull
+before Bulldog, Maltipoo before Maltese).
+"""
+
+import re
+from collections import namedtuple
+
+# A rule fires when ANY of `keywords` occurs in the upper-cased breed string,
+# ALL of `requires` occur, and NONE of `excludes` occur.
+Rule = namedtuple('Rule', ['label', 'keywords', 'requires', 'excludes'], defaults=((), ()))
+
+
+class RuleMatcher:
+    """Ordered keyword rules compiled into one regex scan.
+
+    The pattern is a zero-width lookahead over every keyword, listed in rule
+    order, so the scan reports a match at every position and, at each
+    position, the highest-precedence keyword starting there. The lowest rule
+    index seen is therefore the first rule whose keyword occurs anywhere.
+    """
+
+    def __init__(self, rules, exact=None):
+        self.rules = list(rules)
+        self.exact = dict(exact or {})
+        self._owner = {}
+        for index, rule in enumerate(self.rules):
+            for keyword in rule.keywords:
+                self._owner.setdefault(keyword, index)
+        alternation = '|'.join(re.escape(k) for k in self._owner)
+        self._scan = re.compile(f'(?=({alternation}))').finditer
+
+    def classify(self, b):
+        """Return the label of the first matching rule, or None.
+
+        Exact strings are looked up on `b` as given; keyword rules are
+        matched against `b.upper()`.
+        """
+        if b in self.exact:
+            return self.exact[b]
+        upper = b.upper()
+        owner = self._owner
+        hits = {owner[m.group(1)] for m in self._scan(upper)}
+        if not hits:
+            return None
+        first = min(hits)
+        rule = self.rules[first]
+        if self._conditions_hold(rule, upper):
+            return rule.label
+        # The first candidate was vetoed by requires/excludes. A keyword
+        # sharing its start position may have been hidden by the scan, so
+        # finish with a plain ordered walk from there.
+        for rule in self.rules[first + 1:]:
+            if any(k in upper for k in rule.keywords) and self._conditions_hold(rule, upper):
+                return rule.label
+        return None
+
+    @staticmethod
+    def _conditions_hold(rule, upper):
+        return (all(k in upper for k in rule.requires)
+                and not any(k in upper for k in rule.excludes))
+
+
+# --- Cremieux: exact footnote strings ---
+# Cremieux's EXACT Pit Bull Type breed strings (from footnote image in PDF)
+CREMIEUX_PIT_BULLS = {
+    'American Pit Bull Terrier',
+    'American Pit Bull Mix / Pit Bull Mix',
+    'Pit Bull',
+    'Pit Bull Mix',
+    'American Staffordshire Terrier',
+    'Staffordshire Bull Terrier',
+    'American Pit Bull Terrier Crossbreed',
+    'American Staffordshire Terrier Crossbreed',
+}
+
+# Maltese breeds (per his back-classification method)
+CREMIEUX_MALTESE = {'Maltese', 'Maltese Crossbreed'}
+
+CREMIEUX_EXACT = {
+    **{s: 'Pit Bull' for s in CREMIEUX_PIT_BULLS},
+    **{s: 'Maltese' for s in CREMIEUX_MALTESE},
+}
+
+# Bite data is less granular, so variants are matched by keyword
+CREMIEUX_BITE_RULES = [
+    Rule('Pit Bull', ('PIT BULL', 'STAFFORDSHIRE')),
+    Rule('Maltese', ('MALTESE',)),
+]
+
+
+# --- Keyword grouping (analyze_dog_bites) ---
+UNKNOWN_STRINGS = ["UNKNOWN", "UNCERTAIN", "NO DOG", ""]
+MIXED_STRINGS = ["MIXED", "MIXED BREED", "LARGE MIXED BREED", "MEDIUM MIXED BREED", "SMALL MIXED BREED",
+                 "MUTT", "MONGREL", "MIXED/OTHER", "MIXED OTHER"]
+
+# Rules applied to the raw (upper-cased) string, before mix indicators are stripped
+KEYWORD_RULES = [
+    # Fix spellings
+    Rule('Schipperke', ('SCHIPPERKE',)),  # Covers SCHIPPERKE and SCHIPPERKEE
+    Rule('Pharaoh Hound', ('PHAR',), requires=('HOUND',)),
+    # "Pit Bull Mix", "American Pit Bull Terrier/Pit Bull" etc -> Pit Bull
+    Rule('Pit Bull', ('PIT BULL', 'PITBULL', 'STAFFORDSHIRE TERRIER', 'AM STAFF', 'AMERICAN BULLY')),
+    Rule('Schnauzer', ('SCHNAUZER',)),
+    Rule('Maltipoo', ('MALTI',), requires=('POO',)),  # Covers MALTIPOO
+    Rule('Mastiff', ('MASTIFF',)),  # Covers BULLMASTIFF
+    Rule('Vizsla', ('VIZSLA',)),
+    Rule('Jack Russell Terrier', ('JACK RUSS',)),
+]
+
+KEYWORD_EXACT = {
+    **{s: 'Unknown' for s in UNKNOWN_STRINGS},
+    **{s: 'Mixed/Other' for s in MIXED_STRINGS},
+}
+
+# Rules applied to the base breed once " MIX", " CROSSBREED", " X" and "/" are stripped
+BASE_BREED_RULES = [
+    Rule('Mixed/Other', ('ED BREED',)),  # Cleaning artifact of "MIXED BREED"
+    Rule('Labrador Retriever', ('LABRADOR', 'LAB ')),
+    Rule('German Shepherd', ('GERMAN SHEPHERD', 'SHEPERD', 'SHEPHERD')),
+    Rule('Rottweiler', ('ROTTWEILER',)),
+    Rule('Chihuahua', ('CHIHUAHUA',)),
+    Rule('Shih Tzu', ('SHIH TZU',)),
+    Rule('Yorkshire Terrier', ('YORKSHIRE TERRIER', 'YORKIE')),
+    Rule('Siberian Husky', ('HUSKY',)),
+    Rule('Maltese', ('MALTESE',)),
+    Rule('Beagle', ('BEAGLE',)),
+    Rule('Boxer', ('BOXER',)),
+    Rule('Golden Retriever', ('GOLDEN RETRIEVER',)),
+    Rule('Poodle', ('POODLE',)),
+    Rule('Cane Corso', ('CANE CORSO',)),
+    Rule('Bulldog', ('BULL DOG', 'BULLDOG')),
+]
+
+BASE_BREED_EXACT = {s: 'Mixed/Other' for s in MIXED_STRINGS if s != "MIXED/OTHER"}
+
+
+# --- Lookalike categories (redistribute_bites) ---
+LICENSE_RULES = [
+    Rule('Labrador Retriever', ('LABRADOR',)),
+    Rule('German Shepherd', ('GERMAN SHEPHERD',)),
+    Rule('Boxer', ('BOXER',)),
+    Rule('Rottweiler', ('ROTTWEILER',)),
+    Rule('Bulldog', ('BULLDOG',), excludes=('FRENCH',)),
+    Rule('Doberman Pinscher', ('DOBERMAN',)),
+    Rule('Great Dane', ('GREAT DANE',)),
+    Rule('Mastiff', ('MASTIFF',)),
+    Rule('Cane Corso', ('CANE CORSO',)),
+    Rule('Bull Terrier', ('BULL TERRIER',)),
+    Rule('Belgian Malinois', ('BELGIAN MALINOIS',)),
+    Rule('Rhodesian Ridgeback', ('RHODESIAN',)),
+    Rule('Weimaraner', ('WEIMARANER',)),
+    Rule('Pointer', ('POINTER',)),
+    Rule('American Bully', ('AMERICAN BULLY',)),
+    Rule('Chihuahua', ('CHIHUAHUA',)),
+    Rule('Siberian Husky', ('HUSKY',)),  # Covers SIBERIAN HUSKY
+    Rule('Chow Chow', ('CHOW',)),
+    Rule('Akita', ('AKITA',)),
+    Rule('Beagle', ('BEAGLE',)),
+    Rule('Golden Retriever', ('GOLDEN RETRIEVER',)),
+    Rule('Poodle', ('POODLE',)),
+    Rule('Yorkshire Terrier', ('YORKSHIRE',)),
+    Rule('Shih Tzu', ('SHIH TZU',)),
+    Rule('Cocker Spaniel', ('COCKER SPANIEL',)),
+    Rule('Dachshund', ('DACHSHUND',)),
+]
+
+BITE_RULES = [
+    # Pit Bull - match keyword pattern (bite data is less granular)
+    Rule('Pit Bull', ('PIT BULL', 'PITBULL', 'STAFFORDSHIRE')),
+    Rule('American Bully', ('AMERICAN BULLY',)),
+    Rule('Maltese', ('MALTESE',)),
+    Rule('Labrador Retriever', ('LABRADOR',)),
+    Rule('German Shepherd', ('GERMAN SHEPHERD',)),
+    Rule('Boxer', ('BOXER',)),
+    Rule('Rottweiler', ('ROTTWEILER',)),
+    Rule('Bulldog', ('BULLDOG',), excludes=('FRENCH',)),
+    Rule('Doberman Pinscher', ('DOBERMAN',)),
+    Rule('Great Dane', ('GREAT DANE',)),
+    Rule('Mastiff', ('MASTIFF',)),
+    Rule('Cane Corso', ('CANE CORSO',)),
+    Rule('Bull Terrier', ('BULL TERRIER',)),
+    Rule('Belgian Malinois', ('BELGIAN MALINOIS',)),
+    Rule('Rhodesian Ridgeback', ('RHODESIAN',)),
+    Rule('Weimaraner', ('WEIMARANER',)),
+    Rule('Pointer', ('POINTER',)),
+    Rule('Chihuahua', ('CHIHUAHUA',)),
+    Rule('Siberian Husky', ('HUSKY',)),
+    Rule('Chow Chow', ('CHOW',)),
+    Rule('Akita', ('AKITA',)),
+    Rule('Beagle', ('BEAGLE',)),
+    Rule('Golden Retriever', ('GOLDEN RETRIEVER',)),
+    Rule('Poodle', ('POODLE',)),
+    Rule('Yorkshire Terrier', ('YORKSHIRE', 'YORKIE')),
+    Rule('Shih Tzu', ('SHIH TZU',)),
+    Rule('Cocker Spaniel', ('COCKER SPANIEL',)),
+    Rule('Dachshund', ('DACHSHUND',)),
+]
+
+# Bite strings that carry no breed information
+BITE_EXACT = {s: None for s in ('', 'UNKNOWN', 'MIXED', 'OTHER')}
+
+
+# --- Compiled matchers ---
+CREMIEUX_BITE_MATCHER = RuleMatcher(CREMIEUX_BITE_RULES, exact=CREMIEUX_EXACT)
+KEYWORD_MATCHER = RuleMatcher(KEYWORD_RULES, exact=KEYWORD_EXACT)
+BASE_BREED_MATCHER = RuleMatcher(BASE_BREED_RULES, exact=BASE_BREED_EXACT)
+LICENSE_MATCHER = RuleMatcher(LICENSE_RULES, exact=CREMIEUX_EXACT)
+BITE_MATCHER = RuleMatcher(BITE_RULES, exact=BITE_EXACT)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Memory-Mapped Columnar Store
+
+dataset_cache reads its whole cache file into memory and copies every
+column out of it, in every process. This module exports the normalized
+tables as a directory of fixed-width column files plus a manifest, and
+opens them by memory-mapping:
+
+    columnar/
+        bites/manifest.json       row count, column typecodes, byte order,
+                                  source SHA-256 and string dictionaries
+        bites/year.bin, ...       one raw little/big-endian array per column
+        licenses/...
+
+Columns are integer codes; the manifest holds the string dictionaries
+(raw breed strings, and the borough / gender / spay-neuter names the codes
+index). Opening a table maps each column file read-only and casts it to a
+typed memoryview. Nothing is parsed or copied. vector_engine.column turns
+the views into NumPy arrays zero-copy, and processes opening the same
+store share one copy in the OS page cache.
+
+The returned object is a dataset_cache.Table, so the analysis functions
+accept it unchanged. A store is only opened against the snapshot it was
+exported from. The manifest records the snapshot's size, mtime and SHA-256
+and the dataset_cache version, and a mismatch raises ValueError.
+dataset_cache.load_bites / load_licenses prefer a fresh store in
+`columnar/` next to the snapshot over their own cache file.
+
+`verify` exports twice (the second time over the store the first one
+wrote) and checks the opened store against the cache tables.
+
+Usage:
+    python3 columnar_store.py export --out columnar
+    python3 columnar_store.py info --out columnar
+    python3 columnar_store.py verify --out columnar
+"""
+
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+
+from animal_codes import GENDERS, SPAY_STATUS
+from dataset_cache import (BITE_CSV, CACHE_VERSION, LICENSE_CSV, Table, file_digest, load_bites, load_licenses,
+                           resolve_snapshot)
+from geo_codes import BOROUGHS
+
+# --- Configuration ---
+STORE_DIR = "columnar"
+STORE_VERSION = 2
+
+# Code column -> name table it indexes (breeds come from each table)
+DICTIONARIES = {'borough': list(BOROUGHS), 'gender': list(GENDERS), 'spayed': list(SPAY_STATUS)}
+
+
+def snapshot_source(csv_path):
+    """Size, mtime and SHA-256 of a snapshot, as recorded in the manifest."""
+    st = os.stat(csv_path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': file_digest(csv_path)}
+
+
+def export_table(table, directory, source):
+    """Write one table as column files plus manifest.json (source: see snapshot_source)."""
+    os.makedirs(directory, exist_ok=True)
+    columns = {}
+    for name, col in table.columns.items():
+        tmp_path = os.path.join(directory, name + '.bin.tmp')
+        with open(tmp_path, 'wb') as f:
+            col.tofile(f)
+        os.replace(tmp_path, os.path.join(directory, name + '.bin'))
+        columns[name] = col.typecode
+
+    dictionaries = {'breed': table.breeds}
+    dictionaries.update({name: names for name, names in DICTIONARIES.items() if name in columns})
+    manifest = {
+        'version': STORE_VERSION,
+        'rows': len(table),
+        'byteorder': sys.byteorder,
+        'columns': columns,
+        'dictionaries': dictionaries,
+        'date_stats': table.date_stats,
+        'cache_version': CACHE_VERSION,
+        'source': source,
+    }
+    tmp_path = os.path.join(directory, 'manifest.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(directory, 'manifest.json'))
+
+
+def _check_source(directory, manifest, csv_path):
+    """Raise ValueError unless the store was exported from this snapshot by this dataset_cache version."""
+    if manifest.get('cache_version') != CACHE_VERSION:
+        raise ValueError(f"{directory}: exported by dataset_cache version {manifest.get('cache_version')}, "
+                         f"expected {CACHE_VERSION}; re-export it")
+    source = manifest['source']
+    st = os.stat(csv_path)
+    if source['size'] == st.st_size and source['mtime_ns'] == st.st_mtime_ns:
+        return
+    if source['sha256'] != file_digest(csv_path):
+        raise ValueError(f"{directory}: exported from a different snapshot than {csv_path}; re-export it")
+
+
+def open_table(directory, csv_path):
+    """
+    Memory-map an exported table. Columns are read-only typed memoryviews.
+
+    Args:
+        directory (str): Table directory (holding manifest.json)
+        csv_path (str): Snapshot the store must have been exported from
+
+    Raises:
+        ValueError: If the store is from another snapshot, store version,
+            dataset_cache version or byte order, or is truncated
+    """
+    csv_path = resolve_snapshot(csv_path)
+    with open(os.path.join(directory, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != STORE_VERSION:
+        raise ValueError(f"{directory}: store version {manifest.get('version')}, expected {STORE_VERSION}")
+    if manifest['byteorder'] != sys.byteorder:
+        raise ValueError(f"{directory}: written on a {manifest['byteorder']}-endian machine; re-export it here")
+    _check_source(directory, manifest, csv_path)
+
+    columns = {}
+    for name, typecode in manifest['columns'].items():
+        with open(os.path.join(directory, name + '.bin'), 'rb') as f:
+            if manifest['rows'] == 0:
+                columns[name] = memoryview(b'').cast('B').cast(typecode)
+                continue
+            # The mapping stays alive as long as the memoryview does
+            columns[name] = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast(typecode)
+        if len(columns[name]) != manifest['rows']:
+            raise ValueError(f"{directory}/{name}.bin: {len(columns[name])} rows, manifest says {manifest['rows']}")
+
+    table = Table(columns, manifest['dictionaries']['breed'], manifest.get('date_stats'))
+    table.dictionaries = manifest['dictionaries']
+    return table
+
+
+def open_bites(store_dir=STORE_DIR, csv_path=BITE_CSV):
+    return open_table(os.path.join(store_dir, 'bites'), csv_path)
+
+
+def open_licenses(store_dir=STORE_DIR, csv_path=LICENSE_CSV):
+    return open_table(os.path.join(store_dir, 'licenses'), csv_path)
+
+
+def export_store(store_dir=STORE_DIR, bite_csv=BITE_CSV, license_csv=LICENSE_CSV):
+    """Export both snapshots (via the dataset cache, never an existing store) into store_dir."""
+    for name, loader, path in (('bites', load_bites, bite_csv), ('licenses', load_licenses, license_csv)):
+        path = resolve_snapshot(path)
+        export_table(loader(path, use_store=False), os.path.join(store_dir, name), snapshot_source(path))
+
+
+def verify_store(store_dir=STORE_DIR, bite_csv=BITE_CSV, license_csv=LICENSE_CSV):
+    """
+    Export twice, then compare the opened store with the cache tables.
+
+    Returns:
+        list: Mismatch descriptions (empty if the store matches)
+    """
+    export_store(store_dir, bite_csv, license_csv)
+    export_store(store_dir, bite_csv, license_csv)
+    problems = []
+    for name, loader, path in (('bites', load_bites, bite_csv), ('licenses', load_licenses, license_csv)):
+        expected = loader(path, use_store=False)
+        table = open_table(os.path.join(store_dir, name), path)
+        if table.breeds != expected.breeds:
+            problems.append(f"{name}: breed strings differ")
+        for column, col in expected.columns.items():
+            if column not in table.columns or table.columns[column].tolist() != col.tolist():
+                problems.append(f"{name}.{column}: differs from the cache")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export/open the memory-mapped columnar store.")
+    parser.add_argument('command', choices=['export', 'info', 'verify'])
+    parser.add_argument('--out', default=STORE_DIR, help=f"store directory (default: {STORE_DIR})")
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        start = time.perf_counter()
+        export_store(args.out)
+        print(f"Exported to {args.out}/ in {time.perf_counter() - start:.2f}s")
+    elif args.command == 'verify':
+        problems = verify_store(args.out)
+        for problem in problems:
+            print(f"MISMATCH {problem}")
+        if problems:
+            sys.exit(1)
+        print(f"Exported twice to {args.out}/; store matches the cache")
+
+    for name, opener in (('bites', open_bites), ('licenses', open_licenses)):
+        start = time.perf_counter()
+        table = opener(args.out)
+        elapsed = (time.perf_counter() - start) * 1000
+        size = sum(col.nbytes for col in table.columns.values())
+        print(f"{name}: {len(table):,} rows, {len(table.columns)} columns, {size / 2**20:.1f} MiB mapped, "
+              f"{len(table.breeds):,} breed strings ({elapsed:.1f} ms to open)")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,8 +16,10 @@ Methodology (from the PDF):
 - Uses Cremieux's EXACT breed string classifications from his footnotes
 """
 
-import csv
-from collections import Counter
+from breed_memo import cache_report, memoize_breed
+from breed_rules import CREMIEUX_BITE_MATCHER, CREMIEUX_MALTESE as MALTESE_BREEDS, CREMIEUX_PIT_BULLS
+from dataset_cache import BAD_DATE, NO_DATE, load_bites, load_licenses
+from instrumentation import stage
 
 # --- Configuration ---
 BITE_CSV = "DOHMH_Dog_Bite_Data_20260103.csv"
@@ -29,39 +31,20 @@ MIN_BITE_YEAR = 2015
 MAX_BITE_YEAR = 2022
 # Licenses: September 2014 - November 2023
 MIN_LICENSE_YEAR = 2014
+MIN_LICENSE_MONTH = 9   # September
 MAX_LICENSE_YEAR = 2023
 MAX_LICENSE_MONTH = 11  # November
 
-# Cremieux's EXACT Pit Bull Type breed strings (from footnote image in PDF)
-CREMIEUX_PIT_BULLS = {
-    'American Pit Bull Terrier',
-    'American Pit Bull Mix / Pit Bull Mix',
-    'Pit Bull',
-    'Pit Bull Mix',
-    'American Staffordshire Terrier',
-    'Staffordshire Bull Terrier',
-    'American Pit Bull Terrier Crossbreed',
-    'American Staffordshire Terrier Crossbreed',
-}
-
-# Maltese breeds (per his back-classification method)
-MALTESE_BREEDS = {'Maltese', 'Maltese Crossbreed'}
-
 
 def is_pit_bull_license(breed: str) -> bool:
     """Check if a license breed string is a Pit Bull Type (exact match)."""
     return breed.strip() in CREMIEUX_PIT_BULLS
 
 
+@memoize_breed
 def is_pit_bull_bite(breed: str) -> bool:
     """Check if a bite breed string is a Pit Bull Type (includes variants)."""
-    b = breed.strip()
-    if b in CREMIEUX_PIT_BULLS:
-        return True
-    b_upper = b.upper()
-    if 'PIT BULL' in b_upper or 'STAFFORDSHIRE' in b_upper:
-        return True
-    return False
+    return CREMIEUX_BITE_MATCHER.classify(breed.strip()) == 'Pit Bull'
 
 
 def is_maltese_license(breed: str) -> bool:
@@ -69,6 +52,7 @@ def is_maltese_license(breed: str) -> bool:
     return breed.strip() in MALTESE_BREEDS
 
 
+@memoize_breed
 def is_maltese_bite(breed: str) -> bool:
     """Check if a bite breed string is Maltese."""
     return 'MALTESE' in breed.upper()
@@ -88,33 +72,36 @@ def main():
     maltese_bites = 0
     total_bites = 0
     skipped_bites = 0
+    bad_date_bites = 0
     
-    with open(BITE_CSV, 'r', encoding='utf-8', errors='replace') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+    bite_table = load_bites(BITE_CSV)
+    with stage('count bites') as s:
+        for year, code in bite_table.rows('year', 'breed'):
             # Filter by year
-            date_str = row.get('DateOfBite', '')
-            try:
-                if ',' in date_str:
-                    year = int(date_str.split(',')[-1].strip())
-                    if year < MIN_BITE_YEAR or year > MAX_BITE_YEAR:
-                        skipped_bites += 1
-                        continue
-            except ValueError:
+            if year == BAD_DATE:
+                bad_date_bites += 1
+                continue
+            if year != NO_DATE and (year < MIN_BITE_YEAR or year > MAX_BITE_YEAR):
+                skipped_bites += 1
                 continue
-            
+        
             total_bites += 1
-            breed = row.get('Breed', '').strip()
-            
+            breed = bite_table.breeds[code].strip()
+        
             if is_pit_bull_bite(breed):
                 pit_bites += 1
             elif is_maltese_bite(breed):
                 maltese_bites += 1
+        s.rows = len(bite_table)
+        s.skip('bad_date', bad_date_bites)
+        s.skip('out_of_range', skipped_bites)
     
     print(f"    Total bites in range: {total_bites}")
     print(f"    Pit Bull bites: {pit_bites}")
     print(f"    Maltese bites: {maltese_bites}")
     print(f"    (Skipped {skipped_bites} bites outside date range)")
+    for line in cache_report(is_pit_bull_bite, is_maltese_bite):
+        print(f"    Breed cache: {line}")
     
     # --- 2. Load and Count Licenses ---
     print(f"\n[2] Loading license data from: {LICENSE_CSV}")
@@ -122,41 +109,41 @@ def main():
     maltese_licenses = 0
     total_licenses = 0
     skipped_licenses = 0
+    bad_date_licenses = 0
     
-    with open(LICENSE_CSV, 'r', encoding='utf-8', errors='replace') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+    license_table = load_licenses(LICENSE_CSV)
+    with stage('count licenses') as s:
+        for year, month, code in license_table.rows('issued_year', 'issued_month', 'breed'):
             # Filter by LicenseIssuedDate (MM/DD/YYYY format)
-            issued_str = row.get('LicenseIssuedDate', '').strip().strip('"')
-            try:
-                parts = issued_str.split('/')
-                if len(parts) == 3:
-                    month = int(parts[0])
-                    year = int(parts[2])
-                    # Min: Sept 2014
-                    if year < MIN_LICENSE_YEAR:
-                        skipped_licenses += 1
-                        continue
-                    if year == MIN_LICENSE_YEAR and month < 9:
-                        skipped_licenses += 1
-                        continue
-                    # Max: Nov 2023
-                    if year > MAX_LICENSE_YEAR:
-                        skipped_licenses += 1
-                        continue
-                    if year == MAX_LICENSE_YEAR and month > MAX_LICENSE_MONTH:
-                        skipped_licenses += 1
-                        continue
-            except (ValueError, IndexError):
+            if year == BAD_DATE:
+                bad_date_licenses += 1
                 continue
-            
+            if year != NO_DATE:
+                # Min: Sept 2014
+                if year < MIN_LICENSE_YEAR:
+                    skipped_licenses += 1
+                    continue
+                if year == MIN_LICENSE_YEAR and month < MIN_LICENSE_MONTH:
+                    skipped_licenses += 1
+                    continue
+                # Max: Nov 2023
+                if year > MAX_LICENSE_YEAR:
+                    skipped_licenses += 1
+                    continue
+                if year == MAX_LICENSE_YEAR and month > MAX_LICENSE_MONTH:
+                    skipped_licenses += 1
+                    continue
+        
             total_licenses += 1
-            breed = row.get('BreedName', '').strip()
-            
+            breed = license_table.breeds[code].strip()
+        
             if is_pit_bull_license(breed):
                 pit_licenses += 1
             elif is_maltese_license(breed):
                 maltese_licenses += 1
+        s.rows = len(license_table)
+        s.skip('bad_date', bad_date_licenses)
+        s.skip('out_of_range', skipped_licenses)
     
     print(f"    Total licenses in range: {total_licenses}")
     print(f"    Pit Bull licenses: {pit_licenses}")
@@ -0,0 +1,593 @@
+#!/usr/bin/env python3
+"""
+Parsed Dataset Cache
+
+Shared ingestion layer for the NYC Dog Bite and Dog Licensing snapshots.
+
+Each CSV snapshot is parsed once into a compact binary cache file stored in
+a `.cache/` directory next to it. Later runs load typed columns straight
+from that file and skip CSV parsing entirely.
+
+Cache layout:
+- 4-byte magic + 4-byte header length
+- JSON header: source size/mtime/SHA-256, column names and typecodes,
+  and the breed string table
+- Raw column bytes (array.array), in header order
+
+A cache file is reused while the source's size and mtime are unchanged.
+If the mtime moved, the source is re-hashed and the cache is still reused
+when the SHA-256 matches (e.g. a fresh copy of the same snapshot). A
+columnar store exported from the same snapshot (columnar_store.py, in
+`columnar/` next to it) is preferred over the cache file. Its columns are
+memory-mapped instead of read and copied.
+
+Dates are decoded to integer year/month/day columns by date_decoder,
+whose NO_DATE / BAD_DATE year sentinels keep the per-script filtering
+rules intact. Missing and unparseable date counts from the build are kept
+in the cache header (Table.date_stats). Location fields are decoded to
+small integer codes by geo_codes (ZIP as an int, borough as an index into
+geo_codes.BOROUGHS), and gender / spay-neuter status by animal_codes.
+
+Snapshots larger than PARALLEL_MIN_BYTES are parsed in parallel. The file
+is split into byte ranges that end on record boundaries (a newline
+outside quotes), and each range is parsed in a worker process. The partial
+columns are merged in file order, so the table is identical to a serial
+parse. Quote counting can misplace a boundary when an unquoted field
+holds a literal quote. Each worker reports whether its range ended inside
+a quoted field, and if any range but the last did, the file is parsed
+serially instead.
+
+Snapshots may be stored compressed (.gz, .bz2, .xz, and .zst when the
+optional `zstandard` package is installed). A path such as
+DOHMH_Dog_Bite_Data_20260103.csv also resolves to a compressed copy,
+e.g. DOHMH_Dog_Bite_Data_20260103.csv.gz, when the plain file is absent.
+Compressed input is decompressed as a stream on a background thread a few
+blocks ahead of the parser. The codecs release the GIL, so decompression
+overlaps parsing. Compressed snapshots are always parsed serially.
+"""
+
+import array
+import bz2
+import csv
+import gzip
+import hashlib
+import io
+import json
+import lzma
+import mmap
+import os
+import queue
+import struct
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from animal_codes import parse_gender, parse_spay_neuter
+from date_decoder import BAD_DATE, NO_DATE, DateDecoder, parse_bite_date, parse_license_date
+from geo_codes import parse_borough, parse_zip
+from instrumentation import current, stage
+
+try:
+    import zstandard
+except ImportError:  # optional dependency, only needed for .zst snapshots
+    zstandard = None
+
+# --- Configuration ---
+BITE_CSV = "DOHMH_Dog_Bite_Data_20260103.csv"
+LICENSE_CSV = "NYC_Dog_Licensing_Dataset_20260103.csv"
+
+CACHE_DIR = ".cache"
+CACHE_MAGIC = b"PBDC"
+CACHE_VERSION = 4
+
+# Parallel parsing: files at least this large are split into record-aligned
+# byte ranges and parsed by a process pool (PARSE_WORKERS=None: all cores)
+PARSE_WORKERS = None
+PARALLEL_MIN_BYTES = 32 * 2**20
+CHUNKS_PER_WORKER = 4
+
+# Compressed input: decompressed block size and how many blocks to read ahead
+DECOMPRESS_BLOCK = 1 << 20
+PREFETCH_BLOCKS = 4
+
+# Column name -> array typecode
+BITE_COLUMNS = {
+    'year': 'h',
+    'month': 'b',
+    'day': 'b',
+    'borough': 'b',
+    'zip': 'i',
+    'gender': 'b',
+    'spayed': 'b',
+    'breed': 'i',
+}
+LICENSE_COLUMNS = {
+    'issued_year': 'h',
+    'issued_month': 'b',
+    'issued_day': 'b',
+    'expired_year': 'h',
+    'expired_month': 'b',
+    'expired_day': 'b',
+    'zip': 'i',
+    'gender': 'b',
+    'breed': 'i',
+}
+
+# CSV date field -> column prefix and parser
+BITE_DATES = [('DateOfBite', '', parse_bite_date)]
+LICENSE_DATES = [
+    ('LicenseIssuedDate', 'issued_', parse_license_date),
+    ('LicenseExpiredDate', 'expired_', parse_license_date),
+]
+
+# CSV field -> integer code column and decoder
+BITE_CODES = [
+    ('Borough', 'borough', parse_borough),
+    ('ZipCode', 'zip', parse_zip),
+    ('Gender', 'gender', parse_gender),
+    ('SpayNeuter', 'spayed', parse_spay_neuter),
+]
+LICENSE_CODES = [
+    ('ZipCode', 'zip', parse_zip),
+    ('AnimalGender', 'gender', parse_gender),
+]
+
+
+class Table:
+    """Typed, column-oriented view of one dataset snapshot.
+
+    `breed` holds integer codes into `breeds`, the table of distinct raw
+    breed strings in first-seen order.
+    """
+
+    def __init__(self, columns, breeds, date_stats=None):
+        self.columns = columns
+        self.breeds = breeds
+        self.date_stats = date_stats or {}
+
+    def __len__(self):
+        return len(self.columns['breed'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def rows(self, *names):
+        """Iterate rows as tuples of the requested columns."""
+        return zip(*(self.columns[n] for n in names))
+
+
+def _open_zstd(path):
+    if zstandard is None:
+        raise ImportError(f"Reading {path} requires the 'zstandard' package (pip install zstandard)")
+    return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+
+
+# File suffix -> binary decompressing opener
+COMPRESSED_OPENERS = {
+    '.gz': lambda path: gzip.open(path, 'rb'),
+    '.bz2': lambda path: bz2.open(path, 'rb'),
+    '.xz': lambda path: lzma.open(path, 'rb'),
+    '.zst': _open_zstd,
+}
+
+
+def is_compressed(path):
+    return os.path.splitext(path)[1].lower() in COMPRESSED_OPENERS
+
+
+def resolve_snapshot(path):
+    """`path` if it exists, else the first existing compressed copy (path + .gz, ...)."""
+    if os.path.exists(path) or is_compressed(path):
+        return path
+    for suffix in COMPRESSED_OPENERS:
+        if os.path.exists(path + suffix):
+            return path + suffix
+    return path
+
+
+class _PrefetchReader(io.RawIOBase):
+    """Raw stream over a decompressor, read PREFETCH_BLOCKS blocks ahead on a thread."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._blocks = queue.Queue(PREFETCH_BLOCKS)
+        self._stop = threading.Event()
+        self._error = None
+        self._block = b''
+        self._pos = 0
+        self._eof = False
+        self._thread = threading.Thread(target=self._fill, daemon=True)
+        self._thread.start()
+
+    def _put(self, block):
+        while not self._stop.is_set():
+            try:
+                self._blocks.put(block, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fill(self):
+        try:
+            while True:
+                block = self._stream.read(DECOMPRESS_BLOCK)
+                if not self._put(block) or not block:
+                    return
+        except Exception as e:
+            self._error = e
+            self._put(b'')
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._pos == len(self._block):
+            if self._eof:
+                return 0
+            self._block, self._pos = self._blocks.get(), 0
+            if not self._block:
+                self._eof = True
+                if self._error is not None:
+                    raise self._error
+                return 0
+        n = min(len(buffer), len(self._block) - self._pos)
+        buffer[:n] = self._block[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+            self._stream.close()
+        super().close()
+
+
+def open_snapshot(path, newline=None):
+    """Open a (possibly compressed) CSV snapshot as UTF-8 text, like open(path, 'r')."""
+    path = resolve_snapshot(path)
+    if not is_compressed(path):
+        return open(path, 'r', encoding='utf-8', errors='replace', newline=newline)
+    raw = _PrefetchReader(COMPRESSED_OPENERS[os.path.splitext(path)[1].lower()](path))
+    return io.TextIOWrapper(io.BufferedReader(raw, DECOMPRESS_BLOCK), encoding='utf-8', errors='replace',
+                            newline=newline)
+
+
+def file_digest(path):
+    """Hex SHA-256 of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_path(csv_path):
+    directory, name = os.path.split(os.path.abspath(csv_path))
+    return os.path.join(directory, CACHE_DIR, name + '.bin')
+
+
+def _read_cache(cache_path):
+    """Return (header, payload offset, raw bytes) or None if unreadable."""
+    try:
+        with open(cache_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < 8 or data[:4] != CACHE_MAGIC:
+        return None
+    (header_len,) = struct.unpack('<I', data[4:8])
+    try:
+        header = json.loads(data[8:8 + header_len].decode('utf-8'))
+    except ValueError:
+        return None
+    if header.get('version') != CACHE_VERSION:
+        return None
+    return header, 8 + header_len, data
+
+
+def _read_cache_header(cache_path):
+    """Return only the header of a cache file, or None if unreadable."""
+    try:
+        with open(cache_path, 'rb') as f:
+            prefix = f.read(8)
+            if len(prefix) < 8 or prefix[:4] != CACHE_MAGIC:
+                return None
+            (header_len,) = struct.unpack('<I', prefix[4:])
+            header = json.loads(f.read(header_len).decode('utf-8'))
+    except (OSError, ValueError):
+        return None
+    return header if header.get('version') == CACHE_VERSION else None
+
+
+def snapshot_digest(csv_path):
+    """SHA-256 of a snapshot, read from its cache header while the file is unchanged."""
+    csv_path = resolve_snapshot(csv_path)
+    st = os.stat(csv_path)
+    header = _read_cache_header(_cache_path(csv_path))
+    if header is not None and header['size'] == st.st_size and header['mtime_ns'] == st.st_mtime_ns:
+        return header['sha256']
+    return file_digest(csv_path)
+
+
+def _decode_table(header, offset, data):
+    columns = {}
+    for name, typecode, length in header['columns']:
+        col = array.array(typecode)
+        nbytes = length * col.itemsize
+        col.frombytes(data[offset:offset + nbytes])
+        columns[name] = col
+        offset += nbytes
+    return Table(columns, header['breeds'], header.get('date_stats'))
+
+
+def _write_cache(cache_path, source, table):
+    header = dict(source)
+    header['version'] = CACHE_VERSION
+    header['columns'] = [(name, col.typecode, len(col)) for name, col in table.columns.items()]
+    header['breeds'] = table.breeds
+    header['date_stats'] = table.date_stats
+    header_bytes = json.dumps(header).encode('utf-8')
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(CACHE_MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for col in table.columns.values():
+            col.tofile(f)
+    os.replace(tmp_path, cache_path)
+
+
+def _parse_stream(f, fieldnames, column_types, breed_field, date_fields, code_fields):
+    """Parse CSV text into typed columns.
+
+    Returns (columns, breeds in first-seen order, {date field: DateDecoder},
+    open_quote). open_quote is True if the text ended inside a quoted field,
+    i.e. the last record's last field ran on to the end of a newline-ended text.
+    """
+    columns = {name: array.array(typecode) for name, typecode in column_types.items()}
+    reader = csv.reader(f)
+    if fieldnames is None:
+        fieldnames = next(reader, [])
+    # Fields missing from the header (or from a short row) read as ''
+    position = {name: i for i, name in enumerate(fieldnames)}
+    absent = float('inf')  # past the end of every row
+
+    breed_codes = {}
+    append_breed = columns['breed'].append
+    breed_at = position.get(breed_field, absent)
+    dates = [
+        (field, position.get(field, absent), DateDecoder(parse),
+         columns[prefix + 'year'].append, columns[prefix + 'month'].append, columns[prefix + 'day'].append)
+        for field, prefix, parse in date_fields
+    ]
+    # Location fields have few distinct values: memoize per field
+    codes = [(position.get(field, absent), {}, decode, columns[name].append) for field, name, decode in code_fields]
+
+    row = []
+    for row in reader:
+        n = len(row)
+        if not n:
+            continue  # blank line
+        for _, i, decode, append_year, append_month, append_day in dates:
+            year, month, day = decode(row[i] if i < n else '')
+            append_year(year)
+            append_month(month)
+            append_day(day)
+        for i, memo, decode, append in codes:
+            raw = row[i] if i < n else ''
+            value = memo.get(raw)
+            if value is None:
+                value = memo[raw] = decode(raw)
+            append(value)
+        breed = row[breed_at] if breed_at < n else ''
+        code = breed_codes.get(breed)
+        if code is None:
+            code = breed_codes[breed] = len(breed_codes)
+        append_breed(code)
+
+    open_quote = bool(row) and row[-1].endswith('\n')
+    return columns, list(breed_codes), {field: decode for field, _, decode, *_ in dates}, open_quote
+
+
+def _parse_csv(csv_path, column_types, breed_field, date_fields, code_fields):
+    workers = PARSE_WORKERS or os.cpu_count() or 1
+    if workers > 1 and not is_compressed(csv_path) and os.path.getsize(csv_path) >= PARALLEL_MIN_BYTES:
+        table = _parse_csv_parallel(csv_path, column_types, breed_field, date_fields, code_fields, workers)
+        if table is not None:
+            return table
+        current().note('parse', 'serial fallback')
+
+    with open_snapshot(csv_path) as f:
+        columns, breeds, decoders, _ = _parse_stream(f, None, column_types, breed_field, date_fields, code_fields)
+    return Table(columns, breeds, {field: decode.stats() for field, decode in decoders.items()})
+
+
+def _count_quotes(data, start, end, step=1 << 22):
+    return sum(data[i:min(i + step, end)].count(b'"') for i in range(start, end, step))
+
+
+def _record_boundaries(csv_path, n_chunks):
+    """Byte offsets splitting the file into runs of whole CSV records.
+
+    The first offset is the end of the header record and the last is the
+    file size. A newline ends a record only if an even number of quote
+    characters precede it, so quoted fields containing newlines are never
+    split ("" escapes come in pairs and keep the parity). A literal quote
+    inside an unquoted field (PIT 12" TALL) breaks the parity, so the
+    offsets are only candidates: _parse_csv_parallel checks each one.
+    """
+    size = os.path.getsize(csv_path)
+    if size == 0:
+        return [0]
+    boundaries = []
+    with open(csv_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        quotes = 0  # quote characters in data[:pos]
+        pos = 0
+        for target in [0] + [size * i // n_chunks for i in range(1, n_chunks)]:
+            if target > pos:
+                quotes += _count_quotes(data, pos, target)
+                pos = target
+            while True:
+                nl = data.find(b'\n', pos)
+                if nl < 0:
+                    return boundaries + [size]
+                quotes += _count_quotes(data, pos, nl)
+                pos = nl + 1
+                if quotes % 2 == 0:
+                    boundaries.append(pos)
+                    break
+    if boundaries[-1] != size:
+        boundaries.append(size)
+    return boundaries
+
+
+def _parse_chunk(csv_path, start, end, fieldnames, column_types, breed_field, date_fields, code_fields):
+    """Worker: parse the records in bytes [start, end) of the file.
+
+    Also reports whether the range ended inside a quoted field, i.e. `end`
+    is not a record boundary.
+    """
+    with open(csv_path, 'rb') as f:
+        f.seek(start)
+        raw = f.read(end - start)
+    # Same decoding and newline handling as the serial text-mode reader
+    text = io.TextIOWrapper(io.BytesIO(raw), encoding='utf-8', errors='replace')
+    columns, breeds, decoders, open_quote = _parse_stream(text, fieldnames, column_types, breed_field, date_fields,
+                                                          code_fields)
+    stats = {field: (decode.rows, decode.missing, decode.unparseable, list(decode.memo))
+             for field, decode in decoders.items()}
+    return {name: col.tobytes() for name, col in columns.items()}, breeds, stats, open_quote
+
+
+def _parse_csv_parallel(csv_path, column_types, breed_field, date_fields, code_fields, workers):
+    """Parse record-aligned byte ranges in a process pool and merge in file order.
+
+    Breed codes are reassigned in chunk order, which reproduces the serial
+    first-seen order, so the resulting Table is identical to a serial parse.
+
+    The header starts on a record boundary, and each range is parsed from
+    a boundary if the range before it ended outside quotes. A range that
+    ends inside a quoted field means an offset split a record. The split
+    is then not trusted and None is returned, so the caller parses
+    serially.
+    """
+    boundaries = _record_boundaries(csv_path, workers * CHUNKS_PER_WORKER)
+    with open(csv_path, 'rb') as f:
+        header = io.TextIOWrapper(io.BytesIO(f.read(boundaries[0])), encoding='utf-8', errors='replace')
+        fieldnames = next(csv.reader(header), [])
+    if fieldnames and fieldnames[-1].endswith('\n'):
+        return None
+
+    columns = {name: array.array(typecode) for name, typecode in column_types.items()}
+    breed_codes = {}
+    date_totals = {field: [0, 0, 0, set()] for field, _, _ in date_fields}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_parse_chunk, csv_path, start, end, fieldnames, column_types,
+                               breed_field, date_fields, code_fields)
+                   for start, end in zip(boundaries, boundaries[1:]) if end > start]
+        for n, future in enumerate(futures, 1):
+            chunk_columns, breeds, stats, open_quote = future.result()
+            if open_quote and n < len(futures):
+                for pending in futures:
+                    pending.cancel()
+                return None
+            remap = [breed_codes.setdefault(b, len(breed_codes)) for b in breeds]
+            for name, data in chunk_columns.items():
+                col = array.array(column_types[name])
+                col.frombytes(data)
+                if name == 'breed':
+                    col = array.array('i', map(remap.__getitem__, col))
+                columns[name].extend(col)
+            for field, (rows, missing, unparseable, distinct) in stats.items():
+                totals = date_totals[field]
+                totals[0] += rows
+                totals[1] += missing
+                totals[2] += unparseable
+                totals[3].update(distinct)
+
+    date_stats = {
+        field: {'rows': rows, 'distinct': len(distinct), 'missing': missing, 'unparseable': unparseable}
+        for field, (rows, missing, unparseable, distinct) in date_totals.items()
+    }
+    return Table(columns, list(breed_codes), date_stats)
+
+
+def _open_store(dataset, csv_path):
+    """The table from a columnar store next to the snapshot, or None if there is none or it is stale."""
+    import columnar_store  # imported here: columnar_store imports this module
+    directory = os.path.join(os.path.dirname(os.path.abspath(csv_path)), columnar_store.STORE_DIR, dataset)
+    if not os.path.exists(os.path.join(directory, 'manifest.json')):
+        return None
+    try:
+        return columnar_store.open_table(directory, csv_path)
+    except ValueError:
+        current().note('store', 'stale')
+        return None
+
+
+def _load(dataset, csv_path, column_types, breed_field, date_fields, code_fields, use_store=True):
+    csv_path = resolve_snapshot(csv_path)
+    table = _open_store(dataset, csv_path) if use_store else None
+    if table is not None:
+        current().note('store', 'hit')
+        return table
+    cache_path = _cache_path(csv_path)
+    st = os.stat(csv_path)
+    cached = _read_cache(cache_path)
+
+    if cached is not None:
+        header = cached[0]
+        if header['size'] == st.st_size and header['mtime_ns'] == st.st_mtime_ns:
+            current().note('cache', 'hit')
+            return _decode_table(*cached)
+
+    digest = file_digest(csv_path)
+    source = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+
+    if cached is not None and cached[0]['sha256'] == digest:
+        current().note('cache', 'revalidated')
+        table = _decode_table(*cached)
+    else:
+        current().note('cache', 'miss')
+        table = _parse_csv(csv_path, column_types, breed_field, date_fields, code_fields)
+    _write_cache(cache_path, source, table)
+    return table
+
+
+def _instrumented_load(name, *args, **kwargs):
+    with stage(name) as s:
+        table = _load(*args, **kwargs)
+        s.rows = len(table)
+        s.note('date_stats', table.date_stats)
+    return table
+
+
+def load_bites(csv_path=BITE_CSV, use_store=True):
+    """Load the bite snapshot (columns: year, month, day, borough, zip, gender, spayed, breed).
+
+    use_store=False skips the columnar store, so the columns are array.array.
+    """
+    return _instrumented_load('load bites', 'bites', csv_path, BITE_COLUMNS, 'Breed', BITE_DATES, BITE_CODES,
+                              use_store=use_store)
+
+
+def load_licenses(csv_path=LICENSE_CSV, use_store=True):
+    """Load the license snapshot (columns: issued/expired year, month and day, zip, gender, breed).
+
+    use_store=False skips the columnar store, so the columns are array.array.
+    """
+    return _instrumented_load('load licenses', 'licenses', csv_path, LICENSE_COLUMNS, 'BreedName', LICENSE_DATES,
+                              LICENSE_CODES, use_store=use_store)
+
+
+if __name__ == "__main__":
+    for label, loader, path in (("Bites", load_bites, BITE_CSV), ("Licenses", load_licenses, LICENSE_CSV)):
+        table = loader(path)
+        print(f"{label}: {len(table)} rows, {len(table.breeds)} distinct breed strings -> {_cache_path(path)}")
+        for field, stats in table.date_stats.items():
+            print(f"  {field}: {stats['distinct']} distinct, "
+                  f"{stats['missing']} missing, {stats['unparseable']} unparseable")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Date Decoder
+
+Decodes the two date layouts used by the NYC snapshots into integer
+(year, month, day) tuples:
+- Bite data, DateOfBite: "January 01, 2018"
+- License data, LicenseIssuedDate / LicenseExpiredDate: "09/12/2014"
+
+The datasets have hundreds of thousands of rows but only a few thousand
+distinct date strings, so DateDecoder memoizes on the raw string. It also
+counts missing and unparseable values, so they are reported instead of
+silently skipped.
+
+Two year sentinels preserve the scripts' filtering rules:
+- NO_DATE: the field is not in the expected layout (scripts keep the row)
+- BAD_DATE: the field has the expected layout but does not parse
+  (scripts drop the row)
+Month and day are 0 when unknown. Years outside 1-9999 and license months
+outside 0-99 do not fit the cache's small-int columns and are treated as
+unparseable; an out-of-range or non-numeric day is stored as 0.
+"""
+
+# Year sentinels (real years are always > 0)
+NO_DATE = 0
+BAD_DATE = -1
+
+MONTHS = {
+    'JANUARY': 1, 'FEBRUARY': 2, 'MARCH': 3, 'APRIL': 4,
+    'MAY': 5, 'JUNE': 6, 'JULY': 7, 'AUGUST': 8,
+    'SEPTEMBER': 9, 'OCTOBER': 10, 'NOVEMBER': 11, 'DECEMBER': 12,
+}
+
+
+def parse_bite_date(date_str):
+    """Decode a "January 01, 2018" bite date into (year, month, day)."""
+    head, comma, year_part = date_str.rpartition(',')
+    if not comma:
+        return NO_DATE, 0, 0
+    try:
+        year = int(year_part.strip())
+    except ValueError:
+        return BAD_DATE, 0, 0
+    if not 0 < year <= 9999:
+        return BAD_DATE, 0, 0
+    month_name, _, day_part = head.strip().partition(' ')
+    month = MONTHS.get(month_name.upper(), 0)
+    try:
+        day = int(day_part)
+    except ValueError:
+        day = 0
+    if not 0 <= day <= 99:
+        day = 0
+    return year, month, day
+
+
+def parse_license_date(date_str):
+    """Decode a MM/DD/YYYY license date into (year, month, day)."""
+    parts = date_str.strip().strip('"').split('/')
+    if len(parts) != 3:
+        return NO_DATE, 0, 0
+    try:
+        year, month = int(parts[2]), int(parts[0])
+    except ValueError:
+        return BAD_DATE, 0, 0
+    if not (0 < year <= 9999 and 0 <= month <= 99):
+        return BAD_DATE, 0, 0
+    try:
+        day = int(parts[1])
+    except ValueError:
+        day = 0
+    if not 0 <= day <= 99:
+        day = 0
+    return year, month, day
+
+
+class DateDecoder:
+    """Memoizing wrapper around a date parser, with parse statistics."""
+
+    def __init__(self, parse):
+        self.parse = parse
+        self.memo = {}
+        self.rows = 0
+        self.missing = 0
+        self.unparseable = 0
+
+    def __call__(self, date_str):
+        self.rows += 1
+        try:
+            result = self.memo[date_str]
+        except KeyError:
+            result = self.memo[date_str] = self.parse(date_str)
+        if result[0] == BAD_DATE:
+            self.unparseable += 1
+        elif result[0] == NO_DATE:
+            self.missing += 1
+        return result
+
+    def stats(self):
+        """Summary counts as a plain dict."""
+        return {
+            'rows': self.rows,
+            'distinct': len(self.memo),
+            'missing': self.missing,
+            'unparseable': self.unparseable,
+        }
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+License De-duplication
+
+cremieux_analysis.py and redistribute_bites.py count every license row
+issued in the Sept 2014 - Nov 2023 window. A dog renewed every year is
+counted once per renewal, so breeds that renew more often get inflated
+population denominators.
+
+This script collapses renewals to unique dogs. A dog's identity is a
+configurable key; the default is:
+    AnimalName + AnimalGender + AnimalBirthYear + ZipCode + BreedName
+(whitespace- and case-normalized). Each key is reduced to a 64-bit hash,
+and the first row seen for a hash counts as a unique dog.
+
+Memory is bounded by --memory-mb rather than by the row count:
+- If the worst-case number of keys (file size / MIN_ROW_BYTES) fits the
+  budget, hashes go into one in-memory set during the CSV pass.
+- Otherwise the CSV pass writes (hash, breed) records to partition files
+  on disk, split by hash bits. Each partition is then de-duplicated on its
+  own. A key always lands in the same partition, and file order is kept,
+  so the result is the same either way.
+
+Usage:
+    python3 dedup_licenses.py --key AnimalName,AnimalGender,AnimalBirthYear,ZipCode,BreedName
+"""
+
+import argparse
+import array
+import csv
+import hashlib
+import math
+import os
+import tempfile
+from collections import Counter
+
+from dataset_cache import is_compressed, open_snapshot, resolve_snapshot
+from date_decoder import BAD_DATE, NO_DATE, DateDecoder, parse_license_date
+from redistribute_bites import (LICENSE_CSV, MAX_LICENSE_MONTH, MAX_LICENSE_YEAR, MIN_LICENSE_MONTH,
+                                MIN_LICENSE_YEAR, normalize_breed_for_license)
+
+# --- Configuration ---
+IDENTITY_KEY = ('AnimalName', 'AnimalGender', 'AnimalBirthYear', 'ZipCode', 'BreedName')
+MEMORY_BUDGET_MB = 256
+BYTES_PER_KEY = 100     # CPython cost of one int in a set, with headroom
+MIN_ROW_BYTES = 40      # shortest plausible license row, for the worst-case key count
+COMPRESSION_RATIO = 20  # assumed upper bound for compressed snapshots
+SPILL_BATCH = 65536     # records buffered per partition before writing
+
+
+def _key_hash(text):
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+
+def _in_window(year, month, window):
+    # Same rule as redistribute_bites.count_licenses: undated rows are kept
+    if year == BAD_DATE:
+        return False
+    if year == NO_DATE:
+        return True
+    min_year, min_month, max_year, max_month = window
+    if year < min_year or year > max_year:
+        return False
+    if year == min_year and month < min_month:
+        return False
+    if year == max_year and month > max_month:
+        return False
+    return True
+
+
+def partitions_for(csv_path, memory_mb=MEMORY_BUDGET_MB):
+    """Number of hash partitions needed to keep every partition's key set in budget."""
+    csv_path = resolve_snapshot(csv_path)
+    size = os.path.getsize(csv_path) * (COMPRESSION_RATIO if is_compressed(csv_path) else 1)
+    worst_case_keys = size / MIN_ROW_BYTES
+    return max(1, 2 ** math.ceil(math.log2(max(1.0, worst_case_keys * BYTES_PER_KEY / (memory_mb * 2**20)))))
+
+
+def count_unique_licenses(csv_path=LICENSE_CSV, key_fields=IDENTITY_KEY, classify=normalize_breed_for_license,
+                          window=None, memory_mb=MEMORY_BUDGET_MB):
+    """
+    Count raw license rows and unique dogs per breed in the issue-date window.
+
+    Args:
+        csv_path (str): License snapshot CSV
+        key_fields (tuple): CSV columns that identify one dog
+        classify (callable): raw BreedName -> breed label (falsy = not counted)
+        window (tuple or None): (min_year, min_month, max_year, max_month);
+            defaults to redistribute_bites' license window
+        memory_mb (float): Budget for the hash index
+
+    Returns:
+        tuple: (raw Counter, unique Counter, stats dict)
+    """
+    if window is None:
+        window = (MIN_LICENSE_YEAR, MIN_LICENSE_MONTH, MAX_LICENSE_YEAR, MAX_LICENSE_MONTH)
+    n_partitions = partitions_for(csv_path, memory_mb)
+    decode = DateDecoder(parse_license_date)
+    raw = Counter()
+    unique = Counter()
+    labels = {}
+    stats = {'rows': 0, 'in_window': 0, 'partitions': n_partitions}
+
+    seen = set()
+    spill_dir = tempfile.TemporaryDirectory(prefix='dedup_') if n_partitions > 1 else None
+    spill = [(array.array('q'), array.array('i')) for _ in range(n_partitions)]
+    label_list = []
+
+    def flush(p):
+        for col in spill[p]:
+            with open(os.path.join(spill_dir.name, f"{p}.{col.typecode}"), 'ab') as f:
+                col.tofile(f)
+        spill[p] = (array.array('q'), array.array('i'))
+
+    try:
+        with open_snapshot(csv_path, newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            position = {name: i for i, name in enumerate(header)}
+            required = dict.fromkeys(list(key_fields) + ['BreedName', 'LicenseIssuedDate'])
+            missing = [name for name in required if name not in position]
+            if missing:
+                raise ValueError(f"{csv_path} has no column(s): {', '.join(missing)}")
+            key_index = [position[name] for name in key_fields]
+            breed_index = position['BreedName']
+            date_index = position['LicenseIssuedDate']
+            width = max(key_index + [breed_index, date_index]) + 1
+
+            for row in reader:
+                stats['rows'] += 1
+                if len(row) < width:
+                    row += [''] * (width - len(row))
+                year, month, _ = decode(row[date_index])
+                if not _in_window(year, month, window):
+                    continue
+                raw_breed = row[breed_index]
+                code = labels.get(raw_breed)
+                if code is None:
+                    code = labels[raw_breed] = len(label_list)
+                    label_list.append(classify(raw_breed))
+                label = label_list[code]
+                if not label:
+                    continue
+                stats['in_window'] += 1
+                raw[label] += 1
+
+                key = _key_hash('\x1f'.join(row[i].strip().upper() for i in key_index))
+                if spill_dir is None:
+                    if key not in seen:
+                        seen.add(key)
+                        unique[label] += 1
+                    continue
+                p = key % n_partitions
+                hashes, codes = spill[p]
+                hashes.append(key)
+                codes.append(code)
+                if len(hashes) >= SPILL_BATCH:
+                    flush(p)
+
+        if spill_dir is not None:
+            for p in range(n_partitions):
+                if spill[p][0]:
+                    flush(p)
+                if not os.path.exists(os.path.join(spill_dir.name, f"{p}.q")):
+                    continue
+                hashes, codes = array.array('q'), array.array('i')
+                for col in (hashes, codes):
+                    with open(os.path.join(spill_dir.name, f"{p}.{col.typecode}"), 'rb') as f:
+                        col.frombytes(f.read())
+                seen = set()
+                for key, code in zip(hashes, codes):
+                    if key not in seen:
+                        seen.add(key)
+                        unique[label_list[code]] += 1
+    finally:
+        if spill_dir is not None:
+            spill_dir.cleanup()
+
+    stats['unique'] = sum(unique.values())
+    return raw, unique, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collapse license renewals to unique dogs per breed.")
+    parser.add_argument('csv', nargs='?', default=LICENSE_CSV)
+    parser.add_argument('--key', default=','.join(IDENTITY_KEY), help="comma-separated identity columns")
+    parser.add_argument('--memory-mb', type=float, default=MEMORY_BUDGET_MB)
+    parser.add_argument('--top', type=int, default=25)
+    args = parser.parse_args()
+
+    key_fields = tuple(k.strip() for k in args.key.split(','))
+    try:
+        raw, unique, stats = count_unique_licenses(args.csv, key_fields, memory_mb=args.memory_mb)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print("=" * 70)
+    print("LICENSE DE-DUPLICATION")
+    print("=" * 70)
+    print(f"Identity key: {' + '.join(key_fields)}")
+    print(f"Rows: {stats['rows']:,}  In window: {stats['in_window']:,}  Unique dogs: {stats['unique']:,}"
+          f"  ({stats['partitions']} partition(s))")
+
+    print(f"\n{'Breed':<30} {'Licenses':>10} {'Unique':>10} {'Per Dog':>8}")
+    print("-" * 61)
+    for breed, n in raw.most_common(args.top):
+        print(f"{breed:<30} {n:>10,} {unique[breed]:>10,} {n / unique[breed]:>8.2f}")
+
+    if unique.get('Pit Bull') and unique.get('Maltese'):
+        print(f"\nPit Bull : Maltese population ratio: {raw['Pit Bull'] / raw['Maltese']:.2f} (licenses) vs "
+              f"{unique['Pit Bull'] / unique['Maltese']:.2f} (unique dogs)")
+
+
+if __name__ == "__main__":
+    main()
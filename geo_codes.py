@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Geographic Codes
+
+Decodes the location fields of the NYC snapshots into small integers for
+the dataset cache:
+- ZipCode (bites and licenses): the 5-digit ZIP as an int, 0 if missing
+- Borough (bites only): an index into BOROUGHS, 0 if missing or "Other"
+
+The license file has no borough column. zip_borough maps a ZIP to its
+borough by 3-digit prefix, which covers NYC's residential ZIPs:
+100-102 Manhattan, 103 Staten Island, 104 Bronx, 112 Brooklyn,
+110/111/113/114/116 Queens.
+"""
+
+BOROUGHS = ('Unknown', 'Manhattan', 'Bronx', 'Brooklyn', 'Queens', 'Staten Island')
+
+_BOROUGH_NAMES = {name.upper(): code for code, name in enumerate(BOROUGHS) if code}
+_BOROUGH_NAMES['THE BRONX'] = BOROUGHS.index('Bronx')
+
+_ZIP_PREFIX_BOROUGH = {
+    100: 'Manhattan', 101: 'Manhattan', 102: 'Manhattan',
+    103: 'Staten Island',
+    104: 'Bronx',
+    112: 'Brooklyn',
+    110: 'Queens', 111: 'Queens', 113: 'Queens', 114: 'Queens', 116: 'Queens',
+}
+_ZIP_PREFIX_BOROUGH = {prefix: BOROUGHS.index(name) for prefix, name in _ZIP_PREFIX_BOROUGH.items()}
+
+
+def parse_zip(zip_str):
+    """Decode a ZipCode field ("11201", "11201-1234", "11201.0") to an int, 0 if not a ZIP."""
+    digits = zip_str.strip()[:5]
+    if len(digits) != 5 or not digits.isdigit():
+        return 0
+    return int(digits)
+
+
+def parse_borough(borough_str):
+    """Decode a Borough field to its BOROUGHS index (0 = unknown/other)."""
+    return _BOROUGH_NAMES.get(borough_str.strip().upper(), 0)
+
+
+def zip_borough(zip_code):
+    """BOROUGHS index for a ZIP code by its 3-digit prefix (0 = outside NYC/unknown)."""
+    return _ZIP_PREFIX_BOROUGH.get(zip_code // 100, 0)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Geographic Relative Risk
+
+All three analysis scripts collapse NYC to citywide counts. This script
+makes one pass over each table, accumulates bites and licenses per
+(breed, ZIP) and per (breed, borough) in sparse Counters, and derives a
+local estimate for every breed and area from those counts.
+
+Windows and breed normalization follow redistribute_bites.py. Bites use
+the recorded Borough. Licenses have no borough column, so it is derived
+from the ZIP (see geo_codes.zip_borough).
+
+Small areas give noisy rates. Alongside the raw local rate (bites per
+license), each breed's rates are smoothed with a Poisson-Gamma empirical
+Bayes model fitted by the method of moments (Marshall, 1991):
+    prior mean m = sum(bites) / sum(licenses) over the breed's areas
+    prior variance v = weighted variance of the raw rates - m / mean(licenses)
+    smoothed rate = (bites + m^2/v) / (licenses + m/v)
+Each area's rate is pulled towards the breed's citywide rate in proportion
+to how few licenses it has (fully pooled when v <= 0).
+
+Local RR compares a breed with the baseline breed in the same area: raw
+rate / raw baseline rate, and smoothed / smoothed.
+
+Output: geo_risk.csv (one row per level, area and breed), plus borough
+and top-ZIP summaries on stdout.
+
+Usage:
+    python3 geo_risk.py --breed "Pit Bull" --min-area-licenses 20
+"""
+
+import argparse
+import csv
+from collections import Counter
+
+from dataset_cache import BAD_DATE, NO_DATE, load_bites, load_licenses
+from geo_codes import BOROUGHS, zip_borough
+from redistribute_bites import (BITE_CSV, LICENSE_CSV, MAX_BITE_YEAR, MAX_LICENSE_MONTH, MAX_LICENSE_YEAR,
+                                MIN_BITE_YEAR, MIN_LICENSE_MONTH, MIN_LICENSE_YEAR, normalize_breed_for_bite,
+                                normalize_breed_for_license)
+
+# --- Configuration ---
+BASELINE = 'Maltese'
+MIN_AREA_LICENSES = 20   # areas below this are left out of the printed summaries
+OUTPUT_CSV = "geo_risk.csv"
+LEVELS = ('borough', 'zip')
+
+
+def accumulate_geography(bite_table, license_table):
+    """
+    One pass over each table into sparse (breed, area) counters.
+
+    Returns:
+        dict: level -> {'bites': Counter, 'licenses': Counter} keyed by
+        (breed, area); area is a ZIP int or a borough name. Rows with no
+        known area are counted under area 0 / 'Unknown'.
+    """
+    acc = {level: {'bites': Counter(), 'licenses': Counter()} for level in LEVELS}
+
+    labels = [normalize_breed_for_bite(raw) for raw in bite_table.breeds]
+    by_zip, by_borough = acc['zip']['bites'], acc['borough']['bites']
+    for year, zip_code, borough, code in bite_table.rows('year', 'zip', 'borough', 'breed'):
+        if year == BAD_DATE or (year != NO_DATE and not MIN_BITE_YEAR <= year <= MAX_BITE_YEAR):
+            continue
+        label = labels[code]
+        if label:
+            by_zip[label, zip_code] += 1
+            by_borough[label, BOROUGHS[borough]] += 1
+
+    labels = [normalize_breed_for_license(raw) for raw in license_table.breeds]
+    start, end = (MIN_LICENSE_YEAR, MIN_LICENSE_MONTH), (MAX_LICENSE_YEAR, MAX_LICENSE_MONTH)
+    by_zip, by_borough = acc['zip']['licenses'], acc['borough']['licenses']
+    for year, month, zip_code, code in license_table.rows('issued_year', 'issued_month', 'zip', 'breed'):
+        if year == BAD_DATE or (year != NO_DATE and not start <= (year, month) <= end):
+            continue
+        label = labels[code]
+        if label:
+            by_zip[label, zip_code] += 1
+            by_borough[label, BOROUGHS[zip_borough(zip_code)]] += 1
+    return acc
+
+
+def empirical_bayes_rates(bites, licenses):
+    """
+    Poisson-Gamma EB smoothed rates for one breed across areas.
+
+    Args:
+        bites (dict): area -> bites
+        licenses (dict): area -> licenses (areas with 0 licenses are skipped)
+
+    Returns:
+        dict: area -> smoothed rate
+    """
+    areas = [a for a, n in licenses.items() if n > 0]
+    if not areas:
+        return {}
+    total_bites = sum(bites.get(a, 0) for a in areas)
+    total_licenses = sum(licenses[a] for a in areas)
+    m = total_bites / total_licenses
+    spread = sum(licenses[a] * (bites.get(a, 0) / licenses[a] - m) ** 2 for a in areas) / total_licenses
+    v = spread - m / (total_licenses / len(areas))
+    if v <= 0 or m == 0:
+        return {a: m for a in areas}
+    alpha, beta = m * m / v, m / v
+    return {a: (bites.get(a, 0) + alpha) / (licenses[a] + beta) for a in areas}
+
+
+def local_estimates(counts, baseline=BASELINE):
+    """
+    Raw and EB-smoothed local rates and RRs for every (breed, area).
+
+    Returns:
+        list of dict rows with breed, area, bites, licenses, rate, eb_rate,
+        rr and eb_rr (None where undefined)
+    """
+    bites, licenses = counts['bites'], counts['licenses']
+    by_breed = {}
+    for (breed, area), n in licenses.items():
+        by_breed.setdefault(breed, ({}, {}))[1][area] = n
+    for (breed, area), n in bites.items():
+        by_breed.setdefault(breed, ({}, {}))[0][area] = n
+
+    smoothed = {breed: empirical_bayes_rates(b, l) for breed, (b, l) in by_breed.items()}
+    base_bites, base_licenses = by_breed.get(baseline, ({}, {}))
+    base_smoothed = smoothed.get(baseline, {})
+
+    rows = []
+    for breed, (b, l) in by_breed.items():
+        for area in sorted(set(b) | set(l)):
+            n_bites, n_licenses = b.get(area, 0), l.get(area, 0)
+            rate = n_bites / n_licenses if n_licenses else None
+            eb_rate = smoothed[breed].get(area)
+            base_rate = base_bites.get(area, 0) / base_licenses[area] if base_licenses.get(area) else None
+            base_eb = base_smoothed.get(area)
+            rows.append({
+                'breed': breed,
+                'area': area,
+                'bites': n_bites,
+                'licenses': n_licenses,
+                'rate': rate,
+                'eb_rate': eb_rate,
+                'rr': rate / base_rate if rate is not None and base_rate else None,
+                'eb_rr': eb_rate / base_eb if eb_rate is not None and base_eb else None,
+            })
+    return rows
+
+
+def write_csv(estimates, filename):
+    fields = ['breed', 'area', 'bites', 'licenses', 'rate', 'eb_rate', 'rr', 'eb_rr']
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['level'] + fields)
+        for level, rows in estimates.items():
+            for r in rows:
+                writer.writerow([level] + ['' if r[k] is None else (f"{r[k]:.6g}" if isinstance(r[k], float) else r[k])
+                                           for k in fields])
+
+
+def _fmt(value, width, digits):
+    return f"{value:>{width}.{digits}f}" if value is not None else f"{'-':>{width}}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ZIP- and borough-level bites, licenses and relative risk.")
+    parser.add_argument('--breed', default='Pit Bull', help="breed for the printed summaries")
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--min-area-licenses', type=int, default=MIN_AREA_LICENSES)
+    parser.add_argument('--top', type=int, default=15, help="ZIPs in the printed summary")
+    args = parser.parse_args()
+
+    counts = accumulate_geography(load_bites(BITE_CSV), load_licenses(LICENSE_CSV))
+    estimates = {level: local_estimates(counts[level], args.baseline) for level in LEVELS}
+    write_csv(estimates, OUTPUT_CSV)
+
+    print("=" * 70)
+    print(f"GEOGRAPHIC RELATIVE RISK: {args.breed} vs {args.baseline}")
+    print("=" * 70)
+    n_local = sum(1 for rows in estimates.values() for r in rows if r['eb_rate'] is not None)
+    print(f"{n_local:,} local breed estimates written to {OUTPUT_CSV}")
+
+    header = f"{'Bites':>7} {'Licenses':>9} {'Rate':>7} {'EB Rate':>8} {'RR':>7} {'EB RR':>7}"
+    for level, title, limit in (('borough', 'Borough', None), ('zip', 'ZIP', args.top)):
+        rows = [r for r in estimates[level] if r['breed'] == args.breed and r['licenses'] >= args.min_area_licenses
+                and r['area'] not in (0, 'Unknown')]
+        rows.sort(key=lambda r: r['eb_rr'] or 0, reverse=True)
+        label = f"By {title}" + (f" (top {limit} by EB RR)" if limit else "")
+        print(f"\n{label}")
+        print(f"{title:<15} {header}")
+        print("-" * (16 + len(header)))
+        for r in rows[:limit]:
+            print(f"{str(r['area']):<15} {r['bites']:>7} {r['licenses']:>9} {_fmt(r['rate'], 7, 3)} "
+                  f"{_fmt(r['eb_rate'], 8, 3)} {_fmt(r['rr'], 7, 2)} {_fmt(r['eb_rr'], 7, 2)}")
+
+
+if __name__ == "__main__":
+    main()
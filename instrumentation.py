@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Run Instrumentation
+
+Per-stage timing and throughput for the analysis scripts. A stage is one
+named step of a run (load bites, count licenses, compute risk, render SVG,
+write report, ...):
+
+    with stage('count bites') as s:
+        ...
+        s.rows = len(bite_table)
+        s.skip('out_of_range', skipped)
+
+Each stage records wall time, rows processed, rows skipped by reason,
+rows/sec and peak RSS. Stages nest: on Linux the peak-RSS counter is reset
+when a stage starts (/proc/self/clear_refs), so each stage reports its own
+high-water mark and the enclosing stage the larger of its own and its
+children's. Elsewhere the peak is the process high-water mark so far.
+
+Instrumentation is off unless enabled, and then stage() returns a shared
+no-op object: the cost is one function call per stage, never per row.
+Counting that would only feed the record should check `s.enabled`.
+
+Enable it for any script with environment variables, or call enable():
+    PB_RUN_RECORD=run.json     write the JSON run record at exit
+    PB_PROFILE=run.prof        also profile the run with cProfile
+                               (inspect with python3 -m pstats run.prof)
+
+Usage:
+    PB_RUN_RECORD=run.json python3 redistribute_bites.py
+    python3 instrumentation.py run.json
+"""
+
+import atexit
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# --- Configuration ---
+RECORD_ENV = 'PB_RUN_RECORD'
+PROFILE_ENV = 'PB_PROFILE'
+
+_record_path = None
+_profile = None
+_profile_path = None
+_started = None
+_stages = []
+_stack = []
+_run_peak_mb = 0.0   # clear_refs resets the kernel's counters, so the run peak is kept here
+
+
+def _read_hwm_mb():
+    global _run_peak_mb
+    try:
+        with open('/proc/self/status') as f:
+            peak = int(re.search(r'VmHWM:\s+(\d+) kB', f.read()).group(1)) / 1024
+    except (OSError, AttributeError):
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        peak = peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+    _run_peak_mb = max(_run_peak_mb, peak)
+    return peak
+
+
+def _reset_hwm():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+class Stage:
+    """One timed stage of a run."""
+
+    enabled = True
+
+    def __init__(self, name, depth=0):
+        self.name = name
+        self.depth = depth
+        self.rows = None
+        self.skipped = {}
+        self.info = {}
+        self.seconds = None
+        self.peak_rss_mb = None
+        self._start = None
+
+    def skip(self, reason, n=1):
+        """Record n rows dropped for `reason` (e.g. 'out_of_range', 'bad_date', 'unknown_breed')."""
+        if n:
+            self.skipped[reason] = self.skipped.get(reason, 0) + n
+
+    def note(self, key, value):
+        """Attach extra information (cache hit, output file, ...) to the stage record."""
+        self.info[key] = value
+
+    def __enter__(self):
+        if _stack:
+            parent = _stack[-1]
+            parent.peak_rss_mb = max(parent.peak_rss_mb or 0, _read_hwm_mb() or 0)
+        _reset_hwm()
+        _stack.append(self)
+        _stages.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self._start
+        self.peak_rss_mb = max(self.peak_rss_mb or 0, _read_hwm_mb() or 0) or None
+        _stack.pop()
+        if _stack:
+            parent = _stack[-1]
+            parent.peak_rss_mb = max(parent.peak_rss_mb or 0, self.peak_rss_mb or 0)
+        return False
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'depth': self.depth,
+            'seconds': self.seconds,
+            'rows': self.rows,
+            'rows_per_sec': self.rows / self.seconds if self.rows is not None and self.seconds else None,
+            'skipped': self.skipped,
+            'peak_rss_mb': self.peak_rss_mb,
+            'info': self.info,
+        }
+
+
+class _NullStage:
+    """Stand-in returned by stage() while instrumentation is disabled."""
+
+    enabled = False
+    rows = None
+
+    def skip(self, reason, n=1):
+        pass
+
+    def note(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+def enabled():
+    return _record_path is not None
+
+
+def stage(name):
+    """Context manager timing one stage (a no-op unless instrumentation is enabled)."""
+    if _record_path is None:
+        return NULL_STAGE
+    return Stage(name, len(_stack))
+
+
+def current():
+    """The innermost open stage, or the no-op stage."""
+    return _stack[-1] if _stack else NULL_STAGE
+
+
+def run_record():
+    """The run so far as a JSON-serializable dict."""
+    return {
+        'script': os.path.basename(sys.argv[0]) if sys.argv else None,
+        'argv': sys.argv[1:],
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(_started[0])) if _started else None,
+        'seconds': time.perf_counter() - _started[1] if _started else None,
+        'peak_rss_mb': max(_run_peak_mb, _read_hwm_mb() or 0) or None,
+        'stages': [s.as_dict() for s in _stages if s.seconds is not None],
+    }
+
+
+def _finish():
+    # Pool workers inherit the environment; only the parent process writes the record
+    if multiprocessing.parent_process() is not None:
+        return
+    if _profile is not None:
+        _profile.disable()
+        _profile.dump_stats(_profile_path)
+    if _record_path is not None:
+        with open(_record_path, 'w') as f:
+            json.dump(run_record(), f, indent=2)
+
+
+def enable(record_path, profile_path=None):
+    """Start recording stages; the run record (and profile) are written at exit."""
+    global _record_path, _profile, _profile_path, _started
+    if _record_path is None and _profile is None:
+        atexit.register(_finish)
+        _started = (time.time(), time.perf_counter())
+    _record_path = record_path
+    if profile_path and _profile is None:
+        import cProfile
+        _profile, _profile_path = cProfile.Profile(), profile_path
+        _profile.enable()
+
+
+def format_record(record):
+    """Format a run record as a stage table, one line per stage."""
+    lines = [f"{record['script']}: {record['seconds']:.2f}s, peak RSS {record['peak_rss_mb'] or 0:.1f} MB",
+             f"{'Stage':<32} {'Seconds':>9} {'Rows':>11} {'Rows/sec':>12} {'Peak RSS':>10}  Skipped"]
+    for s in record['stages']:
+        rows = f"{s['rows']:>11,}" if s['rows'] is not None else f"{'-':>11}"
+        rate = f"{s['rows_per_sec']:>12,.0f}" if s['rows_per_sec'] else f"{'-':>12}"
+        skipped = ", ".join(f"{reason} {n:,}" for reason, n in s['skipped'].items())
+        name = "  " * s['depth'] + s['name']
+        lines.append(f"{name:<32} {s['seconds']:>9.3f} {rows} {rate} {s['peak_rss_mb'] or 0:>7.1f} MB  {skipped}")
+    return lines
+
+
+if os.environ.get(RECORD_ENV) or os.environ.get(PROFILE_ENV):
+    enable(os.environ.get(RECORD_ENV) or os.devnull, os.environ.get(PROFILE_ENV))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python3 instrumentation.py RUN_RECORD.json")
+    with open(sys.argv[1]) as f:
+        for line in format_record(json.load(f)):
+            print(line)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+License Active-Interval Index
+
+analyze_dog_bites.py counts a license as "active in 2022" by comparing
+issued and expired years. cremieux_analysis.py counts licenses issued in
+a Sept 2014 - Nov 2023 window, so a dog renewed every year is counted
+several times. Both rescan the full license table for one fixed window.
+
+This index treats every license as an interval
+[LicenseIssuedDate, LicenseExpiredDate] and keeps, per breed, sorted start
+and end day numbers with prefix sums. It answers two queries per breed in
+O(log n):
+- active(breed, day): licenses active on a given date
+- exposure(breed, start, end): dog-years of licensed exposure in [start, end)
+
+active_during(breed, start, end) counts licenses overlapping a period.
+For example, analyze_dog_bites' "active in 2022" population is
+active_during(breed, date(2022, 1, 1), date(2022, 12, 31)).
+
+Usage:
+    python3 license_intervals.py --on 2022-07-01 --from 2015-01-01 --to 2023-01-01
+"""
+
+import argparse
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from datetime import date
+from itertools import accumulate
+
+from dataset_cache import BITE_CSV, LICENSE_CSV, load_bites, load_licenses
+
+DAYS_PER_YEAR = 365.25
+
+
+_day_numbers = {}
+
+
+def _day_number(year, month, day):
+    """Proleptic ordinal for (year, month, day), or None if not a real date.
+
+    A missing day (0) is read as the 1st of the month.
+    """
+    key = (year, month, day)
+    if key not in _day_numbers:
+        try:
+            _day_numbers[key] = date(year, month, day or 1).toordinal()
+        except ValueError:
+            _day_numbers[key] = None
+    return _day_numbers[key]
+
+
+def _clipped_sum(values, sums, lo, hi):
+    """Sum of min(max(v, lo), hi) over sorted values, given their prefix sums."""
+    below = bisect_left(values, lo)
+    above = bisect_right(values, hi)
+    return below * lo + (sums[above] - sums[below]) + (len(values) - above) * hi
+
+
+class _BreedIntervals:
+    def __init__(self, starts, ends):
+        self.starts = sorted(starts)
+        self.ends = sorted(ends)
+        self.start_sums = [0] + list(accumulate(self.starts))
+        self.end_sums = [0] + list(accumulate(self.ends))
+
+
+class LicenseIntervalIndex:
+    """Per-breed sorted license intervals for point-in-time and exposure queries."""
+
+    def __init__(self, intervals):
+        # intervals: {breed: ([start days], [end days])}
+        self._breeds = {b: _BreedIntervals(s, e) for b, (s, e) in intervals.items()}
+        self.skipped = 0
+
+    @classmethod
+    def from_table(cls, license_table, classify):
+        """Build from a cached license table, grouping by classify(raw breed).
+
+        Licenses with a missing/invalid date, an end before their start, or
+        a breed the classifier maps to None are skipped (see `skipped`).
+        """
+        labels = [classify(raw) for raw in license_table.breeds]
+        intervals = defaultdict(lambda: ([], []))
+        skipped = 0
+        for iy, im, id_, ey, em, ed, code in license_table.rows(
+                'issued_year', 'issued_month', 'issued_day',
+                'expired_year', 'expired_month', 'expired_day', 'breed'):
+            label = labels[code]
+            start = _day_number(iy, im, id_) if iy > 0 else None
+            end = _day_number(ey, em, ed) if ey > 0 else None
+            if label is None or start is None or end is None or end < start:
+                skipped += 1
+                continue
+            starts, ends = intervals[label]
+            starts.append(start)
+            ends.append(end)
+        index = cls(intervals)
+        index.skipped = skipped
+        return index
+
+    def breeds(self):
+        return list(self._breeds)
+
+    def active(self, breed, day):
+        """Licenses of `breed` active on `day` (a datetime.date)."""
+        iv = self._breeds.get(breed)
+        if iv is None:
+            return 0
+        d = day.toordinal()
+        return bisect_right(iv.starts, d) - bisect_left(iv.ends, d)
+
+    def active_during(self, breed, start, end):
+        """Licenses of `breed` active at any point in [start, end] (inclusive dates)."""
+        iv = self._breeds.get(breed)
+        if iv is None:
+            return 0
+        return bisect_right(iv.starts, end.toordinal()) - bisect_left(iv.ends, start.toordinal())
+
+    def exposure(self, breed, start, end):
+        """Dog-years of licensed exposure for `breed` in [start, end)."""
+        iv = self._breeds.get(breed)
+        if iv is None:
+            return 0.0
+        lo, hi = start.toordinal(), end.toordinal()
+        # Each interval contributes clip(end) - clip(start) days
+        days = _clipped_sum(iv.ends, iv.end_sums, lo, hi) - _clipped_sum(iv.starts, iv.start_sums, lo, hi)
+        return days / DAYS_PER_YEAR
+
+
+def count_bites_between(bite_table, classify, start, end):
+    """Bites per classified breed with DateOfBite in [start, end)."""
+    labels = [classify(raw) for raw in bite_table.breeds]
+    lo, hi = start.toordinal(), end.toordinal()
+    counts = Counter()
+    for year, month, day, code in bite_table.rows('year', 'month', 'day', 'breed'):
+        label = labels[code]
+        if label is None or year <= 0:
+            continue
+        d = _day_number(year, month, day)
+        if d is not None and lo <= d < hi:
+            counts[label] += 1
+    return counts
+
+
+def breed_classifiers(method):
+    """(bite classifier, license classifier) for a script's breed grouping; None = excluded."""
+    if method == 'analyze':
+        from analyze_dog_bites import EXCLUDED_BREEDS, clean_breed
+
+        def classify(raw):
+            label = clean_breed(raw)
+            return None if label in EXCLUDED_BREEDS else label
+        return classify, classify
+    from redistribute_bites import normalize_breed_for_bite, normalize_breed_for_license
+    return normalize_breed_for_bite, normalize_breed_for_license
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Point-in-time and exposure-based license populations.")
+    parser.add_argument('--on', type=date.fromisoformat, default=date(2022, 7, 1), help="point-in-time date")
+    parser.add_argument('--from', dest='start', type=date.fromisoformat, default=date(2015, 1, 1))
+    parser.add_argument('--to', dest='end', type=date.fromisoformat, default=date(2023, 1, 1),
+                        help="exclusive end of the exposure window")
+    parser.add_argument('--method', choices=['redistribute', 'analyze'], default='redistribute',
+                        help="breed classification to group by")
+    parser.add_argument('--min-dog-years', type=float, default=100,
+                        help="breeds with less exposure are left out (zero exposure always is)")
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    classify_bite, classify_license = breed_classifiers(args.method)
+    index = LicenseIntervalIndex.from_table(load_licenses(LICENSE_CSV), classify_license)
+    bites = count_bites_between(load_bites(BITE_CSV), classify_bite, args.start, args.end)
+
+    print("=" * 70)
+    print(f"LICENSE INTERVAL INDEX ({args.method} breeds, {index.skipped} licenses skipped)")
+    print("=" * 70)
+    print(f"Active on {args.on}; exposure and bites in [{args.start}, {args.end})")
+
+    rows = []
+    for breed in index.breeds():
+        dog_years = index.exposure(breed, args.start, args.end)
+        # No exposure means no rate, whatever the threshold
+        if dog_years > 0 and dog_years >= args.min_dog_years:
+            rows.append((breed, index.active(breed, args.on), dog_years, bites.get(breed, 0)))
+
+    baseline = next((r for r in rows if r[0] == 'Maltese'), None)
+    baseline_rate = baseline[3] / baseline[2] if baseline and baseline[3] else 0
+    rows.sort(key=lambda r: r[3] / r[2], reverse=True)
+
+    print(f"\n{'Rank':<5} {'Breed':<25} {'Active':<8} {'Dog-Years':<11} {'Bites':<7} {'Per 1k DY':<10} {'RR':<6}")
+    print("-" * 75)
+    for i, (breed, active, dog_years, n) in enumerate(rows[:args.top], 1):
+        rate = n / dog_years
+        rr = f"{rate / baseline_rate:.2f}x" if baseline_rate else "n/a"
+        print(f"{i:<5} {breed:<25} {active:<8} {dog_years:<11.0f} {n:<7} {rate * 1000:<10.2f} {rr}")
+
+
+if __name__ == "__main__":
+    main()
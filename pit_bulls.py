@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Unified Command-Line Entry Point
+
+One command for every methodology, with each script's hard-coded inputs,
+date windows and correction constants exposed as flags:
+
+    reproduce     Cremieux's exact methodology (cremieux_analysis.py)
+    analyze       Full breed risk ranking, report and charts (analyze_dog_bites.py)
+    redistribute  Misattributed Pit Bull bites redistributed (redistribute_bites.py)
+    adjust        Over-identification / under-registration adjustment of a
+                  reported RR (rebuttal_reproduction/), point or Monte Carlo
+    batch         Several of the above from one JSON file, in one process
+
+Options are applied to the scripts' configuration constants for the
+duration of one run and restored afterwards, so a batch can mix settings.
+Precedence: command-line flag, then --config, then the script's default.
+A config file is a JSON object. Top-level keys apply to every command,
+and a key named after a command holds that command's overrides:
+
+    {"bites": "DOHMH_Dog_Bite_Data_20260103.csv",
+     "redistribute": {"overcount_factor": 3.0, "big_dogs": ["Boxer", "Mastiff"]}}
+
+A batch file has the same shape plus "runs", a list of objects that each
+name a "command" and its options. Analysis modules (and NumPy) are only
+imported when a command runs, so --help starts instantly.
+
+Usage:
+    python3 pit_bulls.py reproduce --bite-years 2015:2022 --license-window 2014-09:2023-11
+    python3 pit_bulls.py redistribute --overcount-factor 3 --min-licenses 50
+    python3 pit_bulls.py analyze --max-year 2021 --pop-year 2021 --out-dir runs/2021
+    python3 pit_bulls.py adjust --reported-rr 12.59 --over-id 2.5 --under-reg 2,4
+    python3 pit_bulls.py --run-record run.json batch runs.json
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import sys
+
+# --- Configuration ---
+ADJUST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rebuttal_reproduction')
+
+BITE_WINDOW = ('MIN_BITE_YEAR', 'MAX_BITE_YEAR')
+LICENSE_WINDOW = ('MIN_LICENSE_YEAR', 'MIN_LICENSE_MONTH', 'MAX_LICENSE_YEAR', 'MAX_LICENSE_MONTH')
+
+# command -> (module, {option: configuration constants it sets})
+COMMANDS = {
+    'reproduce': ('cremieux_analysis', {
+        'bites': ('BITE_CSV',),
+        'licenses': ('LICENSE_CSV',),
+        'bite_years': BITE_WINDOW,
+        'license_window': LICENSE_WINDOW,
+    }),
+    'analyze': ('analyze_dog_bites', {
+        'bites': ('INPUT_CSV',),
+        'licenses': ('LICENSE_CSV',),
+        'max_year': ('MAX_YEAR',),
+        'pop_year': ('TARGET_POP_YEAR',),
+        'min_licenses': ('MIN_LICENSES',),
+        'report': ('OUTPUT_REPORT',),
+        'force': ('FORCE_RERUN',),
+    }),
+    'redistribute': ('redistribute_bites', {
+        'bites': ('BITE_CSV',),
+        'licenses': ('LICENSE_CSV',),
+        'bite_years': BITE_WINDOW,
+        'license_window': LICENSE_WINDOW,
+        'overcount_factor': ('OVERCOUNT_FACTOR',),
+        'big_dogs': ('BIG_DOG_BREEDS',),
+        'min_licenses': ('MIN_LICENSES',),
+    }),
+}
+PATH_OPTIONS = ('bites', 'licenses')
+
+
+def _year_window(value):
+    """'2015:2022' or [2015, 2022] -> (2015, 2022)."""
+    first, last = value.split(':') if isinstance(value, str) else value
+    return int(first), int(last)
+
+
+def _month_window(value):
+    """'2014-09:2023-11' or [[2014, 9], [2023, 11]] -> (2014, 9, 2023, 11)."""
+    spec = value
+    if isinstance(value, str):
+        value = [part.split('-') for part in value.split(':')]
+    (first_year, first_month), (last_year, last_month) = value
+    window = int(first_year), int(first_month), int(last_year), int(last_month)
+    if not (1 <= window[1] <= 12 and 1 <= window[3] <= 12):
+        raise ValueError(f"month out of range 1-12 in {spec!r}")
+    return window
+
+
+def _names(value):
+    """'Boxer,Mastiff' or a list -> set of names."""
+    return {name.strip() for name in (value.split(',') if isinstance(value, str) else value) if name.strip()}
+
+
+def _floats(value):
+    """'2,4', 3 or a list -> list of floats."""
+    if isinstance(value, str):
+        value = value.split(',')
+    elif not isinstance(value, list):
+        value = [value]
+    return [float(v) for v in value]
+
+
+CONVERTERS = {
+    'bite_years': _year_window,
+    'license_window': _month_window,
+    'big_dogs': _names,
+    'max_year': int,
+    'pop_year': int,
+    'min_licenses': int,
+    'overcount_factor': float,
+    'under_reg': _floats,
+    'draws': int,
+    'seed': int,
+}
+
+
+def _settings(command, options):
+    """Configuration constants for one run: {attribute: value}."""
+    settings = {}
+    for option, attributes in COMMANDS[command][1].items():
+        value = options.get(option)
+        if value is None:
+            continue
+        value = CONVERTERS.get(option, lambda v: v)(value)
+        if option in PATH_OPTIONS:
+            value = os.path.abspath(value)
+        values = value if len(attributes) > 1 else (value,)
+        settings.update(zip(attributes, values))
+    return settings
+
+
+@contextlib.contextmanager
+def _working_directory(path):
+    os.makedirs(path, exist_ok=True)
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+@contextlib.contextmanager
+def configured(module, settings):
+    """Temporarily set a module's configuration constants."""
+    saved = {name: getattr(module, name) for name in settings}
+    for name, value in settings.items():
+        setattr(module, name, value)
+    try:
+        yield module
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+
+
+def _adjust(options):
+    if ADJUST_DIR not in sys.path:
+        sys.path.insert(0, ADJUST_DIR)
+    from repro_calculations import calculate_adjusted_risk
+
+    reported_rr = options.get('reported_rr') or 12.59
+    over_id = options.get('over_id') or 2.5
+
+    if not options.get('draws'):
+        reported_rr, over_id = float(reported_rr), float(over_id)
+        print(f"Reported RR: {reported_rr}x, over-identification: {over_id}x")
+        for factor in _floats(options.get('under_reg') or [2.0, 4.0]):
+            adjusted = calculate_adjusted_risk(reported_rr, over_id, factor)
+            print(f"  Under-registration {factor}x: {reported_rr} / ({over_id} * {factor}) = {adjusted:.2f}x")
+        return
+
+    # Monte Carlo: values are distribution specs; plain numbers are fixed
+    from monte_carlo import simulate_adjusted_risk
+
+    def spec(value):
+        return str(value) if ':' in str(value) else f"fixed:{value}"
+    under_spec = options.get('under_reg') or 'uniform:2,4'
+    result = simulate_adjusted_risk(spec(reported_rr), spec(over_id), spec(under_spec), int(options['draws']),
+                                    seed=options.get('seed'))
+    p = result['percentiles']
+    print(f"Adjusted RR over {result['draws']:,} draws: mean {result['mean']:.2f}x, "
+          f"median {p[50]:.2f}x, 95% interval {p[2.5]:.2f}x - {p[97.5]:.2f}x")
+    for t, prob in result['exceedance'].items():
+        print(f"  P(adjusted RR > {t:g}x) = {prob * 100:.1f}%")
+
+
+def run(command, **options):
+    """Run one command with the given options (option names as in the flags, with underscores)."""
+    if command == 'adjust':
+        _adjust(options)
+        return
+
+    module_name = COMMANDS[command][0]
+    settings = _settings(command, options)
+    module = importlib.import_module(module_name)
+    vector_engine = importlib.import_module('vector_engine')
+    use_numpy = vector_engine.USE_NUMPY and not options.get('no_numpy')
+
+    out_dir = options.get('out_dir')
+    if out_dir:
+        # Input paths stay relative to where the command was started
+        for option in PATH_OPTIONS:
+            for name in COMMANDS[command][1][option]:
+                settings.setdefault(name, os.path.abspath(getattr(module, name)))
+    with configured(module, settings), configured(vector_engine, {'USE_NUMPY': use_numpy}), \
+            (_working_directory(out_dir) if out_dir else contextlib.nullcontext()):
+        module.main()
+
+
+def merge_options(config, command, cli_options):
+    """Flag > config[command] > top-level config."""
+    sections = set(COMMANDS) | {'adjust', 'runs'}
+    merged = {k.replace('-', '_'): v for k, v in config.items() if k not in sections}
+    merged.update({k.replace('-', '_'): v for k, v in config.get(command, {}).items()})
+    merged.update({k: v for k, v in cli_options.items() if v is not None and v is not False})
+    return merged
+
+
+def run_batch(path):
+    """Run every entry of a batch file's "runs" list in order."""
+    with open(path) as f:
+        batch = json.load(f)
+    runs = batch.get('runs', [])
+    for i, entry in enumerate(runs, 1):
+        entry = dict(entry)
+        command = entry.pop('command')
+        if command not in COMMANDS and command != 'adjust':
+            raise SystemExit(f"{path}: run {i}: unknown command '{command}'")
+        options = merge_options(batch, command, {k.replace('-', '_'): v for k, v in entry.items()})
+        print("#" * 70)
+        print(f"# [{i}/{len(runs)}] {command} " + " ".join(f"{k}={v}" for k, v in entry.items()))
+        print("#" * 70)
+        run(command, **options)
+        print()
+
+
+def _add_run_options(parser, command):
+    parser.add_argument('--config', default=None, help="JSON file of option defaults")
+    if command == 'adjust':
+        parser.add_argument('--reported-rr', help="reported RR (default: 12.59), or a distribution spec with --draws")
+        parser.add_argument('--over-id', help="over-identification factor (default: 2.5)")
+        parser.add_argument('--under-reg', help="under-registration factors, comma-separated (default: 2,4)")
+        parser.add_argument('--draws', type=int, help="Monte Carlo draws (values become distribution specs)")
+        parser.add_argument('--seed', type=int)
+        return
+    options = COMMANDS[command][1]
+    parser.add_argument('--bites', help="bite snapshot CSV")
+    parser.add_argument('--licenses', help="license snapshot CSV")
+    if 'bite_years' in options:
+        parser.add_argument('--bite-years', metavar='FIRST:LAST', help="bite year window, e.g. 2015:2022")
+    if 'license_window' in options:
+        parser.add_argument('--license-window', metavar='YYYY-MM:YYYY-MM',
+                            help="license issue window, e.g. 2014-09:2023-11")
+    if 'max_year' in options:
+        parser.add_argument('--max-year', type=int, help="last bite year counted")
+        parser.add_argument('--pop-year', type=int, help="population = licenses active in this year")
+        parser.add_argument('--report', help="report file name")
+        parser.add_argument('--force', action='store_true', help="recompute every stage, ignoring stored results")
+    if 'overcount_factor' in options:
+        parser.add_argument('--overcount-factor', type=float, help="Pit Bull over-identification factor")
+        parser.add_argument('--big-dogs', help="comma-separated lookalike breeds that receive bites")
+    if 'min_licenses' in options:
+        parser.add_argument('--min-licenses', type=int, help="minimum licenses for a breed's risk estimate")
+    parser.add_argument('--out-dir', help="write output files (report, charts) here")
+    parser.add_argument('--no-numpy', action='store_true', help="use the pure-Python counting path")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dog bite relative-risk analyses.")
+    parser.add_argument('--run-record', metavar='JSON', help="write per-stage timings (see instrumentation.py)")
+    parser.add_argument('--profile', metavar='PROF', help="write a cProfile dump")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for command, help_text in (('reproduce', "Cremieux's exact methodology"),
+                               ('analyze', "breed risk ranking, report and charts"),
+                               ('redistribute', "redistribute misattributed Pit Bull bites"),
+                               ('adjust', "adjust a reported RR for identification and registration bias")):
+        _add_run_options(sub.add_parser(command, help=help_text), command)
+    batch = sub.add_parser('batch', help="run several commands from a JSON file")
+    batch.add_argument('file')
+    args = parser.parse_args()
+
+    if args.run_record or args.profile:
+        import instrumentation
+        instrumentation.enable(args.run_record or os.devnull, args.profile)
+
+    if args.command == 'batch':
+        run_batch(args.file)
+        return
+
+    cli_options = {k: v for k, v in vars(args).items() if k not in ('command', 'config', 'run_record', 'profile')}
+    config = {}
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+    options = merge_options(config, args.command, cli_options)
+    try:
+        if args.command != 'adjust':
+            _settings(args.command, options)
+    except (ValueError, TypeError) as e:
+        parser.error(f"bad option value: {e}")
+    run(args.command, **options)
+
+
+if __name__ == "__main__":
+    main()
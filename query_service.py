@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Relative Risk Query Service
+
+A long-running local HTTP/JSON service answering RR questions from
+aggregates held in memory. It avoids a cold start and a table scan per
+question.
+
+At startup the raw-breed counts are read from the aggregate cube
+(aggregate_cube.py, built from the cached tables if stale). With
+--incremental they come instead from incremental_ingest.py's persisted
+state, which is first brought up to date by diffing the snapshots, so a
+new snapshot costs only its changed rows. The counts are reduced once
+per breed classification to per-label prefix sums: bites by year, licenses by issue month, and Unknown bites
+by year. Any bite or license window is then a difference of two prefix
+sums per breed. The risk and correction steps are redistribute_bites'
+own risk_table / redistribute_misattributed / rank_of, so each query
+costs well under a millisecond.
+
+Methods:
+- redistribute: redistribute_bites' breed normalization, corrections
+  available (overcount_factor, big_dogs, under_reg)
+- cremieux: cremieux_analysis' exact Pit Bull and Maltese strings only
+
+Endpoints (GET with a query string, or POST with a JSON object):
+    /health                   status and load time
+    /breeds?method=...        breeds with enough licenses in the default windows
+    /rr?breed=...&baseline=...
+                              one breed against one baseline, before and
+                              after correction
+    /ranking?baseline=...&top=20
+                              every breed ranked by RR, before and after
+
+Parameters use pit_bulls.py's option names and formats: method, breed,
+baseline, bite_years (2015:2022), license_window (2014-09:2023-11),
+min_licenses, overcount_factor, big_dogs (Boxer,Mastiff), under_reg, top.
+
+The server is single-threaded asyncio. Queries are computed inline on
+read-only data, so concurrent clients never re-read data. It binds to
+localhost by default and makes no outbound connections. Restart it to
+pick up new snapshots (with --incremental, in time proportional to the
+delta).
+
+Usage:
+    python3 query_service.py --port 8765
+    curl 'http://127.0.0.1:8765/rr?breed=Pit%20Bull&baseline=Maltese&overcount_factor=3'
+    curl -d '{"baseline": "Labrador Retriever", "bite_years": [2018, 2022]}' http://127.0.0.1:8765/ranking
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import traceback
+from collections import Counter, defaultdict
+from itertools import accumulate
+from urllib.parse import parse_qsl, urlsplit
+
+import cremieux_analysis as cr
+import redistribute_bites as rb
+from aggregate_cube import load_cubes
+from dataset_cache import NO_DATE
+from incremental_ingest import cell_fields, refresh
+from pit_bulls import CONVERTERS
+
+# --- Configuration ---
+HOST = '127.0.0.1'
+PORT = 8765
+MAX_BODY = 64 * 1024
+DEFAULT_TOP = 20
+
+# Parameter -> converter (strings from a query string, JSON values from a body)
+PARAMETERS = {
+    'method': str,
+    'breed': str,
+    'baseline': str,
+    'bite_years': CONVERTERS['bite_years'],
+    'license_window': CONVERTERS['license_window'],
+    'min_licenses': int,
+    'overcount_factor': float,
+    'big_dogs': CONVERTERS['big_dogs'],
+    'under_reg': float,
+    'top': int,
+}
+CORRECTION_PARAMETERS = ('overcount_factor', 'big_dogs', 'under_reg')
+
+# Parameter -> (check, requirement) for converted values
+RANGES = {
+    'min_licenses': (lambda v: v >= 1, ">= 1"),
+    'overcount_factor': (lambda v: v > 0, "> 0"),
+    'under_reg': (lambda v: v > 0, "> 0"),
+    'top': (lambda v: v >= 0, ">= 0"),
+}
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error'}
+
+
+class WindowCounts:
+    """
+    Per-label counts over an integer time index, answering any window in O(labels).
+
+    Built from {(t, label): n}. Undated cells (t == NO_DATE) fall in every
+    window and unparseable ones (t < NO_DATE) in none, as in the scripts'
+    date filters.
+    """
+
+    def __init__(self, cells):
+        dated = [t for t, _ in cells if t > NO_DATE]
+        self.start = min(dated, default=1)
+        self.size = max(dated, default=0) - self.start + 1
+        per_label = defaultdict(lambda: [0] * self.size)
+        self.undated = Counter()
+        for (t, label), n in cells.items():
+            if t == NO_DATE:
+                self.undated[label] += n
+            elif t > NO_DATE:
+                per_label[label][t - self.start] += n
+        self.prefix = {label: [0, *accumulate(counts)] for label, counts in per_label.items()}
+        self.labels = set(self.prefix) | set(self.undated)
+
+    def window(self, first, last):
+        """Counter of label -> count with first <= t <= last (plus undated)."""
+        lo = min(max(first - self.start, 0), self.size)
+        hi = min(max(last - self.start + 1, 0), self.size)
+        counts = Counter()
+        for label in self.labels:
+            n = self.undated.get(label, 0)
+            prefix = self.prefix.get(label)
+            if prefix is not None and hi > lo:
+                n += prefix[hi] - prefix[lo]
+            if n:
+                counts[label] = n
+        return counts
+
+
+def _month_index(year, month):
+    # Dated (year, month) -> consecutive months; NO_DATE / BAD_DATE years pass through
+    return year * 12 + month - 1 if year > NO_DATE else year
+
+
+class RiskIndex:
+    """
+    Windowed bite, Unknown-bite and license counts for one breed classification.
+
+    Built from raw-breed aggregates: bite_cells {(year, raw breed): n} and
+    license_cells {(issued_year, issued_month, raw breed): n}.
+    """
+
+    def __init__(self, bite_cells, license_cells, classify_bite, classify_license, classify_unknown=None):
+        bites, unknown, licenses = Counter(), Counter(), Counter()
+        for (year, raw), n in bite_cells.items():
+            label = classify_bite(raw)
+            if label:
+                bites[year, label] += n
+            if classify_unknown is not None and classify_unknown(raw):
+                unknown[year, 'Unknown'] += n
+        for (year, month, raw), n in license_cells.items():
+            label = classify_license(raw)
+            if label:
+                licenses[_month_index(year, month), label] += n
+        self.bites = WindowCounts(bites)
+        self.unknown = WindowCounts(unknown)
+        self.licenses = WindowCounts(licenses)
+
+    def counts(self, bite_years, license_window):
+        """(bite counts, Unknown bites, license counts) for one pair of windows."""
+        min_year, min_month, max_year, max_month = license_window
+        return (self.bites.window(*bite_years),
+                self.unknown.window(*bite_years).get('Unknown', 0),
+                self.licenses.window(_month_index(min_year, min_month), _month_index(max_year, max_month)))
+
+
+def _cremieux_bite(raw):
+    breed = raw.strip()
+    if cr.is_pit_bull_bite(breed):
+        return 'Pit Bull'
+    return 'Maltese' if cr.is_maltese_bite(breed) else None
+
+
+def _cremieux_license(raw):
+    if cr.is_pit_bull_license(raw):
+        return 'Pit Bull'
+    return 'Maltese' if cr.is_maltese_license(raw) else None
+
+
+def raw_aggregates(bite_csv, license_csv, incremental=False):
+    """
+    (bite cells, license cells) keyed on raw breed strings, as RiskIndex takes them.
+
+    By default they come from the aggregate cube. With incremental=True they
+    come from incremental_ingest's persisted state, refreshed from the
+    snapshots first. A new snapshot then costs time in proportion to its
+    changed rows.
+    """
+    if incremental:
+        bite_state, _ = refresh('bites', bite_csv)
+        license_state, _ = refresh('licenses', license_csv)
+        return (bite_state.rollup(cell_fields('bites'), ('year', 'breed')),
+                license_state.rollup(cell_fields('licenses'), ('issued_year', 'issued_month', 'breed')))
+    cubes = load_cubes(bite_csv, license_csv)
+    return (cubes['bites'].query(('year', 'breed')),
+            cubes['licenses'].query(('issued_year', 'issued_month', 'breed')))
+
+
+def method_defaults():
+    """Default query parameters per method, from each script's configuration."""
+    return {
+        'redistribute': {
+            'baseline': 'Maltese',
+            'bite_years': (rb.MIN_BITE_YEAR, rb.MAX_BITE_YEAR),
+            'license_window': (rb.MIN_LICENSE_YEAR, rb.MIN_LICENSE_MONTH, rb.MAX_LICENSE_YEAR, rb.MAX_LICENSE_MONTH),
+            'min_licenses': rb.MIN_LICENSES,
+            'overcount_factor': rb.OVERCOUNT_FACTOR,
+            'big_dogs': rb.BIG_DOG_BREEDS,
+            'under_reg': 1.0,
+            'top': DEFAULT_TOP,
+        },
+        'cremieux': {
+            'baseline': 'Maltese',
+            'bite_years': (cr.MIN_BITE_YEAR, cr.MAX_BITE_YEAR),
+            'license_window': (cr.MIN_LICENSE_YEAR, cr.MIN_LICENSE_MONTH, cr.MAX_LICENSE_YEAR, cr.MAX_LICENSE_MONTH),
+            'min_licenses': rb.MIN_LICENSES,
+            'top': DEFAULT_TOP,
+        },
+    }
+
+
+def _ranked(risks):
+    return sorted(risks.items(), key=lambda item: item[1]['rr'], reverse=True)
+
+
+class RiskService:
+    """The in-memory indexes and the query logic behind each endpoint."""
+
+    def __init__(self, bite_csv=rb.BITE_CSV, license_csv=rb.LICENSE_CSV, incremental=False):
+        start = time.perf_counter()
+        bite_cells, license_cells = raw_aggregates(bite_csv, license_csv, incremental)
+        self.indexes = {
+            'redistribute': RiskIndex(bite_cells, license_cells, rb.normalize_breed_for_bite,
+                                      rb.normalize_breed_for_license, rb.is_unknown_bite),
+            'cremieux': RiskIndex(bite_cells, license_cells, _cremieux_bite, _cremieux_license),
+        }
+        self.defaults = method_defaults()
+        self.load_ms = (time.perf_counter() - start) * 1000
+
+    def parse_query(self, params):
+        """Validate and convert request parameters, filling in the method's defaults."""
+        unknown = sorted(set(params) - set(PARAMETERS))
+        if unknown:
+            raise ValueError(f"Unknown parameter(s) {', '.join(unknown)}; expected {', '.join(PARAMETERS)}")
+        method = params.get('method', 'redistribute')
+        if method not in self.indexes:
+            raise ValueError(f"Unknown method '{method}'; expected {', '.join(self.indexes)}")
+        if method == 'cremieux':
+            given = [p for p in CORRECTION_PARAMETERS if p in params]
+            if given:
+                raise ValueError(f"Corrections ({', '.join(given)}) need method=redistribute")
+        query = dict(self.defaults[method], method=method)
+        for name, value in params.items():
+            try:
+                query[name] = PARAMETERS[name](value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid {name}: {value!r}") from None
+            if name in RANGES and not RANGES[name][0](query[name]):
+                raise ValueError(f"Invalid {name}: {value!r} (must be {RANGES[name][1]})")
+        return query
+
+    def _risks(self, query):
+        bite_counts, unknown, license_counts = self.indexes[query['method']].counts(
+            query['bite_years'], query['license_window'])
+        baseline = query['baseline']
+        if not license_counts.get(baseline):
+            raise ValueError(f"Baseline '{baseline}' has no licenses in the window")
+        baseline_risk = bite_counts.get(baseline, 0) / license_counts[baseline]
+        if baseline_risk == 0:
+            raise ValueError(f"Baseline '{baseline}' has no bites in the window, so RR is undefined")
+        original = rb.risk_table(bite_counts, license_counts, baseline_risk, query['min_licenses'])
+        if query['method'] != 'redistribute':
+            return original, None
+        corrected_bites, _ = rb.redistribute_misattributed(bite_counts, unknown, query['overcount_factor'],
+                                                           query['big_dogs'])
+        return original, rb.risk_table(corrected_bites, license_counts, baseline_risk, query['min_licenses'])
+
+    def breeds(self, query):
+        original, _ = self._risks(query)
+        return {'method': query['method'], 'breeds': sorted(original)}
+
+    def rr(self, query):
+        breed, baseline = query.get('breed'), query['baseline']
+        if not breed:
+            raise ValueError("Missing parameter: breed")
+        original, corrected = self._risks(query)
+        if breed not in original:
+            raise ValueError(f"No estimate for '{breed}' (no licenses, or fewer than {query['min_licenses']})")
+        result = {
+            'method': query['method'], 'breed': breed, 'baseline': baseline,
+            **original[breed], 'rank': rb.rank_of(original, breed), 'breeds_ranked': len(original),
+            'baseline_bites': original.get(baseline, {}).get('bites'),
+            'baseline_licenses': original.get(baseline, {}).get('licenses'),
+        }
+        if corrected is not None:
+            result['corrected'] = {
+                'bites': corrected[breed]['bites'],
+                'rr': corrected[breed]['rr'],
+                'rank': rb.rank_of(corrected, breed),
+                'final_rr': corrected[breed]['rr'] / query['under_reg'],
+            }
+        return result
+
+    def ranking(self, query):
+        original, corrected = self._risks(query)
+        result = {'method': query['method'], 'baseline': query['baseline'], 'breeds_ranked': len(original)}
+        for name, risks in (('original', original), ('corrected', corrected)):
+            if risks is not None:
+                result[name] = [{'rank': i, 'breed': breed, **data}
+                                for i, (breed, data) in enumerate(_ranked(risks)[:query['top']], 1)]
+        return result
+
+    def dispatch(self, verb, target, body):
+        """Answer one request: (HTTP status, JSON-serializable payload)."""
+        url = urlsplit(target)
+        routes = {'/health': None, '/breeds': self.breeds, '/rr': self.rr, '/ranking': self.ranking}
+        if url.path not in routes:
+            return 404, {'error': f"Unknown path {url.path}; expected {', '.join(routes)}"}
+        if verb not in ('GET', 'POST'):
+            return 405, {'error': "Use GET or POST"}
+        if url.path == '/health':
+            return 200, {'status': 'ok', 'methods': list(self.indexes), 'load_ms': round(self.load_ms, 1)}
+
+        start = time.perf_counter()
+        try:
+            params = dict(parse_qsl(url.query))
+            if body:
+                payload = json.loads(body)
+                if not isinstance(payload, dict):
+                    raise ValueError("Request body must be a JSON object")
+                params.update(payload)
+            query = self.parse_query(params)
+            result = routes[url.path](query)
+        except ValueError as e:
+            return 400, {'error': str(e)}
+        except Exception as e:
+            # Keep serving: report the failure instead of dropping the connection
+            traceback.print_exc()
+            return 500, {'error': f"Internal error: {type(e).__name__}: {e}"}
+        result['query'] = {k: sorted(v) if isinstance(v, (set, frozenset)) else v for k, v in query.items()}
+        result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        return 200, result
+
+    async def handle(self, reader, writer):
+        """Serve one connection (HTTP/1.1 keep-alive)."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                verb, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY:
+                    status, payload = 413, {'error': f"Request body over {MAX_BODY} bytes"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = self.dispatch(verb, target, body)
+                    keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+                data = json.dumps(payload).encode('utf-8')
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                             f"Content-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, ConnectionError, asyncio.IncompleteReadError):
+            pass  # malformed request or client gone: drop the connection
+        finally:
+            writer.close()
+
+
+async def serve(service, host=HOST, port=PORT):
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Serving RR queries on http://{host}:{port} (aggregates loaded in {service.load_ms:.0f} ms)")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON service for RR queries over in-memory aggregates.")
+    parser.add_argument('--host', default=HOST, help=f"interface to bind (default: {HOST}, local only)")
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--bites', default=rb.BITE_CSV)
+    parser.add_argument('--licenses', default=rb.LICENSE_CSV)
+    parser.add_argument('--incremental', action='store_true',
+                        help="load from incremental_ingest's persisted state (refreshed from the snapshots)")
+    args = parser.parse_args()
+
+    service = RiskService(args.bites, args.licenses, args.incremental)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
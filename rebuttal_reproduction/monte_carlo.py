@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo uncertainty for the adjusted relative risk.
+
+repro_calculations.py evaluates the correction at point values only
+(OVER_ID_FACTOR = 2.5, UNDER_REG_FACTORS = 2x / 4x). This script draws
+the reported RR, the over-identification factor and the under-registration
+factor from user-specified distributions. It evaluates all draws as one
+NumPy batch and reports percentiles, a histogram, and the probability that
+the adjusted RR exceeds given thresholds.
+
+Distribution specs are written as NAME:ARGS, for example:
+    fixed:2.5
+    uniform:2,4                 (low, high)
+    triangular:2.0,2.5,3.0      (low, mode, high)
+    normal:12.59,0.6            (mean, sd)
+    lognormal:12.59,0.049       (median, sigma of the log)
+
+Usage:
+    python3 monte_carlo.py --draws 1000000 --under-reg uniform:2,4
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from repro_calculations import calculate_adjusted_risk
+
+# --- Default Distributions ---
+
+# Reported RR: Cremieux's 12.59x with the sampling error implied by his
+# counts (6,053 / 21,915 vs 469 / 21,363): SE(log RR) ~= sqrt(sum(1/n)) ~= 0.049
+DEFAULT_REPORTED_RR = "lognormal:12.59,0.049"
+
+# Over-identification: Olson et al. (2015) point estimate 52 / 21 = 2.48
+DEFAULT_OVER_ID = "triangular:2.0,2.5,3.0"
+
+# Under-registration: the conservative (2x) to moderate (4x) range
+DEFAULT_UNDER_REG = "uniform:2,4"
+
+DEFAULT_DRAWS = 1_000_000
+DEFAULT_THRESHOLDS = (1.0, 2.0, 3.0, 5.0)
+PERCENTILES = (2.5, 5, 25, 50, 75, 95, 97.5)
+HISTOGRAM_BINS = 20
+
+
+def _lognormal(rng, n, median, sigma):
+    return median * np.exp(sigma * rng.standard_normal(n))
+
+
+DISTRIBUTIONS = {
+    'fixed': (1, lambda rng, n, value: np.full(n, value)),
+    'uniform': (2, lambda rng, n, low, high: rng.uniform(low, high, n)),
+    'triangular': (3, lambda rng, n, low, mode, high: rng.triangular(low, mode, high, n)),
+    'normal': (2, lambda rng, n, mean, sd: rng.normal(mean, sd, n)),
+    'lognormal': (2, _lognormal),
+}
+
+
+def parse_distribution(spec):
+    """Parse a NAME:ARGS spec into (name, params)."""
+    name, _, args = spec.partition(':')
+    name = name.strip().lower()
+    if name not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution '{name}' (choose from {', '.join(DISTRIBUTIONS)})")
+    params = tuple(float(a) for a in args.split(',')) if args else ()
+    arity = DISTRIBUTIONS[name][0]
+    if len(params) != arity:
+        raise ValueError(f"'{name}' takes {arity} parameter(s), got {len(params)}: {spec}")
+    return name, params
+
+
+def sample(spec, n, rng):
+    """Draw n samples for a NAME:ARGS spec. All draws must be positive."""
+    name, params = parse_distribution(spec)
+    draws = DISTRIBUTIONS[name][1](rng, n, *params)
+    if np.any(draws <= 0):
+        raise ValueError(f"{spec} produced non-positive draws; use a distribution with positive support")
+    return draws
+
+
+def simulate_adjusted_risk(reported_rr=DEFAULT_REPORTED_RR, over_id=DEFAULT_OVER_ID,
+                           under_reg=DEFAULT_UNDER_REG, draws=DEFAULT_DRAWS,
+                           thresholds=DEFAULT_THRESHOLDS, bins=HISTOGRAM_BINS, seed=None):
+    """
+    Monte Carlo version of calculate_adjusted_risk.
+
+    Args:
+        reported_rr (str): Distribution spec for the reported relative risk
+        over_id (str): Distribution spec for the over-identification factor
+        under_reg (str): Distribution spec for the under-registration factor
+        draws (int): Number of Monte Carlo samples
+        thresholds (iterable of float): Report P(adjusted RR > t) for each t
+        bins (int): Number of histogram bins
+        seed (int or None): RNG seed for reproducible runs
+
+    Returns:
+        dict: mean, percentiles, exceedance probabilities and histogram
+
+    Raises:
+        ValueError: If draws < 1 or a distribution spec is invalid
+    """
+    if draws < 1:
+        raise ValueError(f"draws must be at least 1, got {draws}")
+    rng = np.random.default_rng(seed)
+    adjusted = calculate_adjusted_risk(
+        sample(reported_rr, draws, rng),
+        sample(over_id, draws, rng),
+        sample(under_reg, draws, rng),
+    )
+    counts, edges = np.histogram(adjusted, bins=bins)
+    return {
+        'draws': draws,
+        'mean': float(adjusted.mean()),
+        'percentiles': dict(zip(PERCENTILES, np.percentile(adjusted, PERCENTILES).tolist())),
+        'exceedance': {t: float(np.mean(adjusted > t)) for t in thresholds},
+        'histogram': (counts.tolist(), edges.tolist()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo uncertainty for the adjusted relative risk.")
+    parser.add_argument('--reported-rr', default=DEFAULT_REPORTED_RR, help=f"default: {DEFAULT_REPORTED_RR}")
+    parser.add_argument('--over-id', default=DEFAULT_OVER_ID, help=f"default: {DEFAULT_OVER_ID}")
+    parser.add_argument('--under-reg', default=DEFAULT_UNDER_REG, help=f"default: {DEFAULT_UNDER_REG}")
+    parser.add_argument('--draws', type=int, default=DEFAULT_DRAWS)
+    parser.add_argument('--threshold', type=float, action='append', dest='thresholds',
+                        help="report P(adjusted RR > T); repeatable")
+    parser.add_argument('--bins', type=int, default=HISTOGRAM_BINS)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    if args.draws < 1:
+        parser.error(f"--draws must be at least 1, got {args.draws}")
+
+    start = time.perf_counter()
+    try:
+        result = simulate_adjusted_risk(args.reported_rr, args.over_id, args.under_reg, args.draws,
+                                        args.thresholds or DEFAULT_THRESHOLDS, args.bins, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+
+    print(f"{'-'*40}")
+    print(f"Monte Carlo Adjusted Risk")
+    print(f"{'-'*40}")
+    print(f"Reported RR:             {args.reported_rr}")
+    print(f"Over-Identification:     {args.over_id}")
+    print(f"Under-Registration:      {args.under_reg}")
+    print(f"Draws:                   {result['draws']:,} ({elapsed:.2f}s)\n")
+
+    print(f"Adjusted RR mean: {result['mean']:.2f}x")
+    for p, value in result['percentiles'].items():
+        print(f"  P{p:<5} {value:.2f}x")
+
+    print(f"\nProbability adjusted RR exceeds:")
+    for t, prob in result['exceedance'].items():
+        print(f"  > {t:.2f}x: {prob*100:.1f}%")
+
+    print(f"\nHistogram:")
+    counts, edges = result['histogram']
+    peak = max(counts) or 1
+    for count, low, high in zip(counts, edges, edges[1:]):
+        bar = '#' * round(40 * count / peak)
+        print(f"  {low:5.2f} - {high:5.2f} | {bar} {count}")
+
+
+if __name__ == "__main__":
+    main()
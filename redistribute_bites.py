@@ -9,9 +9,14 @@ This script:
 3. Shows rankings before and after correction
 """
 
-import csv
 from collections import Counter
 
+import vector_engine
+from breed_memo import cache_report, memoize_breed
+from breed_rules import BITE_MATCHER, LICENSE_MATCHER
+from dataset_cache import BAD_DATE, NO_DATE, load_bites, load_licenses
+from instrumentation import stage
+
 # --- Configuration ---
 BITE_CSV = "DOHMH_Dog_Bite_Data_20260103.csv"
 LICENSE_CSV = "NYC_Dog_Licensing_Dataset_20260103.csv"
@@ -20,26 +25,15 @@ LICENSE_CSV = "NYC_Dog_Licensing_Dataset_20260103.csv"
 MIN_BITE_YEAR = 2015
 MAX_BITE_YEAR = 2022
 MIN_LICENSE_YEAR = 2014
+MIN_LICENSE_MONTH = 9
 MAX_LICENSE_YEAR = 2023
 MAX_LICENSE_MONTH = 11
 
 # Pit bull over-identification factor (from Olson et al. 2015)
 OVERCOUNT_FACTOR = 2.5
 
-# Cremieux's EXACT Pit Bull breed strings (from his footnotes)
-CREMIEUX_PIT_BULLS = {
-    'American Pit Bull Terrier',
-    'American Pit Bull Mix / Pit Bull Mix',
-    'Pit Bull',
-    'Pit Bull Mix',
-    'American Staffordshire Terrier',
-    'Staffordshire Bull Terrier',
-    'American Pit Bull Terrier Crossbreed',
-    'American Staffordshire Terrier Crossbreed',
-}
-
-# Cremieux's Maltese definition (matches his back-classification)
-CREMIEUX_MALTESE = {'Maltese', 'Maltese Crossbreed'}
+# Minimum licenses for a breed to get a (stable) risk estimate
+MIN_LICENSES = 100
 
 # Big dogs that could be visually confused with pit bulls
 BIG_DOG_BREEDS = {
@@ -50,144 +44,197 @@ BIG_DOG_BREEDS = {
     'Belgian Malinois'
 }
 
+@memoize_breed
 def normalize_breed_for_license(breed):
     """Match a license breed to our normalized categories using Cremieux's exact strings."""
-    b = breed.strip()
-    
-    # Cremieux's exact Pit Bull strings
-    if b in CREMIEUX_PIT_BULLS:
-        return 'Pit Bull'
-    
-    # Cremieux's exact Maltese strings
-    if b in CREMIEUX_MALTESE:
-        return 'Maltese'
-    
-    # Other big dog breeds (normalized)
-    b_upper = b.upper()
-    if 'LABRADOR' in b_upper:
-        return 'Labrador Retriever'
-    if 'GERMAN SHEPHERD' in b_upper:
-        return 'German Shepherd'
-    if 'BOXER' in b_upper:
-        return 'Boxer'
-    if 'ROTTWEILER' in b_upper:
-        return 'Rottweiler'
-    if 'BULLDOG' in b_upper and 'FRENCH' not in b_upper:
-        return 'Bulldog'
-    if 'DOBERMAN' in b_upper:
-        return 'Doberman Pinscher'
-    if 'GREAT DANE' in b_upper:
-        return 'Great Dane'
-    if 'MASTIFF' in b_upper:
-        return 'Mastiff'
-    if 'CANE CORSO' in b_upper:
-        return 'Cane Corso'
-    if 'BULL TERRIER' in b_upper:
-        return 'Bull Terrier'
-    if 'BELGIAN MALINOIS' in b_upper:
-        return 'Belgian Malinois'
-    if 'RHODESIAN' in b_upper:
-        return 'Rhodesian Ridgeback'
-    if 'WEIMARANER' in b_upper:
-        return 'Weimaraner'
-    if 'POINTER' in b_upper:
-        return 'Pointer'
-    if 'AMERICAN BULLY' in b_upper:
-        return 'American Bully'
-    if 'CHIHUAHUA' in b_upper:
-        return 'Chihuahua'
-    if 'SIBERIAN HUSKY' in b_upper or 'HUSKY' in b_upper:
-        return 'Siberian Husky'
-    if 'CHOW' in b_upper:
-        return 'Chow Chow'
-    if 'AKITA' in b_upper:
-        return 'Akita'
-    if 'BEAGLE' in b_upper:
-        return 'Beagle'
-    if 'GOLDEN RETRIEVER' in b_upper:
-        return 'Golden Retriever'
-    if 'POODLE' in b_upper:
-        return 'Poodle'
-    if 'YORKSHIRE' in b_upper:
-        return 'Yorkshire Terrier'
-    if 'SHIH TZU' in b_upper:
-        return 'Shih Tzu'
-    if 'COCKER SPANIEL' in b_upper:
-        return 'Cocker Spaniel'
-    if 'DACHSHUND' in b_upper:
-        return 'Dachshund'
-    
-    return None
+    return LICENSE_MATCHER.classify(breed.strip())
 
 
+@memoize_breed
 def normalize_breed_for_bite(breed):
     """Match a bite breed to our normalized categories."""
+    return BITE_MATCHER.classify(breed.strip().upper())
+
+
+@memoize_breed
+def is_unknown_bite(breed):
+    """Check if a raw bite breed string belongs in the Unknown redistribution pool."""
     b = breed.strip().upper()
+    return not b or 'UNKNOWN' in b or b == 'MIXED'
+
+
+def aggregate_bites(bite_table, min_year=None, max_year=None):
+    """Gather every per-row bite statistic in a single pass over the table.
+    
+    The year window defaults to MIN_BITE_YEAR - MAX_BITE_YEAR.
+    
+    Returns a dict with:
+        counts: Counter of normalized breed -> bites in the date window
+        unknown: bites in the window whose breed is unknown/mixed
+        out_of_window: bites dropped by the MIN/MAX_BITE_YEAR filter
+        bad_date: bites dropped because DateOfBite did not parse
+    """
+    min_year = MIN_BITE_YEAR if min_year is None else min_year
+    max_year = MAX_BITE_YEAR if max_year is None else max_year
+    if vector_engine.available():
+        return _aggregate_bites_vectorized(bite_table, min_year, max_year)
+    
+    counts = Counter()
+    unknown = 0
+    out_of_window = 0
+    bad_date = 0
+    breeds = bite_table.breeds
+    
+    for year, code in bite_table.rows('year', 'breed'):
+        if year == BAD_DATE:
+            bad_date += 1
+            continue
+        if year != NO_DATE and (year < min_year or year > max_year):
+            out_of_window += 1
+            continue
+        
+        raw = breeds[code]
+        breed = normalize_breed_for_bite(raw)
+        if breed:
+            counts[breed] += 1
+        if is_unknown_bite(raw):
+            unknown += 1
+    
+    return {
+        'counts': counts,
+        'unknown': unknown,
+        'out_of_window': out_of_window,
+        'bad_date': bad_date,
+    }
+
+
+def _aggregate_bites_vectorized(bite_table, min_year, max_year):
+    year = vector_engine.column(bite_table, 'year')
+    in_window = vector_engine.bite_window_mask(year, min_year, max_year)
+    bad = year == BAD_DATE
+    return {
+        'counts': vector_engine.count_labels(bite_table, normalize_breed_for_bite, in_window),
+        'unknown': vector_engine.count_matching(bite_table, is_unknown_bite, in_window),
+        'out_of_window': int((~in_window & ~bad).sum()),
+        'bad_date': int(bad.sum()),
+    }
+
+
+def count_licenses(license_table, window=None):
+    """Count licenses per normalized breed within the license date window.
+    
+    `window` is (min_year, min_month, max_year, max_month) and defaults to
+    MIN_LICENSE_YEAR/MIN_LICENSE_MONTH - MAX_LICENSE_YEAR/MAX_LICENSE_MONTH.
+    """
+    if window is None:
+        window = (MIN_LICENSE_YEAR, MIN_LICENSE_MONTH, MAX_LICENSE_YEAR, MAX_LICENSE_MONTH)
+    min_year, min_month, max_year, max_month = window
+    if vector_engine.available():
+        year = vector_engine.column(license_table, 'issued_year')
+        month = vector_engine.column(license_table, 'issued_month')
+        in_window = vector_engine.license_window_mask(year, month, min_year, min_month, max_year, max_month)
+        return vector_engine.count_labels(license_table, normalize_breed_for_license, in_window)
     
-    if not b or b in ['UNKNOWN', 'MIXED', 'OTHER']:
-        return None
+    license_counts = Counter()
+    for year, month, code in license_table.rows('issued_year', 'issued_month', 'breed'):
+        if year == BAD_DATE:
+            continue
+        if year != NO_DATE:
+            if year < min_year or year > max_year:
+                continue
+            if year == min_year and month < min_month:
+                continue
+            if year == max_year and month > max_month:
+                continue
+        
+        breed = normalize_breed_for_license(license_table.breeds[code])
+        if breed:
+            license_counts[breed] += 1
+    return license_counts
+
+
+def license_window_skips(license_table, window=None):
+    """Licenses count_licenses drops, by reason: {'bad_date': n, 'out_of_range': n}."""
+    if window is None:
+        window = (MIN_LICENSE_YEAR, MIN_LICENSE_MONTH, MAX_LICENSE_YEAR, MAX_LICENSE_MONTH)
+    min_year, min_month, max_year, max_month = window
+    start, end = (min_year, min_month), (max_year, max_month)
+    skips = Counter()
+    for year, month in license_table.rows('issued_year', 'issued_month'):
+        if year == BAD_DATE:
+            skips['bad_date'] += 1
+        elif year != NO_DATE and not start <= (year, month) <= end:
+            skips['out_of_range'] += 1
+    return skips
+
+
+def risk_table(bite_counts, license_counts, baseline_risk, min_licenses=None):
+    """Per-breed bites, licenses, risk and RR vs the baseline (breeds with >= min_licenses, default MIN_LICENSES)."""
+    min_licenses = MIN_LICENSES if min_licenses is None else min_licenses
+    if vector_engine.available():
+        return vector_engine.relative_risks(bite_counts, license_counts, min_licenses, baseline_risk)
     
-    # Pit Bull - match keyword pattern (bite data is less granular)
-    if 'PIT BULL' in b or 'PITBULL' in b or 'STAFFORDSHIRE' in b:
-        return 'Pit Bull'
-    if 'AMERICAN BULLY' in b:
-        return 'American Bully'
-    
-    # Match same as license normalization
-    if 'MALTESE' in b:
-        return 'Maltese'
-    if 'LABRADOR' in b:
-        return 'Labrador Retriever'
-    if 'GERMAN SHEPHERD' in b:
-        return 'German Shepherd'
-    if 'BOXER' in b:
-        return 'Boxer'
-    if 'ROTTWEILER' in b:
-        return 'Rottweiler'
-    if 'BULLDOG' in b and 'FRENCH' not in b:
-        return 'Bulldog'
-    if 'DOBERMAN' in b:
-        return 'Doberman Pinscher'
-    if 'GREAT DANE' in b:
-        return 'Great Dane'
-    if 'MASTIFF' in b:
-        return 'Mastiff'
-    if 'CANE CORSO' in b:
-        return 'Cane Corso'
-    if 'BULL TERRIER' in b:
-        return 'Bull Terrier'
-    if 'BELGIAN MALINOIS' in b:
-        return 'Belgian Malinois'
-    if 'RHODESIAN' in b:
-        return 'Rhodesian Ridgeback'
-    if 'WEIMARANER' in b:
-        return 'Weimaraner'
-    if 'POINTER' in b:
-        return 'Pointer'
-    if 'CHIHUAHUA' in b:
-        return 'Chihuahua'
-    if 'HUSKY' in b:
-        return 'Siberian Husky'
-    if 'CHOW' in b:
-        return 'Chow Chow'
-    if 'AKITA' in b:
-        return 'Akita'
-    if 'BEAGLE' in b:
-        return 'Beagle'
-    if 'GOLDEN RETRIEVER' in b:
-        return 'Golden Retriever'
-    if 'POODLE' in b:
-        return 'Poodle'
-    if 'YORKSHIRE' in b or 'YORKIE' in b:
-        return 'Yorkshire Terrier'
-    if 'SHIH TZU' in b:
-        return 'Shih Tzu'
-    if 'COCKER SPANIEL' in b:
-        return 'Cocker Spaniel'
-    if 'DACHSHUND' in b:
-        return 'Dachshund'
-    
-    return None
+    risks = {}
+    for breed in set(bite_counts.keys()) | set(license_counts.keys()):
+        if breed in license_counts and license_counts[breed] >= min_licenses:
+            bites = bite_counts.get(breed, 0)
+            licenses = license_counts[breed]
+            risk = bites / licenses
+            rr = risk / baseline_risk if baseline_risk > 0 else 0
+            risks[breed] = {
+                'bites': bites,
+                'licenses': licenses,
+                'risk': risk,
+                'rr': rr
+            }
+    return risks
+
+
+def redistribute_misattributed(bite_counts, unknown_bites, overcount_factor=None, big_dogs=None):
+    """Move over-identified Pit Bull bites to big dogs + Unknown.
+    
+    Pit Bull keeps bites / overcount_factor (default OVERCOUNT_FACTOR). The
+    rest are shared among big_dogs (default BIG_DOG_BREEDS) and Unknown in
+    proportion to their original bites.
+    
+    Returns (corrected_bites, shares), where shares maps each receiving
+    category to (original bites, proportion, added bites).
+    """
+    overcount_factor = OVERCOUNT_FACTOR if overcount_factor is None else overcount_factor
+    big_dogs = BIG_DOG_BREEDS if big_dogs is None else big_dogs
+    pb_bites = bite_counts.get('Pit Bull', 0)
+    pb_true_bites = pb_bites / overcount_factor
+    misattributed_bites = pb_bites - pb_true_bites
+    
+    # Total redistribution pool = big dogs + unknown
+    big_dog_bites = sum(bite_counts.get(b, 0) for b in big_dogs)
+    redistribution_pool_bites = big_dog_bites + unknown_bites
+    
+    corrected_bites = dict(bite_counts)
+    corrected_bites['Pit Bull'] = pb_true_bites
+    shares = {}
+    for breed in sorted(big_dogs):
+        if breed in bite_counts and bite_counts[breed] > 0:
+            proportion = bite_counts[breed] / redistribution_pool_bites
+            additional_bites = misattributed_bites * proportion
+            corrected_bites[breed] = corrected_bites.get(breed, 0) + additional_bites
+            shares[breed] = (bite_counts[breed], proportion, additional_bites)
+    
+    # Unknown gets its share too
+    unknown_proportion = unknown_bites / redistribution_pool_bites
+    unknown_additional = misattributed_bites * unknown_proportion
+    corrected_bites['Unknown'] = unknown_bites + unknown_additional
+    shares['Unknown'] = (unknown_bites, unknown_proportion, unknown_additional)
+    
+    return corrected_bites, shares
+
+
+def rank_of(risks, breed):
+    """1-based rank of `breed` by RR (descending), or None if it has no estimate."""
+    if breed not in risks:
+        return None
+    target = risks[breed]['rr']
+    return 1 + sum(1 for b, data in risks.items() if data['rr'] > target)
 
 
 def main():
@@ -197,53 +244,37 @@ def main():
     
     # --- Load Bites ---
     print("\n[1] Loading bite data...")
-    bite_counts = Counter()
-    
-    with open(BITE_CSV, 'r', encoding='utf-8', errors='replace') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            date_str = row.get('DateOfBite', '')
-            try:
-                if ',' in date_str:
-                    year = int(date_str.split(',')[-1].strip())
-                    if year < MIN_BITE_YEAR or year > MAX_BITE_YEAR:
-                        continue
-            except ValueError:
-                continue
-            
-            breed = normalize_breed_for_bite(row.get('Breed', ''))
-            if breed:
-                bite_counts[breed] += 1
+    bite_table = load_bites(BITE_CSV)
+    with stage('count bites') as s:
+        bite_stats = aggregate_bites(bite_table)
+        s.rows = len(bite_table)
+        s.skip('bad_date', bite_stats['bad_date'])
+        s.skip('out_of_range', bite_stats['out_of_window'])
+        s.skip('unmatched_breed', len(bite_table) - bite_stats['bad_date'] - bite_stats['out_of_window']
+               - sum(bite_stats['counts'].values()))
+    bite_counts = bite_stats['counts']
+    unknown_bites = bite_stats['unknown']
     
     print(f"    Loaded {sum(bite_counts.values())} bites across {len(bite_counts)} breeds")
+    print(f"    (Skipped {bite_stats['out_of_window']} bites outside date range, "
+          f"{bite_stats['bad_date']} with unparseable dates)")
     
     # --- Load Licenses ---
     print("\n[2] Loading license data...")
-    license_counts = Counter()
-    
-    with open(LICENSE_CSV, 'r', encoding='utf-8', errors='replace') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            issued_str = row.get('LicenseIssuedDate', '').strip().strip('"')
-            try:
-                parts = issued_str.split('/')
-                if len(parts) == 3:
-                    month = int(parts[0])
-                    year = int(parts[2])
-                    if year < MIN_LICENSE_YEAR or year > MAX_LICENSE_YEAR:
-                        continue
-                    if year == MIN_LICENSE_YEAR and month < 9:
-                        continue
-                    if year == MAX_LICENSE_YEAR and month > MAX_LICENSE_MONTH:
-                        continue
-            except (ValueError, IndexError):
-                continue
-            
-            breed = normalize_breed_for_license(row.get('BreedName', ''))
-            if breed:
-                license_counts[breed] += 1
+    license_table = load_licenses(LICENSE_CSV)
+    with stage('count licenses') as s:
+        license_counts = count_licenses(license_table)
+        s.rows = len(license_table)
+    if s.enabled:
+        # Counted after the stage so the extra pass is not timed with it
+        skips = license_window_skips(license_table)
+        for reason, n in skips.items():
+            s.skip(reason, n)
+        s.skip('unmatched_breed', len(license_table) - sum(skips.values()) - sum(license_counts.values()))
     
     print(f"    Loaded {sum(license_counts.values())} licenses across {len(license_counts)} breeds")
+    for line in cache_report(normalize_breed_for_bite, normalize_breed_for_license):
+        print(f"    Breed cache: {line}")
     
     # --- Get Maltese baseline ---
     maltese_bites = bite_counts.get('Maltese', 0)
@@ -265,19 +296,8 @@ def main():
     
     # --- Calculate ORIGINAL relative risk for all breeds ---
     print("\n[3] Calculating ORIGINAL relative risk for all breeds...")
-    original_risks = {}
-    for breed in set(bite_counts.keys()) | set(license_counts.keys()):
-        if breed in license_counts and license_counts[breed] >= 100:
-            bites = bite_counts.get(breed, 0)
-            licenses = license_counts[breed]
-            risk = bites / licenses
-            rr = risk / maltese_risk if maltese_risk > 0 else 0
-            original_risks[breed] = {
-                'bites': bites,
-                'licenses': licenses,
-                'risk': risk,
-                'rr': rr
-            }
+    with stage('compute risk'):
+        original_risks = risk_table(bite_counts, license_counts, maltese_risk)
     
     # --- Calculate misattributed bites ---
     pb_true_bites = pb_bites / OVERCOUNT_FACTOR
@@ -289,23 +309,7 @@ def main():
     print(f"    Misattributed bites: {misattributed_bites:.0f}")
     
     # --- Calculate redistribution pool (big dogs + Unknown) based on BITES ---
-    # We need to track Unknown bites separately
-    unknown_bites = 0
-    with open(BITE_CSV, 'r', encoding='utf-8', errors='replace') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            date_str = row.get('DateOfBite', '')
-            try:
-                if ',' in date_str:
-                    year = int(date_str.split(',')[-1].strip())
-                    if year < MIN_BITE_YEAR or year > MAX_BITE_YEAR:
-                        continue
-            except ValueError:
-                continue
-            breed = row.get('Breed', '').strip().upper()
-            if not breed or 'UNKNOWN' in breed or breed == 'MIXED':
-                unknown_bites += 1
-    
+    # Unknown bites were tracked separately during the single aggregation pass
     # Calculate big dog bites total (from bite_counts, excluding pit bull)
     big_dog_bites = sum(bite_counts.get(b, 0) for b in BIG_DOG_BREEDS)
     
@@ -318,39 +322,17 @@ def main():
     print(f"    Total redistribution pool: {redistribution_pool_bites}")
     
     # --- Redistribute misattributed bites proportional to original bites ---
-    corrected_bites = dict(bite_counts)
-    corrected_bites['Pit Bull'] = pb_true_bites
-    corrected_bites['Unknown'] = unknown_bites  # Add Unknown to our tracking
+    with stage('redistribute bites'):
+        corrected_bites, shares = redistribute_misattributed(bite_counts, unknown_bites, OVERCOUNT_FACTOR)
     
     print("\n    Redistribution by bite proportion:")
-    for breed in sorted(BIG_DOG_BREEDS):
-        if breed in bite_counts and bite_counts[breed] > 0:
-            proportion = bite_counts[breed] / redistribution_pool_bites
-            additional_bites = misattributed_bites * proportion
-            corrected_bites[breed] = corrected_bites.get(breed, 0) + additional_bites
-            print(f"      {breed}: {bite_counts[breed]} bites ({proportion*100:.1f}%) → +{additional_bites:.0f}")
-    
-    # Unknown gets its share too
-    unknown_proportion = unknown_bites / redistribution_pool_bites
-    unknown_additional = misattributed_bites * unknown_proportion
-    corrected_bites['Unknown'] = unknown_bites + unknown_additional
-    print(f"      Unknown: {unknown_bites} bites ({unknown_proportion*100:.1f}%) → +{unknown_additional:.0f}")
+    for breed, (bites, proportion, additional_bites) in shares.items():
+        print(f"      {breed}: {bites} bites ({proportion*100:.1f}%) → +{additional_bites:.0f}")
     
     # --- Calculate CORRECTED relative risk ---
     print("\n[6] Calculating CORRECTED relative risk...")
-    corrected_risks = {}
-    for breed in set(corrected_bites.keys()) | set(license_counts.keys()):
-        if breed in license_counts and license_counts[breed] >= 100:
-            bites = corrected_bites.get(breed, 0)
-            licenses = license_counts[breed]
-            risk = bites / licenses
-            rr = risk / maltese_risk if maltese_risk > 0 else 0
-            corrected_risks[breed] = {
-                'bites': bites,
-                'licenses': licenses,
-                'risk': risk,
-                'rr': rr
-            }
+    with stage('compute corrected risk'):
+        corrected_risks = risk_table(corrected_bites, license_counts, maltese_risk)
     
     # --- Print comparison ---
     print("\n" + "=" * 70)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Pairwise Relative Risk Matrix
+
+The other scripts report each breed's RR against one fixed baseline,
+Maltese. This script computes the full breed x breed matrix in one
+vectorized outer division of the per-breed risk vector. Every breed with
+at least MIN_LICENSES licenses is both a row and a possible baseline:
+
+    rr[i, j] = risk[i] / risk[j]   (breed i with breed j as the baseline)
+
+Baselines with no bites have undefined RR, and their columns are NaN.
+Dividing by a baseline rescales a column without reordering it, so a
+breed's rank by risk is the same for every baseline. The baseline only
+changes the size of the RR, including whether it is above 1. The summary
+shows how far the headline breed's RR moves across all baselines.
+
+Counts use redistribute_bites' breed normalization and date windows.
+With --overcount-factor, bites are corrected first, as in
+redistribute_bites.
+
+Outputs:
+- rr_matrix.npz: breeds, bites, licenses, risk and the rr matrix
+  (np.load; no pickling needed)
+- rr_matrix_ranked.csv: for every baseline, the breeds ranked by RR
+
+Usage:
+    python3 rr_matrix.py --headline "Pit Bull" --min-licenses 100
+    python3 rr_matrix.py --bite-years 2018:2022 --overcount-factor 2.5
+"""
+
+import argparse
+import csv
+
+import numpy as np
+
+import redistribute_bites as rb
+from dataset_cache import load_bites, load_licenses
+from pit_bulls import CONVERTERS
+
+# --- Configuration ---
+HEADLINE = 'Pit Bull'
+REFERENCE_BASELINE = 'Maltese'
+OUTPUT_MATRIX = "rr_matrix.npz"
+OUTPUT_RANKED = "rr_matrix_ranked.csv"
+
+
+def rr_matrix(bite_counts, license_counts, min_licenses=None):
+    """
+    Every eligible breed's RR against every eligible baseline.
+
+    Args:
+        bite_counts (dict): breed -> bites (may be fractional after correction)
+        license_counts (dict): breed -> licenses
+        min_licenses (int): Breeds below this license count are left out
+            (default: redistribute_bites.MIN_LICENSES)
+
+    Returns:
+        dict: 'breeds' (sorted), 'bites', 'licenses', 'risk' vectors and
+        'rr', where rr[i, j] is breed i's RR with breed j as the baseline
+    """
+    min_licenses = rb.MIN_LICENSES if min_licenses is None else min_licenses
+    breeds = sorted(b for b, n in license_counts.items() if n >= min_licenses)
+    bites = np.array([bite_counts.get(b, 0) for b in breeds], dtype=np.float64)
+    licenses = np.array([license_counts[b] for b in breeds], dtype=np.int64)
+    risk = bites / licenses
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rr = np.divide.outer(risk, risk)
+    rr[:, risk == 0] = np.nan
+    return {'breeds': breeds, 'bites': bites, 'licenses': licenses, 'risk': risk, 'rr': rr}
+
+
+def save_matrix(matrix, filename):
+    np.savez_compressed(filename, breeds=np.array(matrix['breeds']), bites=matrix['bites'],
+                        licenses=matrix['licenses'], risk=matrix['risk'], rr=matrix['rr'])
+
+
+def write_ranked(matrix, filename):
+    """One block per baseline: breeds ranked by RR (the same order for every baseline)."""
+    breeds, rr = matrix['breeds'], matrix['rr']
+    order = np.argsort(-matrix['risk'], kind='stable')
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['baseline', 'rank', 'breed', 'bites', 'licenses', 'rr'])
+        for j, baseline in enumerate(breeds):
+            if np.isnan(rr[0, j]):
+                continue
+            for rank, i in enumerate(order, 1):
+                writer.writerow([baseline, rank, breeds[i], f"{matrix['bites'][i]:g}", matrix['licenses'][i],
+                                 f"{rr[i, j]:.4f}"])
+
+
+def baseline_sensitivity(matrix, breed):
+    """
+    How `breed`'s RR varies over every other usable baseline.
+
+    Returns:
+        dict: 'rank' (by risk, baseline-independent), 'baselines' (count),
+        'min'/'max' as (rr, baseline), 'median', 'above_1' (baselines with
+        RR > 1), or None if the breed is not in the matrix
+    """
+    breeds = matrix['breeds']
+    if breed not in breeds:
+        return None
+    i = breeds.index(breed)
+    row = matrix['rr'][i]
+    usable = ~np.isnan(row)
+    usable[i] = False
+    if not usable.any():
+        return None
+    cols = np.flatnonzero(usable)
+    values = row[cols]
+    lo, hi = cols[np.argmin(values)], cols[np.argmax(values)]
+    return {
+        'rank': int(1 + (matrix['risk'] > matrix['risk'][i]).sum()),
+        'baselines': len(cols),
+        'min': (float(row[lo]), breeds[lo]),
+        'median': float(np.median(values)),
+        'max': (float(row[hi]), breeds[hi]),
+        'above_1': int((values > 1).sum()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Breed x breed relative risk matrix against every baseline.")
+    parser.add_argument('--headline', default=HEADLINE, help="breed whose baseline sensitivity is summarized")
+    parser.add_argument('--bite-years', type=CONVERTERS['bite_years'], default=None, help="FIRST:LAST")
+    parser.add_argument('--license-window', type=CONVERTERS['license_window'], default=None,
+                        help="YYYY-MM:YYYY-MM")
+    parser.add_argument('--min-licenses', type=int, default=rb.MIN_LICENSES)
+    parser.add_argument('--overcount-factor', type=float, default=None,
+                        help="redistribute misattributed Pit Bull bites first (default: uncorrected)")
+    parser.add_argument('--top', type=int, default=10, help="breeds shown in the printed excerpt")
+    args = parser.parse_args()
+
+    bite_years = args.bite_years or (None, None)
+    bite_stats = rb.aggregate_bites(load_bites(rb.BITE_CSV), *bite_years)
+    license_counts = rb.count_licenses(load_licenses(rb.LICENSE_CSV), args.license_window)
+    bite_counts = bite_stats['counts']
+    if args.overcount_factor is not None:
+        bite_counts, _ = rb.redistribute_misattributed(bite_counts, bite_stats['unknown'], args.overcount_factor)
+
+    matrix = rr_matrix(bite_counts, license_counts, args.min_licenses)
+    breeds, rr = matrix['breeds'], matrix['rr']
+    save_matrix(matrix, OUTPUT_MATRIX)
+    write_ranked(matrix, OUTPUT_RANKED)
+
+    print("=" * 70)
+    print(f"RR MATRIX: {len(breeds)} breeds with >= {args.min_licenses} licenses"
+          + (f" (bites corrected, overcount {args.overcount_factor:g}x)" if args.overcount_factor is not None else ""))
+    print("=" * 70)
+
+    s = baseline_sensitivity(matrix, args.headline)
+    if s is None:
+        print(f"\n{args.headline}: no RR estimate (too few licenses, or no usable baseline)")
+    else:
+        print(f"\n{args.headline}: rank #{s['rank']} of {len(breeds)} by risk (the same for every baseline)")
+        print(f"  RR across {s['baselines']} baselines: min {s['min'][0]:.2f}x (vs {s['min'][1]}), "
+              f"median {s['median']:.2f}x, max {s['max'][0]:.2f}x (vs {s['max'][1]})")
+        print(f"  RR > 1 against {s['above_1']} of {s['baselines']} baselines")
+        if REFERENCE_BASELINE in breeds and REFERENCE_BASELINE != args.headline:
+            i, ref = breeds.index(args.headline), breeds.index(REFERENCE_BASELINE)
+            others = [rr[i, j] for j in range(len(breeds)) if j not in (i, ref) and not np.isnan(rr[i, j])]
+            if not np.isnan(rr[i, ref]):
+                print(f"  vs {REFERENCE_BASELINE}: {rr[i, ref]:.2f}x, higher than against "
+                      f"{sum(v < rr[i, ref] for v in others)} of {len(others)} other baselines")
+
+    # Excerpt: top breeds by risk against the lowest-, median- and highest-risk baselines and the reference
+    order = np.argsort(-matrix['risk'], kind='stable')
+    usable = [j for j in order if matrix['risk'][j] > 0]
+    columns = [usable[-1], usable[len(usable) // 2], usable[0]] if usable else []
+    if REFERENCE_BASELINE in breeds and breeds.index(REFERENCE_BASELINE) not in columns:
+        columns.insert(0, breeds.index(REFERENCE_BASELINE))
+    print(f"\n{'Breed':<25}" + "".join(f"{'vs ' + breeds[j][:14]:>18}" for j in columns))
+    print("-" * (25 + 18 * len(columns)))
+    for i in order[:args.top]:
+        print(f"{breeds[i][:24]:<25}" + "".join(f"{rr[i, j]:>17.2f}x" for j in columns))
+
+    print(f"\nMatrix written to {OUTPUT_MATRIX}, ranked view per baseline to {OUTPUT_RANKED}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Stage Result Cache
+
+Build-style memoization for multi-stage pipelines (ingest, classify,
+aggregate, risk, render). A stage runs only when its key changes.
+
+- A key is a SHA-256 over the stage's configuration and the keys of the
+  stages it depends on. Ingest stages are keyed on snapshot contents
+  (dataset_cache.snapshot_digest), and code changes are picked up by
+  including source_fingerprint() of the modules a stage runs.
+- A stage whose key matches its stored entry is skipped and its stored
+  result is returned. Stages that write files also record each output's
+  size and mtime, and run again if an output is missing or was modified.
+- Results must be JSON-serializable. They are stored as JSON in
+  .cache/stages/<pipeline>.<stage>.json. Hits and misses return the
+  same decoded JSON, so callers see the same types either way.
+
+Only the latest entry per stage is kept, like make's targets.
+
+Usage:
+    cache = StageCache('analyze_dog_bites')
+    counts = cache.run('aggregate', fingerprint(classify_key, MAX_YEAR), compute_counts)
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+from dataset_cache import CACHE_DIR
+from instrumentation import stage as timed_stage
+
+# --- Configuration ---
+STAGE_DIR = os.path.join(CACHE_DIR, 'stages')
+STAGE_VERSION = 1
+
+
+def _jsonable(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"cannot fingerprint {type(value).__name__}")
+
+
+def fingerprint(*parts):
+    """Hex SHA-256 of JSON-serializable parts (sets are sorted first)."""
+    blob = json.dumps([STAGE_VERSION, parts], sort_keys=True, default=_jsonable)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+def source_fingerprint(*module_names):
+    """Hex SHA-256 of the named modules' source files."""
+    h = hashlib.sha256()
+    for name in module_names:
+        with open(sys.modules[name].__file__, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def _stat_outputs(paths):
+    stats = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        stats[path] = [st.st_size, st.st_mtime_ns]
+    return stats
+
+
+class StageCache:
+    """Stored stage results for one pipeline."""
+
+    def __init__(self, pipeline, directory=STAGE_DIR, force=False):
+        self.pipeline = pipeline
+        self.directory = directory
+        self.force = force
+        self.hits = []
+        self.misses = []
+
+    def _path(self, stage):
+        return os.path.join(self.directory, f"{self.pipeline}.{stage}.json")
+
+    def _load(self, stage):
+        try:
+            with open(self._path(stage)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, stage, key, result, outputs):
+        os.makedirs(self.directory, exist_ok=True)
+        entry = {'key': key, 'result': result, 'outputs': _stat_outputs(outputs) or {}}
+        tmp_path = self._path(stage) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(stage))
+
+    def lookup(self, stage, key, outputs=()):
+        """The stored entry for `stage` if it has this key and its outputs are untouched, else None."""
+        if self.force:
+            return None
+        entry = self._load(stage)
+        if entry is None or entry['key'] != key:
+            return None
+        if outputs and _stat_outputs(outputs) != entry['outputs']:
+            return None
+        return entry
+
+    def run(self, stage, key, compute, outputs=()):
+        """
+        Return the result of `stage`, running compute() only if it is stale.
+
+        Args:
+            stage (str): Stage name, unique within the pipeline
+            key (str): fingerprint() of everything the result depends on
+            compute (callable): Produces the result (and writes `outputs`)
+            outputs (iterable of str): Files compute() writes
+
+        Returns:
+            The JSON-decoded result.
+        """
+        outputs = list(outputs)
+        with timed_stage(stage) as s:
+            entry = self.lookup(stage, key, outputs)
+            s.note('cached', entry is not None)
+            if entry is not None:
+                self.hits.append(stage)
+                return entry['result']
+            result = json.loads(json.dumps(compute()))
+            self._store(stage, key, result, outputs)
+        self.misses.append(stage)
+        return result
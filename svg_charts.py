@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+SVG Chart Renderer
+
+Dependency-free SVG charts for the analysis scripts: horizontal bar
+charts, rank-frequency (log-log) scatters, line charts and heatmaps.
+
+- Elements are streamed to the output file as they are produced
+  (SvgWriter) instead of being accumulated in one string. A file is
+  written to a .tmp path and moved into place when complete.
+- A chart's layout is its plot geometry, scale positions and the
+  pre-rendered axes and tick labels. It depends only on the chart's shape
+  (bar count, periods, heatmap grid), not on its values. Layouts are
+  built once per shape and cached, so small multiples of the same shape
+  (one chart per borough, year or correction scenario) share them.
+- render_batch() writes many charts in one call, optionally across a
+  process pool. Charts are read lazily from any iterable and submitted in
+  bounded batches, so hundreds of charts render in flat memory.
+
+A chart is a Chart(kind, filename, args, options) tuple. `kind` names a
+draw function in CHARTS, which is called as draw(writer, *args, **options).
+Charts with no data to plot are skipped and no file is written.
+
+Usage:
+    render(Chart('bar', 'top_breeds.svg', (data, "Top 20 Breeds")))
+    render_batch((Chart('line', f"rr_{b}.svg", (periods, [(b, rr[b])], b), {'y_max': 5})
+                  for b in breeds), workers=4)
+"""
+
+import io
+import math
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+
+# --- Configuration ---
+FONT = 'Arial'
+LINE_COLORS = ["#EA4335", "#4285F4", "#FBBC05", "#34A853", "#9C27B0", "#FF7043", "#00ACC1", "#795548"]
+LAYOUT_CACHE_SIZE = 64
+BATCH_CHARTS = 16  # charts per pool task
+
+Chart = namedtuple('Chart', ['kind', 'filename', 'args', 'options'], defaults=(None,))
+
+
+class SvgWriter:
+    """
+    Writes SVG elements to a file as they are produced.
+
+    The file is opened by begin(), so a draw function that returns before
+    calling it writes nothing. With no filename the elements go to a string
+    buffer (see fragment()).
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        self._file = None
+        if filename is None:
+            self._file = io.StringIO()
+            self.write = self._file.write
+
+    def begin(self, width, height):
+        if self.filename is not None:
+            self._file = open(self.filename + '.tmp', 'w')
+            self.write = self._file.write
+        self.write(f'<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">')
+        self.write('<rect width="100%" height="100%" fill="white"/>')
+
+    def close(self, complete=True):
+        """Finish the file and move it into place; returns True if a chart was written."""
+        if self.filename is None or self._file is None:
+            return False
+        if complete:
+            self.write('</svg>')
+        self._file.close()
+        if not complete:
+            os.remove(self.filename + '.tmp')
+            return False
+        os.replace(self.filename + '.tmp', self.filename)
+        return True
+
+    def getvalue(self):
+        return self._file.getvalue()
+
+    def text(self, x, y, content, size, anchor=None, bold=False, transform=None):
+        attrs = f' text-anchor="{anchor}"' if anchor else ''
+        attrs += f' font-family="{FONT}" font-size="{size}"'
+        if bold:
+            attrs += ' font-weight="bold"'
+        if transform:
+            attrs += f' transform="{transform}"'
+        self.write(f'<text x="{x}" y="{y}"{attrs}>{content}</text>')
+
+    def rect(self, x, y, width, height, fill, stroke=None):
+        stroke = f' stroke="{stroke}"' if stroke else ''
+        self.write(f'<rect x="{x}" y="{y}" width="{width}" height="{height}" fill="{fill}"{stroke}/>')
+
+    def line(self, x1, y1, x2, y2, stroke='black', width=None, dash=None):
+        attrs = f' stroke-width="{width}"' if width else ''
+        if dash:
+            attrs += f' stroke-dasharray="{dash}"'
+        self.write(f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="{stroke}"{attrs}/>')
+
+    def circle(self, cx, cy, r, fill, opacity=None):
+        opacity = f' opacity="{opacity}"' if opacity else ''
+        self.write(f'<circle cx="{cx}" cy="{cy}" r="{r}" fill="{fill}"{opacity}/>')
+
+    def polyline(self, points, stroke, width):
+        self.write(f'<polyline points="{points}" fill="none" stroke="{stroke}" stroke-width="{width}"/>')
+
+
+def fragment(draw):
+    """Render draw(writer) once to a string, for reuse across charts."""
+    writer = SvgWriter()
+    draw(writer)
+    return writer.getvalue()
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def layout(cls, *shape):
+    """The layout for a chart shape, built once per process."""
+    return cls(*shape)
+
+
+# --- Bar chart ---
+
+class BarLayout:
+    """Row positions for an n-bar horizontal bar chart."""
+
+    width = 800
+    height = 500
+    margin_left = 150
+    margin_bottom = 50
+    margin_top = 50
+    margin_right = 20
+
+    def __init__(self, n):
+        self.chart_width = self.width - self.margin_left - self.margin_right
+        chart_height = self.height - self.margin_top - self.margin_bottom
+        self.bar_height = chart_height / n * 0.8
+        gap = chart_height / n * 0.2
+        # (bar top, text baseline) per row
+        self.rows = []
+        for i in range(n):
+            y = self.margin_top + i * (self.bar_height + gap)
+            self.rows.append((y, y + self.bar_height / 2 + 5))
+
+
+def draw_bar(w, data, title):
+    """Horizontal bars for a list of (label, value), largest first."""
+    if not data:
+        return
+    lay = layout(BarLayout, len(data))
+    max_val = data[0][1]
+
+    w.begin(lay.width, lay.height)
+    w.text(lay.width / 2, lay.margin_top / 2, title, 20, anchor='middle', bold=True)
+    for (label, value), (y, text_y) in zip(data, lay.rows):
+        bar_w = (value / max_val) * lay.chart_width
+        w.rect(lay.margin_left, y, bar_w, lay.bar_height, "#4285F4")
+        w.text(lay.margin_left - 10, text_y, label, 12, anchor='end')
+        w.text(lay.margin_left + bar_w + 5, text_y, value, 12)
+
+
+# --- Rank-frequency (log-log) scatter ---
+
+class LogLogLayout:
+    """Axes and log-rank x positions for an n-point rank-frequency plot."""
+
+    width = 600
+    height = 600
+    margin = 60
+
+    def __init__(self, n):
+        margin, width, height = self.margin, self.width, self.height
+        chart_w = width - 2 * margin
+        self.chart_h = height - 2 * margin
+        min_x, max_x = math.log10(1), math.log10(n)
+        self.xs = [margin + (math.log10(r) - min_x) / (max_x - min_x) * chart_w if max_x > min_x else margin
+                   for r in range(1, n + 1)]
+
+        def axes(w):
+            w.line(margin, height - margin, width - margin, height - margin)  # X
+            w.line(margin, height - margin, margin, margin)  # Y
+        self.axes = fragment(axes)
+
+
+def draw_log_log(w, values, title, y_range=None):
+    """
+    Values against their rank (1 = first), both on log scales.
+
+    y_range (min value, max value) fixes the y scale, e.g. to share it
+    across small multiples; by default it spans `values`.
+    """
+    if not values:
+        return
+    lay = layout(LogLogLayout, len(values))
+    lo, hi = y_range or (min(values), max(values))
+    min_y, max_y = math.log10(lo), math.log10(hi)
+    bottom = lay.height - lay.margin
+
+    w.begin(lay.width, lay.height)
+    w.text(lay.width / 2, lay.margin / 2, title, 20, anchor='middle', bold=True)
+    w.write(lay.axes)
+    for px, v in zip(lay.xs, values):
+        py = bottom - (math.log10(v) - min_y) / (max_y - min_y) * lay.chart_h if max_y > min_y else bottom
+        w.circle(px, py, 3, "#EA4335", opacity=0.6)
+
+
+# --- Line chart ---
+
+class LineLayout:
+    """Axes, ticks and x positions for a line chart over `periods` with y from 0 to y_max."""
+
+    width = 900
+    height = 500
+    margin_left = 60
+    margin_right = 180
+    margin_top = 50
+    margin_bottom = 60
+
+    def __init__(self, periods, y_max):
+        width, height = self.width, self.height
+        margin_left, margin_right, margin_bottom = self.margin_left, self.margin_right, self.margin_bottom
+        chart_w = width - margin_left - margin_right
+        self.chart_h = height - self.margin_top - margin_bottom
+        self.y_max = y_max
+        step = chart_w / max(len(periods) - 1, 1)
+        self.x_text = [f"{margin_left + i * step:.1f}" for i in range(len(periods))]
+
+        def axes(w):
+            # Axes, y ticks and the RR = 1 reference line
+            w.line(margin_left, height - margin_bottom, width - margin_right, height - margin_bottom)
+            w.line(margin_left, height - margin_bottom, margin_left, self.margin_top)
+            for k in range(6):
+                v = y_max * k / 5
+                w.text(margin_left - 6, self.y(v) + 4, f"{v:.1f}", 11, anchor='end')
+            w.line(margin_left, self.y(1), width - margin_right, self.y(1), stroke="#999999", dash="4,4")
+
+            # X labels, thinned to about 12
+            every = max(1, round(len(periods) / 12))
+            for i in range(0, len(periods), every):
+                w.text(margin_left + i * step, height - margin_bottom + 18, periods[i], 11, anchor='middle')
+        self.axes = fragment(axes)
+
+    def y(self, v):
+        return self.height - self.margin_bottom - v / self.y_max * self.chart_h
+
+
+def draw_line(w, periods, lines, title, y_max=None, colors=LINE_COLORS):
+    """
+    One line per (label, [value or None per period]), broken where a value is None.
+
+    y_max fixes the top of the y axis, e.g. to share it across small
+    multiples; by default it is 10% above the largest value (at least 1).
+    """
+    values = [v for _, vs in lines for v in vs if v is not None]
+    if not values:
+        return
+    if y_max is None:
+        y_max = max(max(values), 1) * 1.1
+    lay = layout(LineLayout, tuple(periods), y_max)
+    legend_x = lay.width - lay.margin_right
+
+    w.begin(lay.width, lay.height)
+    w.text((lay.margin_left + legend_x) / 2, lay.margin_top / 2, title, 18, anchor='middle', bold=True)
+    w.write(lay.axes)
+    for n, (label, vs) in enumerate(lines):
+        color = colors[n % len(colors)]
+        segment = []
+        for x, v in zip(lay.x_text + [None], list(vs) + [None]):
+            if v is not None:
+                segment.append(f"{x},{lay.y(v):.1f}")
+                continue
+            if len(segment) > 1:
+                w.polyline(" ".join(segment), color, 2)
+            elif segment:
+                cx, cy = segment[0].split(',')
+                w.circle(cx, cy, 3, color)
+            segment = []
+        ly = lay.margin_top + 10 + n * 20
+        w.line(legend_x + 15, ly, legend_x + 35, ly, stroke=color, width=2)
+        w.text(legend_x + 40, ly + 4, label, 12)
+
+
+# --- Heatmap ---
+
+class HeatmapLayout:
+    """Cell grid and axis labels for a heatmap over xs (columns) by ys (rows, highest on top)."""
+
+    cell_w = 48
+    cell_h = 28
+    margin_left = 90
+    margin_top = 60
+    margin_bottom = 60
+
+    def __init__(self, xs, ys, x_param, y_param):
+        cell_w, cell_h, margin_left, margin_top = self.cell_w, self.cell_h, self.margin_left, self.margin_top
+        self.width = margin_left + cell_w * len(xs) + 20
+        self.height = margin_top + cell_h * len(ys) + self.margin_bottom
+        self.columns = [(xv, margin_left + i * cell_w) for i, xv in enumerate(xs)]
+        # (y value, cell top, pre-rendered row label) from the top row down
+        self.rows = []
+        for j, yv in enumerate(reversed(ys)):
+            y = margin_top + j * cell_h
+            label = fragment(lambda w: w.text(margin_left - 6, y + cell_h / 2 + 4, f"{yv:g}", 11, anchor='end'))
+            self.rows.append((yv, y, label))
+
+        def x_axis(w):
+            bottom = margin_top + cell_h * len(ys)
+            for i, xv in enumerate(xs):
+                w.text(margin_left + i * cell_w + cell_w / 2, bottom + 16, f"{xv:g}", 11, anchor='middle')
+            w.text(margin_left + cell_w * len(xs) / 2, bottom + 40, x_param, 12, anchor='middle')
+            mid = margin_top + cell_h * len(ys) / 2
+            w.text(14, mid, y_param, 12, anchor='middle', transform=f"rotate(-90 14 {mid})")
+        self.x_axis = fragment(x_axis)
+
+
+def draw_heatmap(w, rows, x_param, y_param, value, title, higher_is_hotter=True, value_range=None):
+    """
+    Heatmap of rows[value] over two parameters (rows are dicts).
+
+    value_range (lo, hi) fixes the color scale, e.g. to share it across
+    small multiples; by default it spans the values present.
+    """
+    xs = tuple(sorted({r[x_param] for r in rows}))
+    ys = tuple(sorted({r[y_param] for r in rows}))
+    cells = {(r[x_param], r[y_param]): r[value] for r in rows}
+    present = [v for v in cells.values() if v is not None]
+    if not present:
+        return
+    lo, hi = value_range or (min(present), max(present))
+    lay = layout(HeatmapLayout, xs, ys, x_param, y_param)
+    cell_w, cell_h = lay.cell_w, lay.cell_h
+
+    w.begin(lay.width, lay.height)
+    w.text(lay.width / 2, lay.margin_top / 2, title, 16, anchor='middle', bold=True)
+    for yv, y, row_label in lay.rows:
+        w.write(row_label)
+        for xv, x in lay.columns:
+            v = cells.get((xv, yv))
+            if v is None:
+                fill, label = "#eeeeee", ""
+            else:
+                t = (v - lo) / (hi - lo) if hi > lo else 0.5
+                if not higher_is_hotter:
+                    t = 1 - t
+                fill = f"rgb(255,{int(255 - 180 * t)},{int(255 - 200 * t)})"
+                label = f"{v:.2f}" if isinstance(v, float) else str(v)
+            w.rect(x, y, cell_w, cell_h, fill, stroke="white")
+            w.text(x + cell_w / 2, y + cell_h / 2 + 4, label, 10, anchor='middle')
+    w.write(lay.x_axis)
+
+
+CHARTS = {
+    'bar': draw_bar,
+    'log_log': draw_log_log,
+    'line': draw_line,
+    'heatmap': draw_heatmap,
+}
+
+
+# --- Rendering ---
+
+def render(chart):
+    """Write one Chart; returns True if a file was written (False if it had no data)."""
+    writer = SvgWriter(chart.filename)
+    try:
+        CHARTS[chart.kind](writer, *chart.args, **(chart.options or {}))
+    except BaseException:
+        writer.close(complete=False)
+        raise
+    return writer.close()
+
+
+def _render_many(charts):
+    return [chart.filename for chart in charts if render(chart)]
+
+
+def render_batch(charts, workers=1, batch_size=BATCH_CHARTS):
+    """
+    Render many charts, e.g. small multiples, in one call.
+
+    Args:
+        charts (iterable of Chart): Consumed lazily; a generator keeps memory flat
+        workers (int or None): 1 renders in this process; otherwise the
+            process pool size (None: all cores)
+        batch_size (int): Charts per pool task
+
+    Returns:
+        list of str: Filenames written, in input order
+    """
+    charts = iter(charts)
+    if workers == 1:
+        return _render_many(charts)
+
+    written = []
+    max_pending = 2 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        while True:
+            batch = list(islice(charts, batch_size))
+            if batch:
+                pending.append(pool.submit(_render_many, batch))
+            if pending and (not batch or len(pending) >= max_pending):
+                written.extend(pending.popleft().result())
+            elif not batch:
+                break
+    return written
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Correction Scenario Sweep
+
+redistribute_bites.py evaluates one scenario: OVERCOUNT_FACTOR = 2.5,
+2x/4x population under-count, and fixed date windows. This script takes a
+range for each of those parameters and evaluates the full Cartesian grid
+across a process pool.
+
+Both snapshots are ingested once and reduced to small count cubes:
+bites by (year, breed) and licenses by (issued year, month, breed). Each
+grid point then sums a slice of the cubes instead of re-reading any data,
+so thousands of points take seconds to minutes.
+
+Outputs:
+- sweep_results.csv: one tidy row per grid point
+- sweep_rr_heatmap.svg / sweep_rank_heatmap.svg: corrected Pit Bull RR
+  and rank over two chosen parameters. The other parameters are held at
+  the grid value closest to redistribute_bites' defaults.
+- with --facet PARAM, sweep_heatmaps/rr_PARAM_<value>.svg: the RR
+  heatmap repeated for every value of a third parameter, as small
+  multiples on one color scale, rendered in one batch across --workers.
+
+Ranges are written as START:STOP:STEP (inclusive), a comma list, or a
+single value, for example:
+    python3 sweep_corrections.py --overcount-factor 1:4:0.25 --under-reg 1,2,3,4 \\
+        --max-bite-year 2019:2023:1 --workers 8
+"""
+
+import argparse
+import csv
+import itertools
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import redistribute_bites as rb
+import vector_engine
+from dataset_cache import BAD_DATE, NO_DATE, load_bites, load_licenses
+from svg_charts import Chart, render, render_batch
+
+# --- Configuration ---
+OUTPUT_CSV = "sweep_results.csv"
+RR_HEATMAP = "sweep_rr_heatmap.svg"
+RANK_HEATMAP = "sweep_rank_heatmap.svg"
+FACET_DIR = "sweep_heatmaps"
+
+# Parameter name -> (type, default range)
+PARAMETERS = {
+    'overcount_factor': (float, "1:4:0.25"),
+    'under_reg': (float, "1:4:0.5"),
+    'min_bite_year': (int, str(rb.MIN_BITE_YEAR)),
+    'max_bite_year': (int, str(rb.MAX_BITE_YEAR)),
+    'min_license_year': (int, str(rb.MIN_LICENSE_YEAR)),
+    'min_license_month': (int, str(rb.MIN_LICENSE_MONTH)),
+    'max_license_year': (int, str(rb.MAX_LICENSE_YEAR)),
+    'max_license_month': (int, str(rb.MAX_LICENSE_MONTH)),
+}
+
+# Value each parameter is held at when it is not a heatmap axis
+DEFAULTS = {
+    'overcount_factor': rb.OVERCOUNT_FACTOR,
+    'under_reg': 2.0,
+    'min_bite_year': rb.MIN_BITE_YEAR,
+    'max_bite_year': rb.MAX_BITE_YEAR,
+    'min_license_year': rb.MIN_LICENSE_YEAR,
+    'min_license_month': rb.MIN_LICENSE_MONTH,
+    'max_license_year': rb.MAX_LICENSE_YEAR,
+    'max_license_month': rb.MAX_LICENSE_MONTH,
+}
+
+RESULT_COLUMNS = [
+    'pit_bull_rr', 'pit_bull_rank',
+    'corrected_rr', 'corrected_rank',
+    'final_rr', 'final_rank',
+]
+
+
+def parse_range(spec, kind):
+    """Parse START:STOP:STEP (inclusive), a comma list, or a single value."""
+    if ':' in spec:
+        start, stop, step = (kind(p) for p in spec.split(':'))
+        if step <= 0:
+            raise ValueError(f"Step must be positive: {spec}")
+        count = int(round((stop - start) / step)) + 1
+        return [kind(round(start + i * step, 10)) for i in range(max(count, 0))]
+    return [kind(p) for p in spec.split(',')]
+
+
+class SweepData:
+    """Bite and license counts pre-reduced to (year[, month], breed) cubes."""
+
+    def __init__(self, bite_table, license_table):
+        # Bites: year bucket x breed label, plus Unknown bites per year bucket
+        lookup, self.bite_labels = vector_engine.encode_labels(bite_table.breeds, rb.normalize_breed_for_bite)
+        unknown = np.array([rb.is_unknown_bite(b) for b in bite_table.breeds], dtype=bool)
+        year = vector_engine.column(bite_table, 'year')
+        codes = vector_engine.column(bite_table, 'breed')
+        keep = year != BAD_DATE
+        self.bite_years, year_idx = np.unique(year[keep], return_inverse=True)
+        labels = lookup[codes[keep]]
+        has_label = labels >= 0
+        self.bite_cube = np.zeros((len(self.bite_years), len(self.bite_labels)), dtype=np.int64)
+        np.add.at(self.bite_cube, (year_idx[has_label], labels[has_label]), 1)
+        self.unknown_by_year = np.bincount(year_idx, weights=unknown[codes[keep]], minlength=len(self.bite_years))
+
+        # Licenses: issued year bucket x month x breed label
+        lookup, self.license_labels = vector_engine.encode_labels(license_table.breeds, rb.normalize_breed_for_license)
+        year = vector_engine.column(license_table, 'issued_year')
+        month = vector_engine.column(license_table, 'issued_month').astype(np.int64)
+        codes = vector_engine.column(license_table, 'breed')
+        labels = lookup[codes]
+        keep = (year != BAD_DATE) & (labels >= 0)
+        self.license_years, year_idx = np.unique(year[keep], return_inverse=True)
+        self.license_months = int(month[keep].max()) + 1 if keep.any() else 13
+        self.license_cube = np.zeros((len(self.license_years), self.license_months, len(self.license_labels)),
+                                     dtype=np.int64)
+        np.add.at(self.license_cube, (year_idx, month[keep], labels[keep]), 1)
+
+    def counts(self, point):
+        """Bite counts, Unknown bites and license counts for one grid point."""
+        years = self.bite_years
+        in_window = (years == NO_DATE) | ((years >= point['min_bite_year']) & (years <= point['max_bite_year']))
+        bite_vec = self.bite_cube[in_window].sum(axis=0)
+        unknown = int(self.unknown_by_year[in_window].sum())
+
+        y = self.license_years[:, None]
+        m = np.arange(self.license_months)[None, :]
+        after_start = (y > point['min_license_year']) | ((y == point['min_license_year']) & (m >= point['min_license_month']))
+        before_end = (y < point['max_license_year']) | ((y == point['max_license_year']) & (m <= point['max_license_month']))
+        in_window = (y == NO_DATE) | (after_start & before_end)
+        license_vec = self.license_cube[in_window].sum(axis=0)
+
+        bite_counts = Counter({b: int(n) for b, n in zip(self.bite_labels, bite_vec) if n})
+        license_counts = Counter({b: int(n) for b, n in zip(self.license_labels, license_vec) if n})
+        return bite_counts, unknown, license_counts
+
+
+def evaluate(data, point):
+    """Run the redistribute_bites correction for one grid point."""
+    bite_counts, unknown_bites, license_counts = data.counts(point)
+    maltese_bites = bite_counts.get('Maltese', 0)
+    maltese_licenses = license_counts.get('Maltese', 0)
+    maltese_risk = maltese_bites / maltese_licenses if maltese_licenses > 0 else 0
+
+    original_risks = rb.risk_table(bite_counts, license_counts, maltese_risk)
+    corrected_bites, _ = rb.redistribute_misattributed(bite_counts, unknown_bites, point['overcount_factor'])
+    corrected_risks = rb.risk_table(corrected_bites, license_counts, maltese_risk)
+
+    corrected_rr = corrected_risks.get('Pit Bull', {}).get('rr', 0)
+    final_rr = corrected_rr / point['under_reg']
+    final_rank = None
+    if 'Pit Bull' in corrected_risks:
+        final_rank = 1 + sum(1 for b, d in corrected_risks.items() if b != 'Pit Bull' and d['rr'] > final_rr)
+
+    return {
+        'pit_bull_rr': original_risks.get('Pit Bull', {}).get('rr', 0),
+        'pit_bull_rank': rb.rank_of(original_risks, 'Pit Bull'),
+        'corrected_rr': corrected_rr,
+        'corrected_rank': rb.rank_of(corrected_risks, 'Pit Bull'),
+        'final_rr': final_rr,
+        'final_rank': final_rank,
+    }
+
+
+_WORKER_DATA = None
+
+
+def _init_worker(data):
+    global _WORKER_DATA
+    _WORKER_DATA = data
+
+
+def _evaluate_chunk(points):
+    return [evaluate(_WORKER_DATA, p) for p in points]
+
+
+def run_sweep(data, grid, workers=None, chunk_size=64):
+    """Evaluate every grid point (list of dicts) across a process pool."""
+    chunks = [grid[i:i + chunk_size] for i in range(0, len(grid), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data,)) as pool:
+        results = [r for chunk in pool.map(_evaluate_chunk, chunks) for r in chunk]
+    return [{**point, **result} for point, result in zip(grid, results)]
+
+
+def build_grid(ranges):
+    """Cartesian product of parameter ranges, skipping empty date windows."""
+    names = list(ranges)
+    grid = []
+    for values in itertools.product(*(ranges[n] for n in names)):
+        point = dict(zip(names, values))
+        if point['min_bite_year'] > point['max_bite_year']:
+            continue
+        if (point['min_license_year'], point['min_license_month']) > (point['max_license_year'], point['max_license_month']):
+            continue
+        grid.append(point)
+    return grid
+
+
+def create_heatmap_svg(rows, x_param, y_param, value, filename, title, higher_is_hotter=True):
+    # rows are sweep results already restricted to one (x, y) slice
+    render(Chart('heatmap', filename, (rows, x_param, y_param, value, title), {'higher_is_hotter': higher_is_hotter}))
+
+
+def heatmap_slice(results, ranges, x_param, y_param, facet=None):
+    """Rows varying only x_param and y_param (and facet, if given); others held nearest their default."""
+    held = {}
+    for name, values in ranges.items():
+        if name not in (x_param, y_param, facet):
+            held[name] = min(values, key=lambda v: abs(v - DEFAULTS[name]))
+    return [r for r in results if all(r[n] == v for n, v in held.items())]
+
+
+def write_facets(rows, ranges, x_param, y_param, facet, directory=FACET_DIR, workers=None):
+    """One RR heatmap per value of `facet`, on a shared color scale. Returns the filenames written."""
+    by_value = defaultdict(list)
+    for r in rows:
+        by_value[r[facet]].append(r)
+    present = [r['final_rr'] for r in rows if r['final_rr'] is not None]
+    if not present:
+        return []
+    os.makedirs(directory, exist_ok=True)
+    charts = (Chart('heatmap', os.path.join(directory, f"rr_{facet}_{v:g}.svg"),
+                    (by_value[v], x_param, y_param, 'final_rr', f"Corrected Pit Bull RR, {facet} = {v:g}"),
+                    {'value_range': (min(present), max(present))})
+              for v in ranges[facet] if by_value[v])
+    return render_batch(charts, workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep redistribute_bites correction parameters over a grid.")
+    for name, (kind, default) in PARAMETERS.items():
+        parser.add_argument('--' + name.replace('_', '-'), default=default, help=f"range (default: {default})")
+    parser.add_argument('--workers', type=int, default=None, help="default: all cores")
+    parser.add_argument('--x', default='overcount_factor', choices=list(PARAMETERS), help="heatmap x axis")
+    parser.add_argument('--y', default='under_reg', choices=list(PARAMETERS), help="heatmap y axis")
+    parser.add_argument('--facet', default=None, choices=list(PARAMETERS),
+                        help=f"also write one RR heatmap per value of this parameter into {FACET_DIR}/")
+    parser.add_argument('--output', default=OUTPUT_CSV)
+    args = parser.parse_args()
+
+    try:
+        ranges = {name: parse_range(getattr(args, name), kind) for name, (kind, _) in PARAMETERS.items()}
+    except ValueError as e:
+        parser.error(str(e))
+    if args.facet in (args.x, args.y):
+        parser.error("--facet must differ from --x and --y")
+    grid = build_grid(ranges)
+
+    print("=" * 70)
+    print(f"CORRECTION SWEEP: {len(grid)} grid points")
+    print("=" * 70)
+    for name, values in ranges.items():
+        print(f"  {name}: {values[0]:g} .. {values[-1]:g} ({len(values)} values)")
+
+    data = SweepData(load_bites(rb.BITE_CSV), load_licenses(rb.LICENSE_CSV))
+    results = run_sweep(data, grid, args.workers)
+
+    with open(args.output, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(PARAMETERS) + RESULT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(results)
+    print(f"\nWrote {len(results)} rows to {args.output}")
+
+    rows = heatmap_slice(results, ranges, args.x, args.y)
+    create_heatmap_svg(rows, args.x, args.y, 'final_rr', RR_HEATMAP, "Corrected Pit Bull RR (vs Maltese)")
+    create_heatmap_svg(rows, args.x, args.y, 'final_rank', RANK_HEATMAP, "Corrected Pit Bull Rank",
+                       higher_is_hotter=False)
+    print(f"Wrote {RR_HEATMAP} and {RANK_HEATMAP}")
+
+    if args.facet:
+        written = write_facets(heatmap_slice(results, ranges, args.x, args.y, args.facet),
+                               ranges, args.x, args.y, args.facet, workers=args.workers)
+        print(f"Wrote {len(written)} {args.facet} heatmaps to {FACET_DIR}/")
+
+
+if __name__ == "__main__":
+    main()
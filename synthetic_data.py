@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Synthetic NYC Dataset Generator
+
+Writes bite and license CSVs with the same schema, file names and value
+formats as the NYC Open Data snapshots. Performance work can then be done
+without the real files, at any scale.
+
+- Scale 1 is roughly the size of the 2026-01-03 snapshots (BASE_BITES and
+  BASE_LICENSES rows). Scales 10 and 100 multiply both.
+- Breed strings follow a realistic long-tailed mix: the spellings Cremieux
+  counted as Pit Bull / Maltese, common misspellings (SCHIPPERKEE, SHEPERD),
+  "Mix" / "Crossbreed" / "X" variants, generic mixes and unknowns, in
+  inconsistent case. Bites and licenses have different breed weights.
+- A small share of dates is blank or malformed, so the scripts' skip
+  paths are exercised too.
+
+Output is deterministic for a given --seed and scale and is written in
+batches, so memory use does not grow with scale.
+
+Usage:
+    python3 synthetic_data.py --scale 10 --out synthetic_10x
+"""
+
+import argparse
+import calendar
+import csv
+import gzip
+import os
+import random
+from datetime import date, timedelta
+
+from dataset_cache import BITE_CSV, LICENSE_CSV
+
+# --- Configuration ---
+BASE_BITES = 35_000
+BASE_LICENSES = 650_000
+BATCH_ROWS = 50_000
+
+BITE_YEARS = (2015, 2024)
+LICENSE_YEARS = (2014, 2025)
+MISSING_DATE_RATE = 0.002
+BAD_DATE_RATE = 0.001
+
+# (breed string, bite weight, license weight)
+BREEDS = [
+    ("Pit Bull", 120, 20), ("PIT BULL", 40, 6), ("Pit Bull Mix", 35, 10), ("PIT BULL MIX", 15, 3),
+    ("American Pit Bull Terrier", 20, 12), ("American Pit Bull Mix / Pit Bull Mix", 12, 8),
+    ("American Staffordshire Terrier", 10, 6), ("Staffordshire Bull Terrier", 6, 4), ("Pit Bull Crossbreed", 4, 2),
+    ("Maltese", 8, 20), ("MALTESE", 2, 2), ("Maltese Crossbreed", 2, 4), ("Maltese Mix", 1, 3), ("Maltipoo", 3, 10),
+    ("Shih Tzu", 22, 45), ("SHIH TZU", 5, 3), ("Shih Tzu Crossbreed", 4, 8),
+    ("Yorkshire Terrier", 14, 40), ("Yorkie", 4, 2), ("Chihuahua", 20, 35), ("CHIHUAHUA MIX", 4, 3),
+    ("German Shepherd", 25, 14), ("German Shepherd Dog", 10, 6), ("SHEPERD MIX", 4, 1), ("Shepherd X", 3, 1),
+    ("Labrador Retriever", 18, 30), ("Labrador Retriever Crossbreed", 6, 10), ("Lab Mix", 6, 3),
+    ("Golden Retriever", 6, 15), ("Poodle", 5, 8), ("Poodle, Standard", 2, 5), ("Poodle, Toy", 2, 6),
+    ("Rottweiler", 14, 5), ("Rottweiler Mix", 3, 1), ("Boxer", 8, 5), ("Bulldog", 6, 8), ("French Bulldog", 6, 14),
+    ("American Bulldog", 6, 3), ("Bull Terrier", 2, 1), ("Mastiff", 4, 2), ("Cane Corso", 5, 3),
+    ("Siberian Husky", 9, 6), ("Husky Mix", 3, 1), ("Akita", 4, 1), ("Chow Chow", 4, 2),
+    ("Beagle", 7, 12), ("Dachshund", 5, 10), ("Dachshund Smooth Coat", 1, 3), ("Jack Russell Terrier", 5, 7),
+    ("Cocker Spaniel", 4, 5), ("Pomeranian", 4, 12), ("Havanese", 3, 10), ("Schnauzer, Miniature", 3, 6),
+    ("Doberman Pinscher", 3, 2), ("Great Dane", 2, 1), ("Belgian Malinois", 3, 1), ("Weimaraner", 1, 1),
+    ("Vizsla", 1, 1), ("Rhodesian Ridgeback", 1, 1), ("Pointer", 1, 1), ("American Bully", 3, 2),
+    ("Schipperke", 1, 1), ("SCHIPPERKEE", 1, 0), ("Pharaoh Hound", 1, 0), ("Afghan Hound Crossbreed", 1, 1),
+    ("Terrier Crossbreed", 4, 6), ("TERRIER MIX", 4, 2), ("Mixed/Other", 25, 30), ("Mixed", 10, 2),
+    ("MIXED BREED", 6, 1), ("Large Mixed Breed", 3, 0), ("Unknown", 60, 15), ("UNKNOWN", 20, 2), ("", 10, 3),
+]
+
+BOROUGHS = [("Brooklyn", 28), ("Queens", 26), ("Manhattan", 20), ("Bronx", 18), ("Staten Island", 6), ("Other", 2)]
+BOROUGH_ZIPS = {
+    "Brooklyn": [f"112{n:02d}" for n in range(1, 40)],
+    "Queens": [f"11{p}{n:02d}" for p in (3, 4) for n in range(1, 36)],
+    "Manhattan": [f"100{n:02d}" for n in range(1, 41)],
+    "Bronx": [f"104{n:02d}" for n in range(51, 76)],
+    "Staten Island": [f"103{n:02d}" for n in range(1, 15)],
+    "Other": ["07030", "10701", ""],
+}
+DOG_NAMES = ["MAX", "BELLA", "ROCKY", "LUNA", "COCO", "LOLA", "CHARLIE", "BUDDY", "DAISY", "LUCY",
+             "TEDDY", "MILO", "PRINCESS", "OREO", "TOBY", "NAME NOT PROVIDED", "UNKNOWN"]
+
+
+def _date_pool(first_year, last_year, fmt):
+    day, end = date(first_year, 1, 1), date(last_year, 12, 31)
+    pool = []
+    while day <= end:
+        pool.append(day)
+        day += timedelta(days=1)
+    return pool, [fmt(d) for d in pool]
+
+
+def _bite_date(d):
+    return f"{calendar.month_name[d.month]} {d.day:02d}, {d.year}"
+
+
+def _license_date(d):
+    return f"{d.month:02d}/{d.day:02d}/{d.year}"
+
+
+def _open(path, compress):
+    if compress:
+        return gzip.open(path + '.gz', 'wt', newline='', encoding='utf-8')
+    return open(path, 'w', newline='', encoding='utf-8')
+
+
+def write_bites(path, n, rng, compress=False):
+    breeds = [b for b, _, _ in BREEDS]
+    weights = [w for _, w, _ in BREEDS]
+    boroughs = [b for b, _ in BOROUGHS]
+    borough_weights = [w for _, w in BOROUGHS]
+    _, dates = _date_pool(*BITE_YEARS, _bite_date)
+
+    with _open(path, compress) as f:
+        writer = csv.writer(f)
+        writer.writerow(["UniqueID", "DateOfBite", "Species", "Breed", "Age", "Gender", "SpayNeuter", "Borough",
+                         "ZipCode"])
+        for start in range(0, n, BATCH_ROWS):
+            k = min(BATCH_ROWS, n - start)
+            rows = []
+            for i, breed, borough, when in zip(range(start + 1, start + k + 1), rng.choices(breeds, weights, k=k),
+                                               rng.choices(boroughs, borough_weights, k=k), rng.choices(dates, k=k)):
+                r = rng.random()
+                if r < MISSING_DATE_RATE:
+                    when = ""
+                elif r < MISSING_DATE_RATE + BAD_DATE_RATE:
+                    when = "Unknown, 20XX"
+                age = "" if rng.random() < 0.3 else str(rng.randint(1, 15))
+                rows.append([i, when, "DOG", breed, age, rng.choice("MFMFU"), rng.choice(("true", "false")),
+                             borough, rng.choice(BOROUGH_ZIPS[borough])])
+            writer.writerows(rows)
+
+
+def write_licenses(path, n, rng, compress=False):
+    breeds = [b for b, _, _ in BREEDS]
+    weights = [w for _, _, w in BREEDS]
+    boroughs = [b for b, _ in BOROUGHS[:-1]]
+    borough_weights = [w for _, w in BOROUGHS[:-1]]
+    days, dates = _date_pool(*LICENSE_YEARS, _license_date)
+    index = list(range(len(dates)))
+
+    with _open(path, compress) as f:
+        writer = csv.writer(f)
+        writer.writerow(["AnimalName", "AnimalGender", "AnimalBirthYear", "BreedName", "ZipCode",
+                         "LicenseIssuedDate", "LicenseExpiredDate", "Extract Year"])
+        for start in range(0, n, BATCH_ROWS):
+            k = min(BATCH_ROWS, n - start)
+            rows = []
+            for breed, borough, i in zip(rng.choices(breeds, weights, k=k),
+                                         rng.choices(boroughs, borough_weights, k=k), rng.choices(index, k=k)):
+                issued = days[i]
+                # Licenses run 1-5 years; renewals are separate rows, like the real file
+                expired = issued + timedelta(days=365 * rng.randint(1, 5))
+                issued_str = dates[i]
+                if rng.random() < MISSING_DATE_RATE:
+                    issued_str = ""
+                rows.append([rng.choice(DOG_NAMES), rng.choice("MF"), rng.randint(issued.year - 15, issued.year),
+                             breed, rng.choice(BOROUGH_ZIPS[borough]), issued_str, _license_date(expired),
+                             rng.choice((2016, 2018, 2023))])
+            writer.writerows(rows)
+
+
+def generate(out_dir, scale=1, seed=0, compress=False):
+    """Write a synthetic bite/license snapshot pair into out_dir. Returns (bite rows, license rows)."""
+    os.makedirs(out_dir, exist_ok=True)
+    n_bites, n_licenses = int(BASE_BITES * scale), int(BASE_LICENSES * scale)
+    rng = random.Random(seed)
+    write_bites(os.path.join(out_dir, BITE_CSV), n_bites, rng, compress)
+    write_licenses(os.path.join(out_dir, LICENSE_CSV), n_licenses, rng, compress)
+    return n_bites, n_licenses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic NYC bite and license snapshots.")
+    parser.add_argument('--scale', type=float, default=1, help="1 = real snapshot size; e.g. 10, 100")
+    parser.add_argument('--out', default=None, help="output directory (default: synthetic_<scale>x)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--gzip', action='store_true', help="write .csv.gz files")
+    args = parser.parse_args()
+
+    out_dir = args.out or f"synthetic_{args.scale:g}x"
+    n_bites, n_licenses = generate(out_dir, args.scale, args.seed, args.gzip)
+    print(f"Wrote {n_bites:,} bites and {n_licenses:,} licenses to {out_dir}/")
+
+
+if __name__ == "__main__":
+    main()
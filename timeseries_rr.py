@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Relative Risk Time Series
+
+The other scripts report one RR per breed for one fixed window (bites
+through 2022 against licenses active in 2022, or a Sept 2014 - Nov 2023
+window). This script computes per-breed bites, licensed population and RR
+versus Maltese for every year and every month in the data. It makes one
+pass over each table.
+
+- Bites are counted by the year and month of DateOfBite. Undated bites
+  cannot be placed in a period and are reported separately.
+- The population for a period is the number of licenses active at any
+  point in it: issued on or before its end and expiring on or after its
+  start. The yearly definition matches analyze_dog_bites.py's
+  TARGET_POP_YEAR rule. Each license adds +1/-1 to per-breed difference
+  arrays, so every period is filled from one pass.
+
+Outputs:
+- a compact breed x year RR table on stdout
+- rr_timeseries.csv: every (granularity, period, breed) row
+- rr_timeseries.svg: a line chart of RR over time for selected breeds
+
+With --multiples DIR, every breed in the table also gets its own chart
+(small multiples on a shared y scale), rendered in one batch.
+
+Usage:
+    python3 timeseries_rr.py --years 2015:2022 --breeds "Pit Bull,German Shepherd"
+    python3 timeseries_rr.py --chart month --top 40 --multiples rr_by_breed --workers 4
+"""
+
+import argparse
+import csv
+import os
+import re
+from collections import Counter, defaultdict
+from itertools import accumulate
+
+from dataset_cache import BITE_CSV, LICENSE_CSV, load_bites, load_licenses
+from license_intervals import breed_classifiers
+from svg_charts import Chart, render, render_batch
+
+# --- Configuration ---
+BASELINE = 'Maltese'
+MIN_LICENSES = 100
+OUTPUT_CSV = "rr_timeseries.csv"
+OUTPUT_SVG = "rr_timeseries.svg"
+
+
+class TimeSeries:
+    """Per-breed bite and population counts by year and by month.
+
+    Every series is a list indexed by period: years[i] for yearly series,
+    months[i] = (year, month) for monthly series.
+    """
+
+    def __init__(self, first_year, last_year):
+        self.years = list(range(first_year, last_year + 1))
+        self.months = [(y, m) for y in self.years for m in range(1, 13)]
+        self.bites = {'year': defaultdict(lambda: [0] * len(self.years)),
+                      'month': defaultdict(lambda: [0] * len(self.months))}
+        self.licenses = {}
+        self.undated_bites = 0
+
+    def periods(self, granularity):
+        if granularity == 'year':
+            return [str(y) for y in self.years]
+        return [f"{y}-{m:02d}" for y, m in self.months]
+
+
+def build_time_series(bite_table, license_table, classify_bite, classify_license, years=None):
+    """
+    Count bites and active licenses per breed for every year and month.
+
+    Args:
+        bite_table, license_table: Tables from dataset_cache
+        classify_bite, classify_license: raw breed -> label (None = excluded)
+        years (tuple or None): (first, last) year; default is the bite data's range
+
+    Returns:
+        TimeSeries
+
+    Raises:
+        ValueError: If there are no dated bites (and no years) or first > last
+    """
+    bite_labels = [classify_bite(raw) for raw in bite_table.breeds]
+    dated = Counter()
+    undated = 0
+    for year, month, code in bite_table.rows('year', 'month', 'breed'):
+        label = bite_labels[code]
+        if label is None:
+            continue
+        if year > 0:
+            dated[label, year, month] += 1
+        else:
+            undated += 1
+
+    if years is None:
+        bite_years = [year for _, year, _ in dated]
+        if not bite_years:
+            raise ValueError("No dated bites to build a time series from")
+        years = (min(bite_years), max(bite_years))
+    if years[0] > years[1]:
+        raise ValueError(f"Empty year range {years[0]}:{years[1]} (FIRST must not be after LAST)")
+    series = TimeSeries(*years)
+    series.undated_bites = undated
+    first, n_years = years[0], len(series.years)
+
+    for (label, year, month), n in dated.items():
+        y = year - first
+        if 0 <= y < n_years:
+            series.bites['year'][label][y] += n
+            if 1 <= month <= 12:
+                series.bites['month'][label][y * 12 + month - 1] += n
+
+    # Difference arrays: +1 at the first active period, -1 after the last
+    license_labels = [classify_license(raw) for raw in license_table.breeds]
+    diffs = {'year': defaultdict(lambda: [0] * (n_years + 1)),
+             'month': defaultdict(lambda: [0] * (n_years * 12 + 1))}
+
+    def add(granularity, label, start, end, n_periods):
+        if end < 0 or start >= n_periods or end < start:
+            return
+        diff = diffs[granularity][label]
+        diff[max(start, 0)] += 1
+        diff[min(end, n_periods - 1) + 1] -= 1
+
+    for iy, im, ey, em, code in license_table.rows('issued_year', 'issued_month',
+                                                   'expired_year', 'expired_month', 'breed'):
+        label = license_labels[code]
+        if label is None or iy <= 0 or ey <= 0:
+            continue
+        add('year', label, iy - first, ey - first, n_years)
+        if 1 <= im <= 12 and 1 <= em <= 12:
+            add('month', label, (iy - first) * 12 + im - 1, (ey - first) * 12 + em - 1, n_years * 12)
+
+    for granularity, by_label in diffs.items():
+        series.licenses[granularity] = {label: list(accumulate(diff[:-1])) for label, diff in by_label.items()}
+    return series
+
+
+def relative_risk_series(series, granularity, baseline=BASELINE, min_licenses=MIN_LICENSES):
+    """
+    Per-breed RR versus `baseline` for every period.
+
+    Returns:
+        dict: breed -> list of (bites, licenses, rr) per period; rr is None
+        where the breed or baseline is below min_licenses or the baseline
+        has no bites
+    """
+    bites = series.bites[granularity]
+    licenses = series.licenses[granularity]
+    n = len(series.periods(granularity))
+    empty = [0] * n
+    base_bites, base_licenses = bites.get(baseline, empty), licenses.get(baseline, empty)
+
+    results = {}
+    for breed in set(bites) | set(licenses):
+        rows = []
+        for i, (b, l) in enumerate(zip(bites.get(breed, empty), licenses.get(breed, empty))):
+            rr = None
+            if l >= min_licenses and base_licenses[i] >= min_licenses and base_bites[i]:
+                rr = (b / l) / (base_bites[i] / base_licenses[i])
+            rows.append((b, l, rr))
+        results[breed] = rows
+    return results
+
+
+def write_csv(series, filename, baseline=BASELINE, min_licenses=MIN_LICENSES):
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['granularity', 'period', 'breed', 'bites', 'licenses', 'rr'])
+        for granularity in ('year', 'month'):
+            periods = series.periods(granularity)
+            rr = relative_risk_series(series, granularity, baseline, min_licenses)
+            for breed in sorted(rr):
+                for period, (b, l, r) in zip(periods, rr[breed]):
+                    if b or l:
+                        writer.writerow([granularity, period, breed, b, l, '' if r is None else f"{r:.4f}"])
+
+
+def create_line_chart_svg(periods, lines, filename, title):
+    # lines is list of (label, [value or None per period]); returns False if nothing was drawn
+    return render(Chart('line', filename, (periods, lines, title)))
+
+
+def _slug(name):
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+
+
+def write_multiples(periods, rr, breeds, directory, baseline, granularity, workers=1):
+    """One RR chart per breed, all on the same y scale. Returns the filenames written."""
+    values = [r[2] for b in breeds for r in rr[b] if r[2] is not None]
+    y_max = max(values + [1]) * 1.1
+    os.makedirs(directory, exist_ok=True)
+    charts = (Chart('line', os.path.join(directory, f"rr_{_slug(b)}.svg"),
+                    (periods, [(b, [r[2] for r in rr[b]])], f"{b}: Relative Risk vs {baseline} by {granularity.title()}"),
+                    {'y_max': y_max})
+              for b in breeds)
+    return render_batch(charts, workers)
+
+
+def _year_range(spec):
+    first, _, last = spec.partition(':')
+    first, last = int(first), int(last or first)
+    if first > last:
+        raise argparse.ArgumentTypeError(f"{spec}: FIRST must not be after LAST")
+    return first, last
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-year and per-month relative risk time series.")
+    parser.add_argument('--years', type=_year_range, default=None, help="FIRST:LAST (default: bite data range)")
+    parser.add_argument('--method', choices=['analyze', 'redistribute'], default='analyze',
+                        help="breed classification to group by")
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--min-licenses', type=int, default=MIN_LICENSES)
+    parser.add_argument('--top', type=int, default=15, help="breeds in the printed table")
+    parser.add_argument('--breeds', default=None, help="comma-separated breeds to chart (default: top 6)")
+    parser.add_argument('--chart', choices=['year', 'month'], default='year', help="chart granularity")
+    parser.add_argument('--multiples', metavar='DIR', default=None,
+                        help="also write one chart per table breed into DIR, on a shared y scale")
+    parser.add_argument('--workers', type=int, default=1, help="processes for --multiples (0: all cores)")
+    args = parser.parse_args()
+
+    classify_bite, classify_license = breed_classifiers(args.method)
+    try:
+        series = build_time_series(load_bites(BITE_CSV), load_licenses(LICENSE_CSV),
+                                   classify_bite, classify_license, args.years)
+    except ValueError as e:
+        parser.error(str(e))
+    yearly = relative_risk_series(series, 'year', args.baseline, args.min_licenses)
+
+    print("=" * 70)
+    print(f"RELATIVE RISK TIME SERIES vs {args.baseline} ({args.method} breeds, "
+          f"{series.years[0]}-{series.years[-1]})")
+    print("=" * 70)
+    print(f"Undated bites (not placed in any period): {series.undated_bites}")
+
+    # Breeds with an RR in at least one year, ordered by total bites
+    ranked = sorted((b for b, rows in yearly.items() if b != args.baseline and any(r[2] is not None for r in rows)),
+                    key=lambda b: sum(r[0] for r in yearly[b]), reverse=True)[:args.top]
+    header = f"\n{'Breed':<22}" + "".join(f"{y:>7}" for y in series.years)
+    print(header)
+    print("-" * (len(header) - 1))
+    for breed in ranked:
+        cells = "".join(f"{r[2]:>7.2f}" if r[2] is not None else f"{'-':>7}" for r in yearly[breed])
+        print(f"{breed[:21]:<22}{cells}")
+
+    write_csv(series, OUTPUT_CSV, args.baseline, args.min_licenses)
+    print(f"\nAll periods written to {OUTPUT_CSV}")
+
+    chart_breeds = [b.strip() for b in args.breeds.split(',')] if args.breeds else ranked[:6]
+    chart_rr = yearly if args.chart == 'year' else relative_risk_series(series, 'month', args.baseline, args.min_licenses)
+    lines = [(b, [r[2] for r in chart_rr[b]]) for b in chart_breeds if b in chart_rr]
+    if create_line_chart_svg(series.periods(args.chart), lines, OUTPUT_SVG,
+                             f"Relative Risk vs {args.baseline} by {args.chart.title()}"):
+        print(f"Chart written to {OUTPUT_SVG}")
+    else:
+        print(f"No RR values to chart; {OUTPUT_SVG} not written")
+
+    if args.multiples:
+        written = write_multiples(series.periods(args.chart), chart_rr, ranked, args.multiples,
+                                  args.baseline, args.chart, args.workers or None)
+        print(f"{len(written)} small-multiple charts written to {args.multiples}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Vectorized Counting Engine
+
+Optional NumPy path for the per-row counting loops in the analysis scripts.
+
+The cached dataset columns (see dataset_cache) are viewed as NumPy arrays
+without copying. Breeds become integer category codes: each distinct raw
+breed string is classified once and mapped to a label code. Date windows
+are applied as boolean masks, and per-breed counts come from np.bincount.
+The per-breed risk and RR tables become array divisions.
+
+NumPy is optional. If it is not installed (or USE_NUMPY is False),
+available() returns False and the scripts fall back to their Counter loops.
+Both paths produce identical counts.
+"""
+
+from collections import Counter
+
+from dataset_cache import NO_DATE
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+# --- Configuration ---
+USE_NUMPY = True
+
+
+def available():
+    """Return True if the vectorized engine can be used."""
+    return USE_NUMPY and np is not None
+
+
+def column(table, name):
+    """View a cached table column as a NumPy array (zero-copy).
+
+    Columns are array.array objects, or typed memoryviews of a mapped file
+    (see columnar_store).
+    """
+    col = table[name]
+    return np.frombuffer(col, dtype=np.dtype(getattr(col, 'typecode', None) or col.format))
+
+
+def bite_window_mask(year, min_year, max_year):
+    """Rows kept by a bite-year window. Undated rows are kept; unparseable ones are not."""
+    return (year == NO_DATE) | ((year >= min_year) & (year <= max_year))
+
+
+def license_window_mask(year, month, min_year, min_month, max_year, max_month):
+    """Rows kept by a (year, month) license window. Undated rows are kept; unparseable ones are not."""
+    after_start = (year > min_year) | ((year == min_year) & (month >= min_month))
+    before_end = (year < max_year) | ((year == max_year) & (month <= max_month))
+    return (year == NO_DATE) | (after_start & before_end)
+
+
+def encode_labels(breeds, classify, exclude=()):
+    """Classify each distinct raw breed string once.
+
+    Returns (lookup, labels): lookup[raw_code] is the label code, or -1 when
+    the classifier returns None or a label in `exclude`.
+    """
+    labels = []
+    label_codes = {}
+    lookup = np.full(len(breeds), -1, dtype=np.int32)
+    for code, raw in enumerate(breeds):
+        label = classify(raw)
+        if label is None or label in exclude:
+            continue
+        if label not in label_codes:
+            label_codes[label] = len(labels)
+            labels.append(label)
+        lookup[code] = label_codes[label]
+    return lookup, labels
+
+
+def count_labels(table, classify, mask=None, exclude=()):
+    """Count rows per classified breed label with np.bincount.
+
+    Labels are inserted in order of first occurrence, the same order a
+    row-by-row Counter would produce, so most_common() breaks ties
+    identically.
+    """
+    lookup, labels = encode_labels(table.breeds, classify, exclude)
+    codes = column(table, 'breed')
+    if mask is not None:
+        codes = codes[mask]
+    label_codes = lookup[codes]
+    label_codes = label_codes[label_codes >= 0]
+
+    counts = np.bincount(label_codes, minlength=len(labels))
+    present, first_row = np.unique(label_codes, return_index=True)
+    order = present[np.argsort(first_row, kind='stable')]
+    return Counter({labels[i]: int(counts[i]) for i in order})
+
+
+def count_matching(table, predicate, mask=None):
+    """Count rows whose raw breed string satisfies `predicate`."""
+    hits = np.fromiter((bool(predicate(raw)) for raw in table.breeds), dtype=bool, count=len(table.breeds))
+    codes = column(table, 'breed')
+    if mask is not None:
+        codes = codes[mask]
+    return int(np.count_nonzero(hits[codes]))
+
+
+def relative_risks(bite_counts, license_counts, min_licenses, baseline_risk=None):
+    """Per-breed risk (bites / licenses) and RR for breeds with enough licenses.
+
+    Returns {breed: {'bites', 'licenses', 'risk', 'rr'}}. Bite and license
+    values are passed through unchanged; 'rr' is 0 when there is no
+    positive baseline.
+    """
+    breeds = [b for b in license_counts if license_counts[b] >= min_licenses]
+    bites = [bite_counts.get(b, 0) for b in breeds]
+    licenses = [license_counts[b] for b in breeds]
+
+    risk = np.asarray(bites, dtype=np.float64) / np.asarray(licenses, dtype=np.float64)
+    if baseline_risk is not None and baseline_risk > 0:
+        rr = risk / baseline_risk
+    else:
+        rr = np.zeros_like(risk)
+
+    return {
+        breed: {'bites': b, 'licenses': n, 'risk': float(r), 'rr': float(q)}
+        for breed, b, n, r, q in zip(breeds, bites, licenses, risk, rr)
+    }